@@ -0,0 +1,623 @@
+import os
+import threading
+from collections import OrderedDict
+
+import instrumentation
+from benchmark_cache import load_cached_table
+from benchmark_delta import apply_delta_file
+from process_attribution import describe_top
+from storage_probe import BUSY_THRESHOLD, KIND_TABLES, LATENCY_THRESHOLDS_MS
+from upgrade_optimizer import load_price_list, optimize_upgrades, price_index
+
+# Headless analysis core.
+# AnalysisEngine holds the benchmark tables and implements bottleneck detection and
+# upgrade recommendations for a system_info snapshot, without any UI dependency, so
+# it can back the Tk window, batch jobs and services alike.
+
+BENCHMARK_DIR = 'Benchmarks'
+
+# Benchmark table for each component, as attribute name -> CSV file
+BENCHMARK_FILES = {
+    'cpu_data': 'CPU_UserBenchmarks.csv',
+    'gpu_data': 'GPU_UserBenchmarks.csv',
+    'ram_data': 'RAM_UserBenchmarks.csv',
+    'ssd_data': 'SSD_UserBenchmarks.csv',
+    'hdd_data': 'HDD_UserBenchmarks.csv',
+    'usb_data': 'USB_UserBenchmarks.csv',
+}
+
+# system_info entries that hold percentages
+USAGE_KEYS = ('cpu_usage', 'memory_usage', 'disk')
+
+# A sampled usage window (system_info['usage']) replaces the single readings once it has
+# this many samples; a resource must be saturated for this share of the window to count
+MIN_WINDOW_SAMPLES = 5
+SUSTAINED_FRACTION = 0.25
+
+# A long-term history (system_info['history'], a HistoryStore summary) is judged once it spans this
+# many days; a resource whose usage climbs faster than these points per day is called out
+MIN_HISTORY_DAYS = 1.0
+RISING_PER_DAY = {'memory': 1.0, 'swap': 1.0, 'disk_busy': 2.0}
+
+# Most analysis results remembered per engine, keyed by the snapshot fields they depend on
+RESULT_CACHE_SIZE = 4096
+
+# system_info entries that identify the hardware, as opposed to its current load
+HARDWARE_KEYS = ('cpu', 'gpu', 'ram', 'ssd', 'storage', 'measured')
+
+
+def normalize_system_info(system_info):
+    # Return a copy of a snapshot with all percentage values as floats
+    system_info = dict(system_info)
+    for key in USAGE_KEYS:
+        try:
+            system_info[key] = float(system_info[key])
+        except (KeyError, TypeError, ValueError):
+            system_info[key] = 0.0
+    return system_info
+
+
+def fingerprint(system_info, keys):
+    # Hashable summary of the given snapshot fields, e.g. (('cpu', 'Ryzen 7 5800X'), ('gpu', ...))
+    return tuple((key, _freeze(system_info[key])) for key in keys if key in system_info)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return repr(value)
+
+
+class ResultCache:
+    # Bounded LRU mapping of result keys to computed results, safe to share between threads
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        # Cached result for key, computing and storing it on a miss
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                instrumentation.count('result_cache.hit')
+                return self.entries[key]
+            self.misses += 1
+        instrumentation.count('result_cache.miss')
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def info(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize}
+
+
+class AnalysisEngine:
+    def __init__(self, tables, cache_size=RESULT_CACHE_SIZE):
+        # tables maps the attribute names in BENCHMARK_FILES to BenchmarkTables
+        self.tables = dict(tables)
+        for attr, table in self.tables.items():
+            setattr(self, attr, table)
+        # Results keyed by what they were computed from: the relevant snapshot fields and the
+        # table versions, so a delta applied to any table makes older entries unreachable
+        self.results = ResultCache(cache_size)
+        self.prices = []        # Price list entries, see load_prices
+        self.price_index = {}
+
+    def data_version(self):
+        return tuple(table.version for table in self.tables.values())
+
+    def _cached(self, name, system_info, keys, compute, *args):
+        key = (name, args, fingerprint(system_info, keys), self.data_version())
+        return self.results.get(key, compute)
+
+    @classmethod
+    def load(cls, directory=BENCHMARK_DIR, loader=load_cached_table, deduplicate=False):
+        # Load every benchmark table from a directory of UserBenchmark CSV files.
+        # With deduplicate, rows listing one model under several part numbers are collapsed.
+        with instrumentation.span('load_tables'):
+            engine = cls({attr: loader(os.path.join(directory, filename)) for attr, filename in BENCHMARK_FILES.items()})
+            if deduplicate:
+                with instrumentation.span('deduplicate'):
+                    for table in engine.tables.values():
+                        table.deduplicate()
+        return engine
+
+    def apply_delta(self, attr, filename):
+        # Merge a delta CSV into one table (an attribute name from BENCHMARK_FILES) in place.
+        # Returns the counts from benchmark_delta.apply_delta.
+        if attr not in self.tables:
+            raise KeyError(f"Unknown benchmark table {attr!r}")
+        return apply_delta_file(self.tables[attr], filename)
+
+    def analyze(self, system_info, component=None):
+        # Full analysis of one snapshot, as a JSON-friendly dict.
+        # With a component ("CPU", "GPU", "RAM" or "SSD"), also includes a specific upgrade recommendation.
+        with instrumentation.span('analyze'):
+            system_info = normalize_system_info(system_info)
+            result = {
+                'bottleneck': self.detect_bottleneck(system_info),
+                'upgrade_recommendations': self.generate_upgrade_recommendations(system_info),
+                'general_recommendations': self.generate_general_recommendations(system_info),
+            }
+            if component:
+                recommendation = self.get_recommendation(system_info, component)
+                result['component'] = component
+                result['recommendation'] = recommendation
+                result['compatibility'] = self.check_compatibility(system_info, component, recommendation)
+                result['potential_bottleneck'] = self.analyze_potential_bottleneck(system_info, component, recommendation)
+            return result
+
+    def calculate_score(self, component, value):
+        component = component.lower()
+        
+        if component == 'cpu':
+            # Assuming value is clock speed in GHz
+            return value * 1000  # Simple score based on clock speed
+        
+        elif component == 'gpu':
+            # Assuming value is VRAM in GB
+            return value * 500  # Simple score based on VRAM
+        
+        elif component == 'ram':
+            # Assuming value is RAM size in GB
+            return value * 100  # Simple score based on RAM size
+        
+        elif component == 'ssd' or component == 'hdd':
+            # Assuming value is storage size in GB
+            return value * 0.5  # Simple score based on storage size
+        
+        else:
+            # For unknown components, return a default score
+            return 0
+
+    def component_scores(self, system_info):
+        # Scores of the installed CPU, GPU, RAM and SSD. Components measured by the micro-benchmarks
+        # (system_info['measured']) use the measured score, the rest are looked up by name.
+        scores = self._cached('component_scores', system_info, HARDWARE_KEYS, lambda: self._component_scores(system_info))
+        return dict(scores)
+
+    def _component_scores(self, system_info):
+        measured = system_info.get('measured') or {}
+        drive = self.system_drive(system_info)
+        scores = {}
+        for component, benchmark_data in (("CPU", self.cpu_data), ("GPU", self.gpu_data), ("RAM", self.ram_data), ("SSD", self.ssd_data)):
+            key = component.lower()
+            if isinstance(measured.get(key), (int, float)):
+                scores[component] = self.clamp_score(benchmark_data, float(measured[key]))
+            elif key == 'ssd' and drive is not None and drive['table'] is not None:
+                scores[component] = drive['score']  # The system drive, scored in its own table
+            else:
+                scores[component] = self.get_benchmark_score(benchmark_data, str(system_info.get(key, 'Unknown')))
+        return scores
+
+    @staticmethod
+    def clamp_score(benchmark_data, score):
+        # Keep a measured score within the table's benchmark range. Uncalibrated micro-benchmark
+        # scores can land far outside it (an NVMe drive scoring above every SSD in the table).
+        bounds = benchmark_data.score_index.benchmark_range()
+        if bounds is None:
+            return score
+        return min(max(score, bounds[0]), bounds[1])
+
+    def storage_devices(self, system_info):
+        # Drives from system_info['storage'] (storage_probe.list_devices), system drive first, each with
+        # the table for its kind and its best matching row there: 'table', 'match', 'score' and 'rank'.
+        # Drives of unknown kind (virtual disks) are not looked up and have no table.
+        return self._cached('storage', system_info, ('storage',), lambda: self._storage_devices(system_info))
+
+    def _storage_devices(self, system_info):
+        devices = []
+        for device in system_info.get('storage') or ():
+            if not isinstance(device, dict):
+                continue
+            attr = KIND_TABLES.get(device.get('kind', 'ssd'))
+            name = f"{device.get('vendor') or ''} {device.get('model') or ''}".strip()
+            row = self.tables[attr].find(name) if attr and name else None
+            devices.append(dict(device,
+                                table=attr[:-len('_data')].upper() if attr else None,
+                                match=f"{row.brand} {row.model}" if row is not None else None,
+                                score=row.benchmark if row is not None else 0.0,
+                                rank=row.rank if row is not None else float('inf')))
+        return devices
+
+    def system_drive(self, system_info):
+        # The drive the storage probe marked as holding the system, or None when the probe did not
+        # run or could not tell which drive that is
+        return next((device for device in self.storage_devices(system_info) if device.get('system')), None)
+
+    def installed_name(self, system_info, key):
+        # Name of the installed part for a component key. The SSD is the system drive when the storage
+        # probe identified it and its kind; a hard disk or USB system drive means there is no SSD to
+        # look up. Otherwise the name in system_info is used.
+        if key == 'ssd':
+            device = self.system_drive(system_info)
+            if device is not None and device['table'] is not None:
+                if device.get('kind') != 'ssd':
+                    return "Unknown"
+                return device['match'] or device.get('model') or "Unknown"
+        return system_info.get(key, "Unknown")
+
+    def detect_bottleneck(self, system_info):
+        with instrumentation.span('detect_bottleneck'):
+            return self._detect_bottleneck(system_info)
+
+    def _detect_bottleneck(self, system_info):
+        scores = self.component_scores(system_info)
+        cpu_score, gpu_score, ram_score, ssd_score = scores["CPU"], scores["GPU"], scores["RAM"], scores["SSD"]
+        
+        # More sophisticated bottleneck detection
+        cpu_gpu_ratio = cpu_score / gpu_score if gpu_score else float('inf')
+        if cpu_gpu_ratio < 0.5:
+            return "CPU (significantly weaker than GPU)"
+        elif cpu_gpu_ratio > 2:
+            return "GPU (significantly weaker than CPU)"
+        elif ram_score < min(cpu_score, gpu_score) * 0.5:
+            return "RAM (significantly slower than CPU/GPU)"
+        elif ssd_score < min(cpu_score, gpu_score, ram_score) * 0.3:
+            return "SSD (significantly slower than other components)"
+        else:
+            return "Balanced system (no significant bottleneck)"
+
+    def get_benchmark_score(self, benchmark_data, component_name):
+        # Get the benchmark score for a given component
+        if isinstance(component_name, (int, float)):
+            return component_name  # Return the usage percentage as the score
+        item = benchmark_data.find(component_name)
+        if item is not None:
+            return item.benchmark
+        return 0.0  # Return a low score if no match is found to ensure upgrades are recommended
+
+    def get_recommendation(self, system_info, component):
+        # Get a specific upgrade recommendation for a given component
+        with instrumentation.span('recommendation', component=component):
+            return self._cached('recommendation', system_info, (component.lower(), 'storage'),
+                                lambda: self._get_recommendation(system_info, component), component)
+
+    def _get_recommendation(self, system_info, component):
+        component_lower = component.lower()
+        benchmark_data = {
+            "cpu": self.cpu_data,
+            "gpu": self.gpu_data,
+            "ram": self.ram_data,
+            "ssd": self.ssd_data
+        }.get(component_lower)
+
+        if not benchmark_data:
+            return f"No benchmark data available for {component}"
+
+        current_model = self.installed_name(system_info, component_lower)
+        current_score = self.get_benchmark_score(benchmark_data, current_model)
+        current_rank = self.get_component_rank(benchmark_data, current_model)
+
+        # Find the best performing component above the current one, from the table's score index
+        better_components = benchmark_data.better_than(current_score, current_rank)
+
+        if better_components:
+            # Recommend the component with the highest benchmark and lowest rank
+            recommendation = better_components[0]
+            return f"{recommendation.brand} {recommendation.model} (Rank: {recommendation.rank}, Score: {recommendation.benchmark:.1f})"
+        else:
+            return f"Your current {component} is already top-tier. No upgrade necessary."
+
+    def load_prices(self, filename):
+        # Use a local price list CSV (Type, Part Number, Brand, Model, Price) for prices and budget searches
+        self.prices = load_price_list(filename)
+        self.price_index = price_index(self.prices)
+        return len(self.prices)
+
+    def get_price(self, model):
+        # Lowest listed price of a part, by part number, model or "brand model"; None when it is not listed
+        return self.price_index.get(str(model).strip().lower())
+
+    def optimize_upgrades(self, system_info, budget, weights=None, limit=None):
+        # Pareto frontier of CPU/GPU/RAM/SSD upgrade sets within budget from the loaded price list,
+        # cheapest first; the last entry is the best balanced system the budget buys
+        return optimize_upgrades(self, normalize_system_info(system_info), self.prices, budget, weights, limit)
+
+    def check_compatibility(self, system_info, component, recommendation):
+        component = component.lower()
+        
+        if component == "cpu":
+            current_socket = self.get_cpu_socket(system_info.get('cpu', 'Unknown'))
+            new_socket = self.get_cpu_socket(recommendation)
+            if current_socket != new_socket:
+                return f"Incompatible: Current socket {current_socket}, recommended CPU uses {new_socket}"
+        elif component == "ram":
+            current_type = self.get_ram_type(system_info.get('memory', 'Unknown'))
+            new_type = self.get_ram_type(recommendation)
+            if current_type != new_type:
+                return f"Incompatible: Current RAM type {current_type}, recommended RAM is {new_type}"
+        
+        return "Compatible with current system"
+
+    def get_cpu_socket(self, cpu_model):
+        # This is a placeholder. In a real application, you'd want to use a database or API to get this information.
+        return "LGA1200"  # Example socket
+
+    def get_ram_type(self, ram_model):
+        # This is a placeholder. In a real application, you'd want to use a database or API to get this information.
+        return "DDR4"  # Example RAM type
+
+    def analyze_potential_bottleneck(self, system_info, component, recommendation):
+        current_scores = self.component_scores(system_info)
+        
+        if component and component.lower() in ["cpu", "gpu", "ram", "ssd"]:
+            data_attr = f"{component.lower()}_data"
+            if hasattr(self, data_attr):
+                new_score = self.get_benchmark_score(getattr(self, data_attr), recommendation)
+                current_scores[component] = new_score
+            else:
+                return f"Error: No benchmark data available for {component}"
+        else:
+            return "Error: Invalid component selected"
+        
+        bottleneck = min(current_scores, key=current_scores.get)
+        if bottleneck == component:
+            return f"No new bottleneck introduced. {component} will still be the limiting factor."
+        else:
+            return f"Potential new bottleneck: {bottleneck}"
+
+    def generate_upgrade_recommendations(self, system_info):
+        with instrumentation.span('upgrade_recommendations'):
+            return self._generate_upgrade_recommendations(system_info)
+
+    def _generate_upgrade_recommendations(self, system_info):
+        recommendations = []
+
+        # With a sampled usage window, judge CPU and RAM by percentiles and sustained saturation;
+        # otherwise fall back to the single readings in the snapshot
+        usage = system_info.get('usage')
+        if usage and usage.get('samples', 0) >= MIN_WINDOW_SAMPLES:
+            recommendations.extend(self.windowed_usage_recommendations(usage))
+        else:
+            # CPU recommendation
+            cpu_usage = system_info['cpu_usage']
+            if cpu_usage > 80:
+                recommendations.append(f"CPU usage is high ({cpu_usage:.1f}%). Consider upgrading your CPU.")
+            elif cpu_usage > 60:
+                recommendations.append(f"CPU usage is moderate ({cpu_usage:.1f}%). An upgrade might improve performance.")
+
+            # RAM recommendation
+            ram_usage = system_info['memory_usage']
+            if ram_usage > 80:
+                recommendations.append(f"RAM usage is high ({ram_usage:.1f}%). Consider adding more RAM.")
+            elif ram_usage > 60:
+                recommendations.append(f"RAM usage is moderate ({ram_usage:.1f}%). Adding more RAM might improve performance.")
+
+        # GPU recommendation
+        # Since we don't have GPU usage, we'll make a generic recommendation
+        recommendations.append("Consider upgrading your GPU if you experience lag in graphics-intensive applications.")
+
+        # Storage recommendation
+        disk_usage = system_info['disk']
+        if disk_usage > 80:
+            recommendations.append(f"Disk usage is high ({disk_usage:.1f}%). Consider upgrading to a larger or faster storage device.")
+        elif disk_usage > 60:
+            recommendations.append(f"Disk usage is moderate ({disk_usage:.1f}%). An SSD upgrade might improve system responsiveness.")
+
+        # Saturated drives, from per-device I/O rates
+        recommendations.extend(self.storage_io_notes(system_info))
+
+        # Name the processes behind a busy resource, when the snapshot carries process attribution
+        recommendations.extend(self.process_attribution_notes(system_info))
+
+        # Sustained load and rising usage over the recorded history
+        recommendations.extend(self.history_notes(system_info))
+
+        # If no specific recommendations, provide a general suggestion
+        if not recommendations:
+            recommendations.append("Your system is performing well. No immediate upgrades necessary.")
+
+        return "\n".join(recommendations)
+
+    def windowed_usage_recommendations(self, usage):
+        # Recommendations from a UsageSampler summary.
+        # A resource is "high" when its 95th percentile is above the threshold and it stayed
+        # saturated for a sustained share of the window, so short bursts are not blamed.
+        recommendations = []
+        metrics = usage.get('metrics', {})
+        minutes = usage.get('duration', 0.0) / 60.0
+
+        def stats(metric):
+            return metrics.get(metric) or {}
+
+        cpu = stats('cpu')
+        if cpu:
+            if cpu['p95'] > 80 and cpu.get('saturated_fraction', 0.0) >= SUSTAINED_FRACTION:
+                recommendations.append(f"CPU usage is high (95th percentile {cpu['p95']:.1f}%, above 80% for "
+                                       f"{cpu['saturated_fraction'] * 100:.0f}% of the last {minutes:.1f} minutes). Consider upgrading your CPU.")
+            elif cpu['p95'] > 60 and cpu['p50'] > 40:
+                recommendations.append(f"CPU usage is moderate (median {cpu['p50']:.1f}%, 95th percentile {cpu['p95']:.1f}%). "
+                                       f"An upgrade might improve performance.")
+            else:
+                core = stats('cpu_max_core')
+                if core and core['p95'] > 90 and core.get('saturated_fraction', 0.0) >= SUSTAINED_FRACTION:
+                    recommendations.append(f"A single CPU core is saturated for {core['saturated_fraction'] * 100:.0f}% of the window "
+                                           f"while average usage is {cpu['mean']:.1f}%. A CPU with faster single-core performance would help.")
+
+        memory = stats('memory')
+        swap = stats('swap')
+        if memory:
+            if memory['p95'] > 80 and memory.get('saturated_fraction', 0.0) >= SUSTAINED_FRACTION:
+                recommendations.append(f"RAM usage is high (95th percentile {memory['p95']:.1f}%, above 80% for "
+                                       f"{memory['saturated_fraction'] * 100:.0f}% of the window). Consider adding more RAM.")
+            elif memory['p95'] > 60:
+                recommendations.append(f"RAM usage is moderate (95th percentile {memory['p95']:.1f}%). Adding more RAM might improve performance.")
+        if swap and swap['p95'] > 10 and memory and memory['p95'] > 60:
+            recommendations.append(f"The system is swapping (95th percentile swap use {swap['p95']:.1f}%). More RAM would avoid paging.")
+
+        disk_busy = stats('disk_busy')
+        if disk_busy and disk_busy['p95'] > 80 and disk_busy.get('saturated_fraction', 0.0) >= SUSTAINED_FRACTION:
+            recommendations.append(f"Storage is busy {disk_busy['saturated_fraction'] * 100:.0f}% of the window "
+                                   f"(95th percentile {disk_busy['p95']:.1f}%). A faster storage device would reduce I/O waits.")
+        return recommendations
+
+    def storage_io_notes(self, system_info):
+        # One note per drive in system_info['storage_io'] (DiskIOSampler rates by device name) that is
+        # busy, or queueing with a latency above what its kind of drive should show
+        rates_by_device = system_info.get('storage_io')
+        if not isinstance(rates_by_device, dict):
+            return []
+        notes = []
+        for device in self.storage_devices(system_info):
+            rates = rates_by_device.get(device.get('name'))
+            if not rates:
+                continue
+            kind = device.get('kind', 'ssd')
+            busy = rates.get('busy')
+            slow = rates.get('latency_ms', 0.0) > LATENCY_THRESHOLDS_MS.get(kind, 50.0) and rates.get('queue_depth', 0.0) >= 1.0
+            if not ((busy is not None and busy > BUSY_THRESHOLD) or slow):
+                continue
+            load = f"{busy:.0f}% busy, " if busy is not None else ""
+            advice = {
+                'hdd': "An SSD would cut these waits.",
+                'usb': "Moving this workload to an internal drive would help.",
+            }.get(kind, "A faster (e.g. NVMe) drive or spreading I/O across drives would help.")
+            notes.append(f"Storage {device.get('name')} ({device['match'] or device.get('model') or kind.upper()}) is {load}"
+                         f"averaging {rates.get('latency_ms', 0.0):.1f} ms per request with {rates.get('queue_depth', 0.0):.1f} requests queued "
+                         f"({rates.get('read_bps', 0.0) / 2**20:.1f} MiB/s read, {rates.get('write_bps', 0.0) / 2**20:.1f} MiB/s written). {advice}")
+        return notes
+
+    def process_attribution_notes(self, system_info):
+        # Top consumers of each busy resource, from system_info['processes'] (ProcessSampler.attribution).
+        # Busy is judged like the recommendations above: by the usage window when there is one.
+        processes = system_info.get('processes')
+        if not isinstance(processes, dict):
+            return []
+        usage = system_info.get('usage') or {}
+        metrics = usage.get('metrics', {}) if usage.get('samples', 0) >= MIN_WINDOW_SAMPLES else {}
+
+        def level(metric, fallback=0.0):
+            stats = metrics.get(metric)
+            return stats['p95'] if stats else fallback
+
+        notes = []
+        if processes.get('cpu') and (level('cpu', system_info.get('cpu_usage', 0.0)) > 60 or level('cpu_max_core') > 90):
+            notes.append(f"Top CPU users: {describe_top(processes['cpu'], 'cpu')}.")
+        if level('memory', system_info.get('memory_usage', 0.0)) > 60:
+            if processes.get('memory'):
+                notes.append(f"Largest memory users: {describe_top(processes['memory'], 'memory')}.")
+            if processes.get('memory_growth'):
+                notes.append(f"Fastest growing memory users: {describe_top(processes['memory_growth'], 'memory_growth')}.")
+        if processes.get('disk') and level('disk_busy') > 80:
+            notes.append(f"Top disk I/O: {describe_top(processes['disk'], 'disk')}.")
+        return notes
+
+    def history_notes(self, system_info):
+        # Notes from system_info['history'] (HistoryStore.summary over days or weeks): resources that
+        # stayed saturated for a sustained share of the period, and usage that keeps climbing
+        history = system_info.get('history')
+        if not isinstance(history, dict) or history.get('samples', 0) < MIN_WINDOW_SAMPLES:
+            return []
+        days = history.get('duration', 0.0) / 86400.0
+        if days < MIN_HISTORY_DAYS:
+            return []
+        metrics = history.get('metrics', {})
+        notes = []
+        for metric, label, advice in (('cpu', "CPU usage", "Consider upgrading your CPU."),
+                                      ('memory', "RAM usage", "Consider adding more RAM."),
+                                      ('disk_busy', "Storage load", "A faster storage device would reduce I/O waits.")):
+            stats = metrics.get(metric)
+            if stats and stats['p95'] > 80 and stats.get('saturated_fraction', 0.0) >= SUSTAINED_FRACTION:
+                notes.append(f"{label} was above 80% for {stats['saturated_fraction'] * 100:.0f}% of the last {days:.1f} days "
+                             f"(95th percentile {stats['p95']:.1f}%). {advice}")
+        for metric, label in (('memory', "RAM usage"), ('swap', "Swap use"), ('disk_busy', "Storage load")):
+            stats = metrics.get(metric)
+            if not stats or (stats.get('trend_per_day') or 0.0) < RISING_PER_DAY[metric] or stats['p95'] <= 50:
+                continue
+            slope = stats['trend_per_day']
+            note = f"{label} has been rising by {slope:.1f} points per day over the last {days:.1f} days (now {stats['last']:.1f}%)."
+            if metric == 'memory' and stats['last'] < 90:
+                note += f" At this rate it passes 90% in about {(90 - stats['last']) / slope:.0f} days; plan for more RAM."
+            notes.append(note)
+        return notes
+
+    def get_component_rank(self, benchmark_data, component_name):
+        if not isinstance(component_name, str):
+            return float('inf')  # Return a high rank if component_name is not a string
+
+        item = benchmark_data.find(component_name)
+        if item is not None:
+            return item.rank
+        return float('inf')  # Return a high rank if no match is found
+
+    def generate_general_recommendations(self, system_info):
+        # The per-component advice depends only on the installed parts and is cached on their names;
+        # the disk usage line changes with every snapshot and is added afterwards
+        with instrumentation.span('general_recommendations'):
+            recommendations = list(self._cached('general_recommendations', system_info, ('cpu', 'ram', 'gpu', 'ssd', 'storage'),
+                                                lambda: self._component_recommendations(system_info)))
+        # Storage recommendation
+        disk_usage = system_info.get('disk')
+        if isinstance(disk_usage, (int, float)):
+            if disk_usage > 80:
+                recommendations.append(f"Disk usage is high ({disk_usage:.1f}%). Consider upgrading to a larger or faster storage device.")
+            elif disk_usage > 60:
+                recommendations.append(f"Disk usage is moderate ({disk_usage:.1f}%). An SSD upgrade might improve system responsiveness.")
+        else:
+            recommendations.append("Unable to determine disk usage. Consider checking your storage device's health.")
+
+        return "\n".join(recommendations)
+
+    def _component_recommendations(self, system_info):
+        recommendations = []
+
+        components = [
+            ('CPU', self.cpu_data, str(system_info.get('cpu', 'Unknown'))),
+            ('RAM', self.ram_data, str(system_info.get('ram', 'Unknown'))),
+            ('GPU', self.gpu_data, str(system_info.get('gpu', 'Unknown'))),
+            ('SSD', self.ssd_data, str(self.installed_name(system_info, 'ssd')))
+        ]
+        drive = self.system_drive(system_info)
+        if drive is not None and drive.get('kind') in ('hdd', 'usb'):
+            # The system drive is a hard disk or USB drive: any SSD is the upgrade
+            components.pop()
+            best = self.ssd_data.better_than(0.0)
+            kind = "hard disk" if drive.get('kind') == 'hdd' else "USB drive"
+            score = f", {drive['table']} score: {drive['score']:.1f}" if drive['match'] else ""
+            suggestion = f" such as {best[0].brand} {best[0].model} (Rank: {best[0].rank}, Score: {best[0].benchmark:.1f})" if best else ""
+            recommendations.append(f"Your system drive is a {kind} ({drive['match'] or drive.get('model') or drive.get('name')}{score}). "
+                                   f"Consider moving the system to an SSD{suggestion}.")
+
+        for component_name, benchmark_data, current_model in components:
+            current_score = self.get_benchmark_score(benchmark_data, current_model)
+            current_rank = self.get_component_rank(benchmark_data, current_model)
+
+            better_components = benchmark_data.better_than(current_score, current_rank)
+
+            if better_components:
+                recommendation = better_components[0]
+                
+                if current_score > 0:
+                    improvement_percentage = ((recommendation.benchmark - current_score) / current_score) * 100
+                    recommendations.append(f"Consider upgrading your {component_name} to {recommendation.brand} {recommendation.model} "
+                                           f"(Rank: {recommendation.rank}, Score: {recommendation.benchmark:.1f}). "
+                                           f"This would provide a {improvement_percentage:.1f}% performance improvement.")
+                else:
+                    recommendations.append(f"Consider upgrading your {component_name} to {recommendation.brand} {recommendation.model} "
+                                           f"(Rank: {recommendation.rank}, Score: {recommendation.benchmark:.1f}) "
+                                           f"for better performance.")
+            else:
+                if current_score > 0:
+                    recommendations.append(f"Your {component_name} ({current_model}, Score: {current_score:.1f}) is already high-performing. No immediate upgrade necessary.")
+                else:
+                    recommendations.append(f"Unable to determine the performance of your current {component_name} ({current_model}). Consider checking for updates or potential issues.")
+
+        return tuple(recommendations)
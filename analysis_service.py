@@ -0,0 +1,357 @@
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import instrumentation
+from analysis_engine import BENCHMARK_DIR, BENCHMARK_FILES, AnalysisEngine, normalize_system_info
+from benchmark_delta import apply_delta, read_delta_csv
+from usage_sampler import RingBuffer, percentile
+
+# Long-running HTTP/JSON analysis service.
+#
+# The benchmark tables are loaded and indexed once, then shared by every request.
+# Connections are handled on an asyncio event loop; analysis requests are queued
+# and run in small batches on one worker thread, so the loop keeps accepting
+# while a batch runs, identical payloads within a batch are computed once, and
+# the engine's indexes and result cache are only ever touched by one thread.
+#
+#   POST /bottleneck  system_info -> bottleneck and component scores
+#   POST /recommend   system_info (+ "component") -> full analysis
+#   POST /lookup      {"table": "cpu", "name": "...", "limit": 5} -> matching rows
+#                     (also GET /lookup?table=cpu&name=...)
+#   POST /delta?table=gpu  delta CSV body -> merge into a table
+#   GET  /metrics     request counts, latency percentiles, batch sizes, cache use,
+#                     and stage timings when instrumentation is on
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+BATCH_WINDOW = 0.002        # Seconds to wait for more requests before running a batch
+BATCH_SIZE = 64             # Most requests run in one batch
+LATENCY_WINDOW = 4096       # Latest requests per endpoint kept for percentiles
+MAX_BODY = 1 << 20          # Largest accepted request body, in bytes
+MAX_DELTA_BODY = 64 << 20
+
+# system_info fields checked before analysis: part names, objects, and objects holding only numbers
+PART_KEYS = ('cpu', 'gpu', 'ram', 'ssd')
+OBJECT_KEYS = ('usage', 'measured', 'history', 'processes', 'storage_io')
+NUMERIC_KEYS = ('usage', 'measured')
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def table_attr(name):
+    # 'cpu', 'CPU' or 'cpu_data' -> 'cpu_data'
+    attr = str(name).lower()
+    if not attr.endswith('_data'):
+        attr += '_data'
+    if attr not in BENCHMARK_FILES:
+        raise RequestError(400, f"unknown table {name!r}; expected one of {', '.join(a[:-5] for a in BENCHMARK_FILES)}")
+    return attr
+
+
+def parse_json(body):
+    try:
+        payload = json.loads(body or b'{}')
+    except ValueError as e:
+        raise RequestError(400, f"invalid JSON: {e}")
+    if not isinstance(payload, dict):
+        raise RequestError(400, "request body must be a JSON object")
+    return payload
+
+
+def validate_system_info(system_info):
+    # Reject snapshot fields of the wrong type with a 400 instead of failing inside the engine
+    for key in PART_KEYS:
+        if system_info.get(key) is not None and not isinstance(system_info[key], str):
+            raise RequestError(400, f"{key!r} must be a string")
+    for key in OBJECT_KEYS:
+        if system_info.get(key) is not None and not isinstance(system_info[key], dict):
+            raise RequestError(400, f"{key!r} must be an object")
+    for key in NUMERIC_KEYS:
+        if system_info.get(key) is not None and not _all_numbers(system_info[key]):
+            raise RequestError(400, f"{key!r} must only hold numbers")
+    storage = system_info.get('storage')
+    if storage is not None and not (isinstance(storage, list) and all(isinstance(device, dict) for device in storage)):
+        raise RequestError(400, "'storage' must be a list of objects")
+    return system_info
+
+
+def _all_numbers(value):
+    if isinstance(value, dict):
+        return all(_all_numbers(item) for item in value.values())
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class AnalysisService:
+    def __init__(self, engine, batch_window=BATCH_WINDOW, batch_size=BATCH_SIZE):
+        self.engine = engine
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.queue = None               # (handler, query, body, future); created on the serving loop
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+        self.handlers = {
+            '/bottleneck': self.bottleneck,
+            '/recommend': self.recommend,
+            '/lookup': self.lookup,
+            '/delta': self.delta,
+        }
+        self.started = time.time()
+        self.requests = {}              # Path -> number of requests
+        self.errors = {}                # Path -> number of non-200 responses
+        self.latencies = {}             # Path -> RingBuffer of seconds
+        self.batch_sizes = RingBuffer(LATENCY_WINDOW)
+
+    # Request handlers. They run on the worker thread and return JSON-friendly results.
+
+    def bottleneck(self, query, body):
+        system_info = normalize_system_info(validate_system_info(parse_json(body)))
+        return {
+            'bottleneck': self.engine.detect_bottleneck(system_info),
+            'scores': self.engine.component_scores(system_info),
+        }
+
+    def recommend(self, query, body):
+        system_info = parse_json(body)
+        component = system_info.pop('component', None) or query.get('component')
+        if component and not isinstance(component, str):
+            raise RequestError(400, "'component' must be a string")
+        if component and component.upper() not in ('CPU', 'GPU', 'RAM', 'SSD'):
+            raise RequestError(400, f"unknown component {component!r}")
+        validate_system_info(system_info)
+        return self.engine.analyze(system_info, component.upper() if component else None)
+
+    def lookup(self, query, body):
+        request = dict(query)
+        request.update(parse_json(body) if body else {})
+        name = request.get('name')
+        if not isinstance(name, str) or not name.strip():
+            raise RequestError(400, "lookup needs a 'name'")
+        try:
+            limit = max(1, min(50, int(request.get('limit', 5))))
+        except (TypeError, ValueError):
+            raise RequestError(400, "'limit' must be a number")
+        attr = table_attr(request.get('table', 'cpu'))
+        table = self.engine.tables[attr]
+        matches = []
+        for score, index in table.matcher.search(name, limit):
+            row = table[index]
+            matches.append({
+                'score': round(score, 4),
+                'brand': row.brand,
+                'model': row.model,
+                'part_numbers': row.part_numbers,
+                'rank': row.rank,
+                'benchmark': row.benchmark,
+                'samples': row.samples,
+                'url': row.url,
+            })
+        return {'table': attr[:-5], 'name': name, 'matches': matches}
+
+    def delta(self, query, body):
+        attr = table_attr(query.get('table', ''))
+        changes = read_delta_csv(io.StringIO(body.decode('utf-8', errors='replace')))
+        counts = apply_delta(self.engine.tables[attr], changes)
+        return {'table': attr[:-5], 'rows': len(self.engine.tables[attr]), 'changes': counts}
+
+    def metrics(self):
+        endpoints = {}
+        for path, buffer in self.latencies.items():
+            ordered = sorted(buffer.values())
+            endpoints[path] = {
+                'requests': self.requests.get(path, 0),
+                'errors': self.errors.get(path, 0),
+                'latency_ms': {f'p{p}': percentile(ordered, p, presorted=True) * 1000 for p in (50, 90, 99)}
+                              if ordered else {},
+            }
+        batches = sorted(self.batch_sizes.values())
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'endpoints': endpoints,
+            'batch_size': {'mean': sum(batches) / len(batches), 'p50': percentile(batches, 50, presorted=True),
+                           'max': batches[-1]} if batches else {},
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'result_cache': self.engine.results.info(),
+            'rows': {attr[:-5]: len(table) for attr, table in self.engine.tables.items()},
+            'instrumentation': instrumentation.TRACER.summary() if instrumentation.TRACER.enabled else None,
+        }
+
+    # Batching
+
+    def run_batch(self, batch):
+        # Runs on the worker thread. Requests with the same path, query and body are computed once.
+        done = {}
+        results = []
+        for handler, query, body, _ in batch:
+            key = (handler, tuple(sorted(query.items())), body) if handler != self.delta else None
+            if key is not None and key in done:
+                results.append(done[key])
+                continue
+            try:
+                with instrumentation.run(handler.__name__):
+                    result = (200, handler(query, body))
+            except RequestError as e:
+                result = (e.status, {'error': str(e)})
+            except Exception as e:
+                result = (500, {'error': f"{type(e).__name__}: {e}"})
+            if key is not None:
+                done[key] = result
+            results.append(result)
+        return results
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batch_sizes.append(len(batch))
+            try:
+                results = await loop.run_in_executor(self.worker, self.run_batch, batch)
+            except Exception as e:
+                results = [(500, {'error': f"{type(e).__name__}: {e}"})] * len(batch)
+            for (_, _, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def dispatch(self, method, path, query, body):
+        # (status, JSON-friendly result) for one request
+        if path == '/metrics':
+            return (200, self.metrics()) if method == 'GET' else (405, {'error': "use GET"})
+        handler = self.handlers.get(path)
+        if handler is None:
+            return 404, {'error': f"unknown path {path}", 'paths': sorted(list(self.handlers) + ['/metrics'])}
+        if method != 'POST' and not (method == 'GET' and path == '/lookup'):
+            return 405, {'error': "use POST"}
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((handler, query, body, future))
+        return await future
+
+    # HTTP
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                start = time.perf_counter()
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self.respond(writer, 400, {'error': "malformed request line"}, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                url = urlsplit(target)
+                path = url.path.rstrip('/') or '/'
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0 or length > (MAX_DELTA_BODY if path == '/delta' else MAX_BODY):
+                    await self.respond(writer, 413 if length > 0 else 400, {'error': "bad or too large Content-Length"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, result = await self.dispatch(method.upper(), path, dict(parse_qsl(url.query)), body)
+                await self.respond(writer, status, result, keep_alive)
+                self.record(path, status, time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, result, keep_alive):
+        payload = json.dumps(result).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload
+        )
+        await writer.drain()
+
+    def record(self, path, status, seconds):
+        if path not in self.handlers and path != '/metrics':
+            path = 'other'
+        self.requests[path] = self.requests.get(path, 0) + 1
+        if status != 200:
+            self.errors[path] = self.errors.get(path, 0) + 1
+        buffer = self.latencies.get(path)
+        if buffer is None:
+            buffer = self.latencies[path] = RingBuffer(LATENCY_WINDOW)
+        buffer.append(seconds)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        # Serve until cancelled; ready, if given, is called with the listening socket address
+        self.queue = asyncio.Queue()
+        batcher = asyncio.create_task(self.batcher())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        try:
+            if ready is not None:
+                ready(server.sockets[0].getsockname())
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.worker.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve bottleneck analysis over HTTP/JSON from one shared set of tables.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--benchmarks', default=BENCHMARK_DIR, help="directory containing the benchmark CSV files")
+    parser.add_argument('--deduplicate', action='store_true', help="collapse rows listing one model under several part numbers")
+    parser.add_argument('--batch-window', type=float, default=BATCH_WINDOW * 1000, help="milliseconds to gather a batch")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="most requests per batch")
+    parser.add_argument('--trace', metavar='DIR', help="record stage timings and write a JSON trace per request to DIR")
+    args = parser.parse_args(argv)
+    if args.trace:
+        instrumentation.TRACER.configure(True, args.trace)
+
+    start = time.perf_counter()
+    engine = AnalysisEngine.load(args.benchmarks, deduplicate=args.deduplicate)
+    for table in engine.tables.values():
+        table.matcher, table.score_index  # Build the indexes before the first request
+    print(f"Loaded {sum(len(t) for t in engine.tables.values())} rows in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+    service = AnalysisService(engine, args.batch_window / 1000.0, args.batch_size)
+    try:
+        asyncio.run(service.serve(args.host, args.port,
+                                  ready=lambda address: print(f"Listening on http://{address[0]}:{address[1]}", file=sys.stderr)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
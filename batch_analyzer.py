@@ -0,0 +1,192 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+from analysis_engine import BENCHMARK_DIR, AnalysisEngine
+
+# Headless batch analysis of many system_info snapshots.
+#
+# Snapshots are read lazily from JSON lines or CSV, analyzed in chunks on a
+# process pool whose workers each load the benchmark tables once, and written
+# out as JSON lines in input order while the rest of the batch is still running.
+# With tracing on, every record is analyzed as its own instrumentation run and
+# the traces are handed back to the parent process, which merges them into one
+# set of stage histograms.
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Benchmark tables of the current worker process, loaded by init_worker
+_engine = None
+_pending_traces = []  # Traces of the worker's table loading, returned with its first chunk
+
+
+def init_worker(benchmark_dir, trace=False):
+    global _engine
+    instrumentation.TRACER.enabled = trace
+    with instrumentation.run('load') as load_trace:
+        _engine = AnalysisEngine.load(benchmark_dir)
+    if load_trace is not None:
+        _pending_traces.append(load_trace.to_dict())
+
+
+def record_id(record, position):
+    # Identify a record by its id or hostname field, falling back to its position in the input
+    for key in ('id', 'hostname', 'host'):
+        if record.get(key) not in (None, ''):
+            return record[key]
+    return position
+
+
+def analyze_record(engine, record, position, component=None):
+    if '_error' in record:
+        # The input line could not be parsed
+        return {'id': record_id(record, position), 'error': record['_error']}
+    try:
+        result = engine.analyze(record, component)
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    return {'id': record_id(record, position), **result}
+
+
+def traced_record(engine, record, position, component, traces):
+    # analyze_record as an instrumentation run of its own, appending its trace to traces
+    trace = instrumentation.begin_run('analyze_record', position=position)
+    result = analyze_record(engine, record, position, component)
+    if trace is not None:
+        trace.attrs['id'] = result['id']
+        traces.append(instrumentation.end_run(trace))
+    return result
+
+
+def analyze_chunk(records, start, component=None):
+    # Runs in a worker process, against the engine loaded by init_worker.
+    # Returns (results, traces); traces is empty unless tracing is on.
+    traces = _pending_traces[:]
+    del _pending_traces[:]
+    results = [traced_record(_engine, record, start + i, component, traces) for i, record in enumerate(records)]
+    return results, traces
+
+
+def read_jsonl(file):
+    for line_number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = {'id': line_number, '_error': f"invalid JSON: {e}"}
+        if not isinstance(record, dict):
+            record = {'id': line_number, '_error': "record is not a JSON object"}
+        yield record
+
+
+def read_csv(file):
+    # One snapshot per row, with system_info keys as column names; empty cells are left out
+    for row in csv.DictReader(file):
+        yield {key: value for key, value in row.items() if key and value not in (None, '')}
+
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_records(records, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, component=None, benchmark_dir=BENCHMARK_DIR,
+                    on_trace=None):
+    # Analyze an iterable of system_info dicts, yielding one result dict per record in input order.
+    # workers=0 analyzes in this process; otherwise a process pool of that many workers
+    # (default: one per CPU) is used, with at most two chunks per worker in flight.
+    # With instrumentation on, on_trace is called with each run's trace from whichever process ran it.
+    tracing = instrumentation.TRACER.enabled
+    if workers == 0:
+        with instrumentation.run('load') as load_trace:
+            engine = AnalysisEngine.load(benchmark_dir)
+        traces = [load_trace.to_dict()] if load_trace is not None else []
+        for position, record in enumerate(records):
+            result = traced_record(engine, record, position, component, traces)
+            if on_trace is not None:
+                for trace in traces:
+                    on_trace(trace)
+            del traces[:]
+            yield result
+        return
+
+    def finish(future):
+        results, traces = future.result()
+        for trace in traces:
+            instrumentation.TRACER.merge(trace)
+            if on_trace is not None:
+                on_trace(trace)
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(benchmark_dir, tracing)) as executor:
+        in_flight = deque()
+        start = 0
+        for chunk in chunked(records, chunk_size):
+            in_flight.append(executor.submit(analyze_chunk, chunk, start, component))
+            start += len(chunk)
+            if len(in_flight) >= workers * 2:
+                yield from finish(in_flight.popleft())
+        while in_flight:
+            yield from finish(in_flight.popleft())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many system_info snapshots without a display.")
+    parser.add_argument('input', help="JSON lines or CSV file of snapshots, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSON lines output file (default: stdout)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="input format (default: from the file extension)")
+    parser.add_argument('--workers', type=int, help="worker processes; 0 runs in-process (default: one per CPU)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="snapshots per task")
+    parser.add_argument('--component', choices=['CPU', 'GPU', 'RAM', 'SSD'], help="also recommend an upgrade for this component")
+    parser.add_argument('--benchmarks', default=BENCHMARK_DIR, help="directory containing the benchmark CSV files")
+    parser.add_argument('--trace', help="write one JSON trace per analyzed snapshot to this JSON lines file "
+                                        "and print a summary of stage timings")
+    args = parser.parse_args(argv)
+
+    input_format = args.format
+    if input_format is None:
+        input_format = 'csv' if args.input.lower().endswith('.csv') else 'jsonl'
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', newline='')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+    trace_file = None
+    if args.trace:
+        instrumentation.TRACER.configure(True)
+        trace_file = open(args.trace, 'w')
+    try:
+        records = read_csv(input_file) if input_format == 'csv' else read_jsonl(input_file)
+        on_trace = (lambda trace: trace_file.write(json.dumps(trace) + '\n')) if trace_file else None
+        count = errors = 0
+        for result in analyze_records(records, args.workers, args.chunk_size, args.component, args.benchmarks, on_trace):
+            output_file.write(json.dumps(result) + '\n')
+            count += 1
+            errors += 'error' in result
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+        if trace_file is not None:
+            trace_file.close()
+    print(f"Analyzed {count} snapshots ({errors} errors)", file=sys.stderr)
+    if args.trace:
+        print(instrumentation.format_summary(instrumentation.TRACER.summary()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
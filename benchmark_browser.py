@@ -0,0 +1,415 @@
+import argparse
+import os
+import sys
+import tkinter as tk
+from array import array
+from tkinter import ttk
+
+from analysis_engine import BENCHMARK_DIR, AnalysisEngine
+from benchmark_cache import load_cached_table
+from model_matcher import NOISE_TOKENS, ORDINAL, TOKEN, UNIT_SUFFIX, compact, normalize
+
+# Interactive benchmark browser.
+#
+# BrowserModel holds the rows of one table that match a search, in the chosen
+# sort order, without ever sorting the table itself: rank and score orders come
+# from the table's ScoreIndex and the samples order is built once per table
+# version, so a search only has to order its matches. Matches come from prefix
+# lookups in the matcher's token index; a query that extends the previous one
+# narrows the previous result instead of starting over. The matcher and score
+# index are built when the model is created, not on the first keystroke.
+#
+# BenchmarkBrowser shows a model in a ttk.Treeview that holds only as many items
+# as fit on screen. Scrolling rewrites the values of those items rather than
+# inserting rows, so a 100k-row table costs the same to show as a 100-row one.
+
+SORT_COLUMNS = ('rank', 'benchmark', 'samples')
+SEARCH_DELAY_MS = 150       # Typing pause before a search runs
+SORT_MATCHES_BELOW = 8      # Order matches directly when they are under 1/8 of the table
+COMPARE_LIMIT = 6           # Selected parts listed in the comparison line
+
+# Treeview columns: (id, heading, width, anchor)
+COLUMNS = (
+    ('rank', "Rank", 60, 'e'),
+    ('brand', "Brand", 110, 'w'),
+    ('model', "Model", 300, 'w'),
+    ('benchmark', "Score", 80, 'e'),
+    ('samples', "Samples", 90, 'e'),
+    ('part_number', "Part Number", 160, 'w'),
+)
+
+
+def query_words(query):
+    # Words of a search, normalized like indexed names. Unlike tokenize(), noise words are
+    # kept, since "co" or "core" may be the start of a brand or model being typed.
+    words = []
+    for word in TOKEN.findall(normalize(query)):
+        unit = UNIT_SUFFIX.match(word)
+        if unit:
+            word = unit.group(1)
+        if word not in words:
+            words.append(word)
+    return words
+
+
+def table_label(attr):
+    # 'cpu_data' -> 'CPU'
+    return attr[:-len('_data')].upper() if attr.endswith('_data') else attr.upper()
+
+
+class BrowserModel:
+    def __init__(self, table):
+        self.table = table
+        self.version = table.version
+        self.sort_column = 'rank'
+        self.descending = False     # Reverses the natural order (best first) of the sort column
+        self.words = []             # Words of the query that narrowed the matches
+        self.part_row = None
+        self.matches = None         # Set of matching row indices, or None for every row
+        self.rows = None            # Matching row indices in natural sort order
+        self._orderings = {}        # Sort column -> (order, position of each row in order)
+        table.matcher
+        self.refresh()
+
+    def ordering(self, column):
+        # All row indices in a column's natural order, and each row's position in it
+        if self.version != self.table.version:
+            self._orderings = {}
+            self.version = self.table.version
+        cached = self._orderings.get(column)
+        if cached is None:
+            table = self.table
+            if column == 'rank':
+                order = table.score_index.by_rank
+            elif column == 'benchmark':
+                order = table.score_index.by_benchmark
+            elif column == 'samples':
+                samples = table.samples
+                ranks = table.ranks
+                order = array('I', sorted(range(len(table)), key=lambda i: (-samples[i], ranks[i])))
+            else:
+                raise ValueError(f"cannot sort by {column!r}")
+            position = array('I', bytes(4 * len(order)))
+            for place, index in enumerate(order):
+                position[index] = place
+            cached = self._orderings[column] = (order, position)
+        return cached
+
+    def refresh(self):
+        # Rebuild the view for the current query and sort column, e.g. after the table changed
+        self.matches, self.words = self._match(self.words, self.part_row, self.words[-1:])
+        self.rows = self._ordered(self.matches)
+
+    def _match(self, words, part_row, typing=()):
+        # (rows having a token starting with each word, or None for all rows; the words used).
+        # Noise words and ordinals such as "core" or "13th" are not indexed, so they are skipped
+        # unless they are still being typed (in typing) and start an indexed token, like "co".
+        matcher = self.table.matcher
+        matches = None
+        used = []
+        for word in words:
+            noise = word in NOISE_TOKENS or ORDINAL.match(word)
+            if noise and word not in typing:
+                continue
+            rows = matcher.prefix_rows(word)
+            if noise and not rows:
+                continue
+            used.append(word)
+            matches = rows if matches is None else matches & rows
+            if not matches:
+                break
+        if part_row is not None:
+            matches = (matches or set()) | {part_row}
+        return matches, used
+
+    def _ordered(self, matches, within=None):
+        # Matching rows in natural order: filtered from within (an ordered superset) when given,
+        # sorted by position when there are few, otherwise filtered from the full ordering
+        order, position = self.ordering(self.sort_column)
+        if matches is None:
+            return order
+        if within is not None:
+            return array('I', (index for index in within if index in matches))
+        if len(matches) * SORT_MATCHES_BELOW < len(order):
+            return array('I', sorted(matches, key=position.__getitem__))
+        return array('I', (index for index in order if index in matches))
+
+    def search(self, query):
+        # Show the rows whose names have words starting with each word of query, or the row
+        # with that part number; an empty query shows every row
+        if self.version != self.table.version:
+            self._orderings = {}
+            self.version = self.table.version
+            self.words, self.part_row = [], None
+            self.refresh()
+        part_number = compact(query)
+        part_row = self.table.matcher.part_numbers.get(part_number) if len(part_number) >= 4 else None
+        words = query_words(query)
+        typing = words[-1:] if query[-1:].isalnum() else ()
+        matches, words = self._match(words, part_row, typing)
+        # Every word extending a previous word matches a subset of its rows, so when each
+        # previous word is extended the new matches are among the rows already shown
+        narrows = (self.matches is not None and self.part_row is None and part_row is None
+                   and all(any(new.startswith(old) for new in words) for old in self.words))
+        previous = self.rows
+        self.matches, self.words, self.part_row = matches, words, part_row
+        self.rows = self._ordered(matches, previous if narrows else None)
+        return len(self.rows)
+
+    def sort(self, column, descending=None):
+        # Order the view by a column; repeating the current column flips the direction
+        if descending is None:
+            descending = not self.descending if column == self.sort_column else False
+        if column != self.sort_column:
+            self.sort_column = column
+            self.rows = self._ordered(self.matches)
+        self.descending = descending
+
+    def __len__(self):
+        return len(self.rows)
+
+    def row_at(self, position):
+        # Table row index shown at a position of the view
+        return self.rows[-1 - position] if self.descending else self.rows[position]
+
+    def values(self, index):
+        table = self.table
+        return (table.ranks[index], table.string_at('brand', index), table.string_at('model', index),
+                f"{table.benchmarks[index]:.1f}", table.samples[index], table.string_at('part_number', index))
+
+
+class BenchmarkBrowser(ttk.Frame):
+    def __init__(self, parent, tables, installed=None, visible_rows=20):
+        # tables maps attribute names from BENCHMARK_FILES to BenchmarkTables; installed, if given,
+        # is called with an attribute name and returns the installed part's name or None
+        super().__init__(parent)
+        self.tables = tables
+        self.installed = installed
+        self.models = {}            # Attribute name -> BrowserModel, kept so each keeps its query and order
+        self.model = None
+        self.offset = 0             # View position shown in the first slot
+        self.slots = []             # Treeview item ids, reused for whichever rows are visible
+        self.selected = set()       # Selected table row indices, across scrolling
+        self.search_job = None
+        self.rendering = False
+
+        controls = ttk.Frame(self)
+        controls.pack(fill='x', pady=5)
+        self.table_var = tk.StringVar(self)
+        self.table_combo = ttk.Combobox(controls, textvariable=self.table_var, state='readonly', width=6,
+                                        values=[table_label(attr) for attr in tables])
+        self.table_combo.pack(side='left', padx=5)
+        self.table_combo.bind('<<ComboboxSelected>>', lambda event: self.show_table(self.table_attr()))
+        ttk.Label(controls, text="Search:").pack(side='left')
+        self.search_var = tk.StringVar(self)
+        self.search_entry = ttk.Entry(controls, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side='left', padx=5, fill='x', expand=True)
+        self.search_var.trace_add('write', self.schedule_search)
+        self.count_label = ttk.Label(controls, text="")
+        self.count_label.pack(side='left', padx=5)
+
+        body = ttk.Frame(self)
+        body.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(body, columns=[column for column, _, _, _ in COLUMNS], show='headings',
+                                 height=visible_rows, selectmode='extended')
+        for column, heading, width, anchor in COLUMNS:
+            command = (lambda column=column: self.sort_by(column)) if column in SORT_COLUMNS else ''
+            self.tree.heading(column, text=heading, command=command)
+            self.tree.column(column, width=width, anchor=anchor, stretch=column == 'model')
+        self.scrollbar = ttk.Scrollbar(body, orient='vertical', command=self.on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.set_slot_count(visible_rows)
+
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_by(-1 if event.delta > 0 else 1, 'units', 3))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_by(-1, 'units', 3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_by(1, 'units', 3))
+        for key, step, what in (('<Prior>', -1, 'pages'), ('<Next>', 1, 'pages'), ('<Up>', -1, 'edge'), ('<Down>', 1, 'edge')):
+            self.tree.bind(key, lambda event, step=step, what=what: self.scroll_by(step, what))
+        self.tree.bind('<Home>', lambda event: self.scroll_to(0))
+        self.tree.bind('<End>', lambda event: self.scroll_to(len(self.model)))
+
+        self.compare_label = ttk.Label(self, text="Select parts to compare them", justify='left', wraplength=760)
+        self.compare_label.pack(fill='x', pady=5)
+
+        if tables:
+            self.show_table(next(iter(tables)))
+
+    def table_attr(self):
+        label = self.table_var.get()
+        return next(attr for attr in self.tables if table_label(attr) == label)
+
+    def show_table(self, attr):
+        self.table_var.set(table_label(attr))
+        model = self.models.get(attr)
+        if model is None:
+            model = self.models[attr] = BrowserModel(self.tables[attr])
+        self.model = model
+        self.selected = set()
+        self.search(self.search_var.get())
+
+    # Searching and sorting
+
+    def schedule_search(self, *args):
+        # Search once typing pauses, instead of on every keystroke
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        self.search(self.search_var.get())
+
+    def search(self, query):
+        count = self.model.search(query)
+        self.count_label.config(text=f"{count:,} of {len(self.model.table):,} parts")
+        self.scroll_to(0)
+
+    def sort_by(self, column):
+        self.model.sort(column)
+        for name, heading, _, _ in COLUMNS:
+            arrow = (" ▼" if self.model.descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=heading + arrow)
+        self.scroll_to(0)
+
+    # Windowed rendering
+
+    def set_slot_count(self, count):
+        count = max(1, count)
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert('', 'end', values=()))
+        for slot in self.slots[count:]:
+            self.tree.delete(slot)
+        del self.slots[count:]
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style(self).lookup('Treeview', 'rowheight') or 20)
+        heading_height = row_height + 4
+        count = max(1, (event.height - heading_height) // row_height)
+        if count != len(self.slots):
+            self.set_slot_count(count)
+            self.scroll_to(self.offset)
+
+    def scroll_to(self, offset):
+        total = len(self.model) if self.model is not None else 0
+        self.offset = max(0, min(offset, total - len(self.slots)))
+        self.render()
+
+    def scroll_by(self, step, what, units=1):
+        if what == 'pages':
+            units = len(self.slots) - 1
+        elif what == 'edge':
+            # Arrow keys move the selection within the window; at its edges the rows move instead
+            focus = self.tree.focus()
+            if focus not in self.slots:
+                return None
+            slot = self.slots.index(focus)
+            if 0 <= slot + step < len(self.slots):
+                return None
+            self.scroll_to(self.offset + step)
+            position = self.offset + slot
+            if position < len(self.model):
+                self.selected = {self.model.row_at(position)}
+                self.render()
+                self.update_comparison()
+            return 'break'
+        self.scroll_to(self.offset + step * units)
+        return 'break'
+
+    def on_scroll(self, action, amount, what=None):
+        # Scrollbar command: ('moveto', fraction) or ('scroll', steps, 'units' | 'pages')
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.model)))
+        else:
+            self.scroll_by(int(amount), what)
+
+    def render(self):
+        model = self.model
+        total = len(model) if model is not None else 0
+        self.rendering = True
+        try:
+            shown = []
+            for slot_number, slot in enumerate(self.slots):
+                position = self.offset + slot_number
+                if position < total:
+                    index = model.row_at(position)
+                    self.tree.item(slot, values=model.values(index))
+                    self.tree.move(slot, '', slot_number)
+                    if index in self.selected:
+                        shown.append(slot)
+                else:
+                    self.tree.detach(slot)
+            self.tree.selection_set(shown)
+        finally:
+            self.rendering = False
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(self.slots)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def slot_rows(self):
+        # Slot id -> table row index, for the slots currently showing rows
+        rows = {}
+        for slot_number, slot in enumerate(self.slots):
+            position = self.offset + slot_number
+            if position < len(self.model):
+                rows[slot] = self.model.row_at(position)
+        return rows
+
+    # Comparison
+
+    def on_select(self, event):
+        if self.rendering:
+            return
+        visible = self.slot_rows()
+        selection = set(self.tree.selection())
+        self.selected.difference_update(visible.values())
+        self.selected.update(index for slot, index in visible.items() if slot in selection)
+        self.update_comparison()
+
+    def update_comparison(self):
+        table = self.model.table
+        if not self.selected:
+            self.compare_label.config(text="Select parts to compare them")
+            return
+        reference, reference_name = None, None
+        installed = self.installed(self.table_attr()) if self.installed is not None else None
+        if installed:
+            row = table.find(installed)
+            if row is not None:
+                reference, reference_name = row.benchmark, "installed"
+        rows = sorted(self.selected, key=lambda index: -table.benchmarks[index])
+        if reference is None:
+            reference, reference_name = table.benchmarks[rows[-1]], "slowest selected"
+        lines = []
+        for index in rows[:COMPARE_LIMIT]:
+            score = table.benchmarks[index]
+            change = f" ({(score - reference) / reference * 100:+.0f}% vs {reference_name})" if reference else ""
+            lines.append(f"{table.string_at('brand', index)} {table.string_at('model', index)}: "
+                         f"score {score:.1f}, rank {table.ranks[index]}{change}")
+        if len(rows) > COMPARE_LIMIT:
+            lines.append(f"... and {len(rows) - COMPARE_LIMIT} more")
+        self.compare_label.config(text="\n".join(lines))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Browse and search the benchmark tables.")
+    parser.add_argument('csv', nargs='*', help="benchmark CSV files to browse (default: the bundled tables)")
+    parser.add_argument('--benchmarks', default=BENCHMARK_DIR, help="directory containing the benchmark CSV files")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        tables = {os.path.splitext(os.path.basename(path))[0].lower() + '_data': load_cached_table(path) for path in args.csv}
+    else:
+        tables = AnalysisEngine.load(args.benchmarks).tables
+    root = tk.Tk()
+    root.title("Benchmark Browser")
+    BenchmarkBrowser(root, tables).pack(fill='both', expand=True, padx=10, pady=10)
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+
+import instrumentation
+from benchmark_store import STRING_COLUMNS, BenchmarkTable, load_benchmark_table, read_benchmark_csv
+
+# Compiled cache of parsed benchmark tables.
+#
+# Each CSV is compiled to one binary file laid out as:
+#   magic | header length (uint32) | JSON header | padding | column sections
+# The header is space-padded so every column section is 8-byte aligned raw array
+# data in native byte order, so loading is an mmap plus memoryview casts with no
+# number parsing at all.
+# The JSON header records the source CSV's size, mtime and SHA-1; the cache is
+# reused while size and mtime match, or while the content hash still matches.
+
+MAGIC = b'BNCACHE1'
+FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = '.cache'   # Relative to the directory holding the CSV files
+
+# Column sections in file order: (section name, array typecode)
+SECTIONS = tuple((f'codes.{column}', 'I') for column in STRING_COLUMNS) + (
+    ('ranks', 'i'),
+    ('benchmarks', 'd'),
+    ('samples', 'i'),
+    ('string_offsets', 'Q'),
+    ('string_data', 'B'),
+)
+
+
+def cache_path_for(csv_path, cache_dir=None):
+    # Location of the compiled cache for a CSV file
+    directory, filename = os.path.split(os.path.abspath(csv_path))
+    if cache_dir is None:
+        cache_dir = os.path.join(directory, DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, os.path.splitext(filename)[0] + '.bnc')
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_info(csv_path, sha1=None):
+    stat = os.stat(csv_path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha1': sha1 if sha1 is not None else file_sha1(csv_path),
+    }
+
+
+def _layout():
+    # Type sizes and byte order the file was written with; a mismatch means rebuild
+    return {
+        'byteorder': sys.byteorder,
+        'itemsizes': {typecode: array(typecode).itemsize for _, typecode in SECTIONS},
+    }
+
+
+def write_cache(table, csv_path, cache_file, source=None):
+    # Compile a table to cache_file, replacing any existing file atomically
+    encoded = [s.encode('utf-8') for s in table.strings]
+    offsets = array('Q', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    columns = {f'codes.{column}': table.codes[column] for column in STRING_COLUMNS}
+    columns['ranks'] = table.ranks
+    columns['benchmarks'] = table.benchmarks
+    columns['samples'] = table.samples
+    columns['string_offsets'] = offsets
+    columns['string_data'] = b''.join(encoded)
+
+    payloads = []
+    for name, typecode in SECTIONS:
+        data = columns[name]
+        if not isinstance(data, bytes):
+            data = array(typecode, data).tobytes()
+        payloads.append((name, data))
+
+    header = {
+        'format': FORMAT_VERSION,
+        'source': source if source is not None else _source_info(csv_path),
+        'layout': _layout(),
+        'rows': len(table),
+        'strings': len(table.strings),
+        'sections': {},
+    }
+    # Section offsets are relative to the first 8-byte boundary after the header
+    offset = 0
+    for name, data in payloads:
+        header['sections'][name] = [offset, len(data)]
+        offset += -(-len(data) // 8) * 8
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (-(len(MAGIC) + 4 + len(header_bytes)) % 8)
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    temp_file = f'{cache_file}.{os.getpid()}.tmp'
+    try:
+        with open(temp_file, 'wb') as file:
+            file.write(MAGIC)
+            file.write(len(header_bytes).to_bytes(4, 'little'))
+            file.write(header_bytes)
+            for name, data in payloads:
+                file.write(data)
+                file.write(b'\0' * (-len(data) % 8))
+        os.replace(temp_file, cache_file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def read_cache_header(cache_file):
+    with open(cache_file, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{cache_file} is not a benchmark cache file")
+        length = int.from_bytes(file.read(4), 'little')
+        header = json.loads(file.read(length))
+    header['data_start'] = len(MAGIC) + 4 + length
+    return header
+
+
+def is_cache_fresh(header, csv_path):
+    # The cache is fresh while the source keeps its size and mtime, or its content hash
+    if header.get('format') != FORMAT_VERSION or header.get('layout') != _layout():
+        return False
+    source = header['source']
+    stat = os.stat(csv_path)
+    if stat.st_size != source['size']:
+        return False
+    if stat.st_mtime_ns == source['mtime_ns']:
+        return True
+    return file_sha1(csv_path) == source['sha1']
+
+
+def map_cache(cache_file, name=''):
+    # Open a cache file as a BenchmarkTable whose numeric columns are views into the mapping
+    header = read_cache_header(cache_file)
+    with open(cache_file, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    columns = {}
+    for section, typecode in SECTIONS:
+        offset, length = header['sections'][section]
+        offset += header['data_start']
+        columns[section] = view[offset:offset + length].cast(typecode)
+
+    offsets = columns['string_offsets']
+    data = columns['string_data']
+    strings = [sys.intern(str(data[offsets[i]:offsets[i + 1]], 'utf-8')) for i in range(header['strings'])]
+    codes = {column: columns[f'codes.{column}'] for column in STRING_COLUMNS}
+    return BenchmarkTable.from_columns(
+        name, strings, codes, columns['ranks'], columns['benchmarks'], columns['samples'])
+
+
+def _parse_csv(csv_path):
+    source = _source_info(csv_path)
+    with open(csv_path, 'r', newline='') as file:
+        return read_benchmark_csv(file, BenchmarkTable(csv_path)), source
+
+
+def build_cache(csv_path, cache_dir=None):
+    # Parse a CSV file and compile it; returns the parsed table
+    table, source = _parse_csv(csv_path)
+    write_cache(table, csv_path, cache_path_for(csv_path, cache_dir), source)
+    return table
+
+
+def load_cached_table(csv_path, cache_dir=None):
+    # Load a benchmark table through the compiled cache, building or refreshing it as needed.
+    # Any cache problem falls back to parsing the CSV; an unwritable cache directory is not an error.
+    with instrumentation.span('load_table', file=os.path.basename(csv_path)) as span:
+        table = _load_cached_table(csv_path, cache_dir, span)
+        span.set('rows', len(table))
+        return table
+
+
+def _load_cached_table(csv_path, cache_dir, span):
+    cache_file = cache_path_for(csv_path, cache_dir)
+    try:
+        if is_cache_fresh(read_cache_header(cache_file), csv_path):
+            instrumentation.count('table_cache.hit')
+            span.set('cache', 'hit')
+            return map_cache(cache_file, name=csv_path)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    instrumentation.count('table_cache.miss')
+    span.set('cache', 'miss')
+    try:
+        table, source = _parse_csv(csv_path)
+    except Exception:
+        # Let the plain loader report the problem and return what it can
+        return load_benchmark_table(csv_path)
+    try:
+        write_cache(table, csv_path, cache_file, source)
+    except OSError:
+        pass
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prebuild or inspect the compiled benchmark cache.")
+    parser.add_argument('command', choices=['build', 'status'])
+    parser.add_argument('directory', nargs='?', default='Benchmarks', help="directory containing the benchmark CSV files")
+    parser.add_argument('--cache-dir', help=f"where to store compiled files (default: <directory>/{DEFAULT_CACHE_DIR})")
+    parser.add_argument('--force', action='store_true', help="rebuild even if the cache is fresh")
+    args = parser.parse_args(argv)
+
+    csv_files = sorted(glob.glob(os.path.join(args.directory, '*.csv')))
+    if not csv_files:
+        print(f"Error: no CSV files found in {args.directory}")
+        return 1
+
+    for csv_path in csv_files:
+        cache_file = cache_path_for(csv_path, args.cache_dir)
+        try:
+            fresh = is_cache_fresh(read_cache_header(cache_file), csv_path)
+        except (OSError, ValueError, KeyError):
+            fresh = False
+
+        if args.command == 'status':
+            print(f"{csv_path}: {'fresh' if fresh else 'stale or missing'} ({cache_file})")
+        elif fresh and not args.force:
+            print(f"{csv_path}: up to date")
+        else:
+            table = build_cache(csv_path, args.cache_dir)
+            print(f"{csv_path}: compiled {len(table)} rows to {cache_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+from benchmark_store import CSV_COLUMNS, load_benchmark_table, write_benchmark_csv
+
+# Incremental updates of benchmark tables.
+#
+# A delta CSV has the UserBenchmark columns plus an optional Action column.
+# Rows whose action is "delete" remove the row identified by their Part Number,
+# or by their URL when the part number is empty; every other row inserts or
+# updates it. Deltas are applied in place: the table patches its name and score
+# indexes row by row, so a running service picks up a weekly update in
+# milliseconds instead of reloading every table.
+
+ACTION_COLUMN = 'Action'
+DELETE_ACTIONS = frozenset(['delete', 'remove', 'removed', 'deleted'])
+
+
+def read_delta_csv(file):
+    # Yield (action, row) for each change in an open delta CSV file, where row holds the
+    # BenchmarkTable.append arguments by name and action is 'upsert' or 'delete'
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {column: i for i, column in enumerate(header)}
+    indices = [positions.get(column) for column in CSV_COLUMNS]
+    action_index = positions.get(ACTION_COLUMN)
+    fields = ('type', 'part_number', 'brand', 'model', 'rank', 'benchmark', 'samples', 'url')
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < len(header):
+            row = row + [''] * (len(header) - len(row))
+        values = dict(zip(fields, (row[i] if i is not None else None for i in indices)))
+        action = row[action_index].strip().lower() if action_index is not None else ''
+        yield ('delete' if action in DELETE_ACTIONS else 'upsert'), values
+
+
+def apply_delta(table, changes):
+    # Apply (action, row) changes to a table; returns counts of what happened to them
+    counts = {'inserted': 0, 'updated': 0, 'aliased': 0, 'deleted': 0, 'unaliased': 0, 'missing': 0, 'invalid': 0}
+    for action, row in changes:
+        if action == 'delete':
+            status = table.remove(row.get('part_number'), row.get('url'))
+            counts[status or 'missing'] += 1
+            continue
+        if not (row.get('part_number') or row.get('url')):
+            counts['invalid'] += 1  # Nothing to key the row on
+            continue
+        try:
+            _, status = table.upsert(**row)
+        except ValueError:
+            counts['invalid'] += 1  # Bad number in Rank, Benchmark or Samples
+            continue
+        counts[status] += 1
+    return counts
+
+
+def apply_delta_file(table, filename):
+    # Apply a delta CSV file to a table; returns the counts from apply_delta
+    with open(filename, 'r', newline='') as file:
+        return apply_delta(table, read_delta_csv(file))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge delta CSV files into a UserBenchmark CSV file.")
+    parser.add_argument('table', help="benchmark CSV file to update")
+    parser.add_argument('deltas', nargs='+', help="delta CSV files, applied in order")
+    parser.add_argument('-o', '--output', help="merged CSV file (default: overwrite the table)")
+    parser.add_argument('--deduplicate', action='store_true',
+                        help="collapse rows listing one model under several part numbers before merging")
+    args = parser.parse_args(argv)
+
+    table = load_benchmark_table(args.table)
+    if args.deduplicate:
+        print(f"Collapsed {table.deduplicate()} duplicate rows", file=sys.stderr)
+    for delta in args.deltas:
+        start = time.perf_counter()
+        counts = apply_delta_file(table, delta)
+        summary = ', '.join(f"{count} {status}" for status, count in counts.items() if count)
+        print(f"{delta}: {summary or 'no changes'} in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+    output = args.output or args.table
+    temp = f'{output}.tmp'
+    with open(temp, 'w', newline='') as file:
+        write_benchmark_csv(table, file)
+    os.replace(temp, output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,653 @@
+import csv
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+import instrumentation
+from model_matcher import ModelMatcher
+
+# Columns of the UserBenchmark CSV files, in the order they appear in the header
+CSV_COLUMNS = ('Type', 'Part Number', 'Brand', 'Model', 'Rank', 'Benchmark', 'Samples', 'URL')
+
+# String columns are dictionary-encoded: each row stores an index into a
+# per-table pool of unique strings
+STRING_COLUMNS = ('type', 'part_number', 'brand', 'model', 'url')
+
+LOAD_BATCH = 256   # Rows read_benchmark_csv converts and interns together; small batches keep the
+                   # parsed row lists short-lived, which matters more than per-batch overhead
+
+
+# Lightweight, read-only view of one row of a BenchmarkTable.
+# Exposes the attributes of the former per-row BenchmarkData objects, so code
+# iterating over a table keeps working, but holds nothing except the table and
+# row index.
+class BenchmarkRow:
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def type(self):
+        return self._table.string_at('type', self._index)
+
+    @property
+    def part_number(self):
+        return self._table.string_at('part_number', self._index)
+
+    @property
+    def brand(self):
+        return self._table.string_at('brand', self._index)
+
+    @property
+    def model(self):
+        return self._table.string_at('model', self._index)
+
+    @property
+    def url(self):
+        return self._table.string_at('url', self._index)
+
+    @property
+    def rank(self):
+        return self._table.ranks[self._index]
+
+    @property
+    def benchmark(self):
+        return self._table.benchmarks[self._index]
+
+    @property
+    def samples(self):
+        return self._table.samples[self._index]
+
+    @property
+    def aliases(self):
+        # (part_number, brand, model) of the duplicate rows collapsed into this one
+        return list(self._table.aliases.get(self._index, ()))
+
+    @property
+    def part_numbers(self):
+        # This row's part number followed by those of its aliases
+        part_numbers = [self.part_number] if self.part_number else []
+        part_numbers.extend(alias[0] for alias in self._table.aliases.get(self._index, ()) if alias[0])
+        return part_numbers
+
+    def __eq__(self, other):
+        if not isinstance(other, BenchmarkRow):
+            return NotImplemented
+        return self._table is other._table and self._index == other._index
+
+    def __hash__(self):
+        return hash((id(self._table), self._index))
+
+    def __repr__(self):
+        return f"{self.type}: {self.brand} {self.model} (Rank: {self.rank}, Benchmark: {self.benchmark})"
+
+
+# Precomputed orderings of a table, for "best parts above score X" queries.
+# Rows are kept sorted by (-benchmark, rank) and by rank, so the rows scoring
+# above a threshold are a prefix found by bisection instead of a filter and sort.
+class ScoreIndex:
+    def __init__(self, table):
+        self.table = table
+        self.version = table.version
+        benchmarks = table.benchmarks
+        ranks = table.ranks
+        rows = range(len(table))
+        # Stable sorts, so ties keep table order like sorting a filtered list did
+        self.by_benchmark = array('I', sorted(rows, key=lambda i: (-benchmarks[i], ranks[i])))
+        self.benchmark_keys = array('d', (-benchmarks[i] for i in self.by_benchmark))
+        self.by_rank = array('I', sorted(rows, key=lambda i: ranks[i]))
+        self.rank_keys = array('i', (ranks[i] for i in self.by_rank))
+
+    def remove(self, index):
+        # Take a row out of both orderings; call before its values change
+        table = self.table
+        position = self.by_benchmark.index(index, bisect_left(self.benchmark_keys, -table.benchmarks[index]))
+        del self.by_benchmark[position]
+        del self.benchmark_keys[position]
+        position = self.by_rank.index(index, bisect_left(self.rank_keys, table.ranks[index]))
+        del self.by_rank[position]
+        del self.rank_keys[position]
+
+    def insert(self, index):
+        # Put a new or changed row into both orderings, after its ties like a stable sort would
+        table = self.table
+        ranks = table.ranks
+        key = -table.benchmarks[index]
+        rank = ranks[index]
+        position = bisect_left(self.benchmark_keys, key)
+        end = bisect_right(self.benchmark_keys, key)
+        while position < end and (ranks[self.by_benchmark[position]], self.by_benchmark[position]) < (rank, index):
+            position += 1
+        self.by_benchmark.insert(position, index)
+        self.benchmark_keys.insert(position, key)
+        position = bisect_left(self.rank_keys, rank)
+        end = bisect_right(self.rank_keys, rank)
+        while position < end and self.by_rank[position] < index:
+            position += 1
+        self.by_rank.insert(position, index)
+        self.rank_keys.insert(position, rank)
+
+    def count_above(self, score):
+        # Number of rows with a benchmark strictly above score
+        return bisect_left(self.benchmark_keys, -score)
+
+    def above(self, score, limit=None):
+        # Row indices scoring strictly above score, best first
+        end = self.count_above(score)
+        if limit is not None:
+            end = min(end, limit)
+        return self.by_benchmark[:end]
+
+    def benchmark_range(self):
+        # (lowest, highest) benchmark in the table, or None when it is empty
+        if not self.benchmark_keys:
+            return None
+        return -self.benchmark_keys[-1], -self.benchmark_keys[0]
+
+    def ranked_within(self, max_rank):
+        # Row indices with rank <= max_rank, best ranked first
+        return self.by_rank[:bisect_right(self.rank_keys, max_rank)]
+
+    def top(self, k=1, above=None, below_rank=None, brand=None, max_rank=None, min_samples=None):
+        # Up to k best row indices, by benchmark then rank, that pass the given filters:
+        # benchmark > above, rank < below_rank, brand (case-insensitive), rank <= max_rank,
+        # samples >= min_samples
+        table = self.table
+        end = self.count_above(above) if above is not None else len(self.by_benchmark)
+        brand_code = None
+        if brand is not None:
+            brand = brand.lower()
+            brand_code = {code for code, value in enumerate(table.strings) if value.lower() == brand}
+            if not brand_code:
+                return []
+        rank_limit = below_rank
+        if max_rank is not None:
+            rank_limit = min(rank_limit, max_rank + 1) if rank_limit is not None else max_rank + 1
+        ranks = table.ranks
+        samples = table.samples
+        brands = table.codes['brand']
+        results = []
+        position = -1
+        for position in range(end):
+            index = self.by_benchmark[position]
+            if rank_limit is not None and ranks[index] >= rank_limit:
+                continue
+            if min_samples is not None and samples[index] < min_samples:
+                continue
+            if brand_code is not None and brands[index] not in brand_code:
+                continue
+            results.append(index)
+            if len(results) >= k:
+                break
+        instrumentation.count('score_index.rows_scanned', position + 1)
+        return results
+
+
+# Columnar benchmark table.
+# Numeric columns live in typed arrays and string columns are dictionary-encoded
+# against a shared pool of interned strings, so repeated brands, URLs and model
+# names (e.g. one GPU listed under several part numbers) are stored only once.
+class BenchmarkTable:
+    def __init__(self, name=''):
+        self.name = name
+        self.strings = []          # Pool of unique strings, shared by all string columns
+        self._string_ids = {}      # String -> index into self.strings; dropped after loading, rebuilt on change
+        self.codes = {column: array('I') for column in STRING_COLUMNS}
+        self.ranks = array('i')
+        self.benchmarks = array('d')
+        self.samples = array('i')
+        self.version = 0           # Bumped on every change, so derived indexes know when to rebuild
+        self.aliases = {}          # Row index -> [(part_number, brand, model)] of duplicates collapsed into it
+        self._part_rows = None     # Part number (own or alias) -> sorted tuple of row indices, built on first keyed lookup
+        self._url_rows = None      # URL -> sorted tuple of row indices with that URL
+        self._matcher = None
+        self._score_index = None
+
+    @classmethod
+    def from_columns(cls, name, strings, codes, ranks, benchmarks, samples):
+        # Build a table around existing columns, e.g. memoryviews over a mapped cache file.
+        # Such a table is read-only until the first append, which copies the columns.
+        table = cls(name)
+        table.strings = strings
+        table._string_ids = None
+        table.codes = codes
+        table.ranks = ranks
+        table.benchmarks = benchmarks
+        table.samples = samples
+        return table
+
+    def _thaw(self):
+        # Copy borrowed columns into owned arrays and rebuild the string lookup
+        if not isinstance(self.ranks, array):
+            self.codes = {column: array('I', codes) for column, codes in self.codes.items()}
+            self.ranks = array('i', self.ranks)
+            self.benchmarks = array('d', self.benchmarks)
+            self.samples = array('i', self.samples)
+        self._string_ids = {value: code for code, value in enumerate(self.strings)}
+
+    def finish_loading(self):
+        # Drop the string lookup, which is only needed while rows are added; the next change
+        # rebuilds it
+        self._string_ids = None
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def __iter__(self):
+        for index in range(len(self.ranks)):
+            yield BenchmarkRow(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [BenchmarkRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("benchmark row index out of range")
+        return BenchmarkRow(self, index)
+
+    def __repr__(self):
+        return f"BenchmarkTable({self.name!r}, rows={len(self)}, unique_strings={len(self.strings)})"
+
+    def intern(self, value):
+        # Return the pool index of a string, adding it on first use
+        value = value or ''
+        if self._string_ids is None:
+            self._thaw()
+        code = self._string_ids.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(sys.intern(value))
+            self._string_ids[value] = code
+        return code
+
+    def string_at(self, column, index):
+        return self.strings[self.codes[column][index]]
+
+    def column(self, column):
+        # Decode a whole string column, or return a numeric column as-is
+        if column in self.codes:
+            strings = self.strings
+            return [strings[code] for code in self.codes[column]]
+        return {'rank': self.ranks, 'benchmark': self.benchmarks, 'samples': self.samples}[column]
+
+    def append(self, type, part_number, brand, model, rank, benchmark, samples, url):
+        # Empty numbers count as 0, as in the original loader.
+        # Numbers are converted first so a bad value leaves the columns aligned.
+        rank = int(rank) if rank else 0
+        benchmark = float(benchmark) if benchmark else 0.0
+        samples = int(samples) if samples else 0
+        if self._string_ids is None:
+            self._thaw()
+        codes = self.codes
+        codes['type'].append(self.intern(type))
+        codes['part_number'].append(self.intern(part_number))
+        codes['brand'].append(self.intern(brand))
+        codes['model'].append(self.intern(model))
+        codes['url'].append(self.intern(url))
+        self.ranks.append(rank)
+        self.benchmarks.append(benchmark)
+        self.samples.append(samples)
+        index = len(self.ranks) - 1
+        if self._matcher is None and self._score_index is None and self._part_rows is None:
+            self.version += 1  # Nothing derived from the table yet, e.g. while loading it
+        else:
+            live = self._live_indexes()
+            self._commit(live, self._attach(index, live))
+        return index
+
+    def extend(self, columns):
+        # Append a batch of rows given as one sequence per CSV column, in CSV_COLUMNS order.
+        # Each string column is encoded with one lookup per value in C (map over the local
+        # dict), adding only the values that were missing, then one array extend. Numbers are
+        # converted first, so a bad value raises before anything is added.
+        types, part_numbers, brands, models, ranks, benchmarks, samples, urls = columns
+        ranks = array('i', [int(value) if value else 0 for value in ranks])
+        benchmarks = array('d', [float(value) if value else 0.0 for value in benchmarks])
+        samples = array('i', [int(value) if value else 0 for value in samples])
+        if self._matcher is not None or self._score_index is not None or self._part_rows is not None:
+            # Derived indexes have to be patched row by row
+            for row in zip(types, part_numbers, brands, models, ranks, benchmarks, samples, urls):
+                self.append(*row)
+            return
+        if self._string_ids is None:
+            self._thaw()
+        ids = self._string_ids
+        lookup = ids.get
+        strings = self.strings
+        for column, values in zip(STRING_COLUMNS, (types, part_numbers, brands, models, urls)):
+            codes = list(map(lookup, values))
+            if None in codes:
+                # New strings, in order of first appearance. The pool already holds each
+                # string once, so they are not also passed through sys.intern.
+                for value in dict.fromkeys([value for value, code in zip(values, codes) if code is None]):
+                    ids[value] = len(strings)
+                    strings.append(value)
+                codes = map(ids.__getitem__, values)
+            self.codes[column].extend(codes)
+        self.ranks.extend(ranks)
+        self.benchmarks.extend(benchmarks)
+        self.samples.extend(samples)
+        self.version += 1
+
+    # Incremental updates.
+    # Changes patch the matcher, score index and key lookups that are current instead of
+    # letting them rebuild: a row is detached from them before it changes and attached again
+    # afterwards. Deleted rows are replaced by the last row, so other row indices stay put.
+
+    def _live_indexes(self):
+        # Derived indexes that are up to date, and so worth patching rather than rebuilding
+        matcher = self._matcher if self._matcher is not None and self._matcher.version == self.version else None
+        score_index = self._score_index if self._score_index is not None and self._score_index.version == self.version else None
+        return matcher, score_index
+
+    def _detach(self, index, live):
+        matcher, score_index = live
+        tokens = matcher.remove_row(index) if matcher is not None else set()
+        if score_index is not None:
+            score_index.remove(index)
+        if self._part_rows is not None:
+            for part_number in [self.string_at('part_number', index)] + [alias[0] for alias in self.aliases.get(index, ())]:
+                _drop_key(self._part_rows, part_number, index)
+            _drop_key(self._url_rows, self.string_at('url', index), index)
+        return tokens
+
+    def _attach(self, index, live):
+        matcher, score_index = live
+        tokens = matcher.add_row(index) if matcher is not None else set()
+        if score_index is not None:
+            score_index.insert(index)
+        if self._part_rows is not None:
+            self._add_keys(index)
+        return tokens
+
+    def _commit(self, live, tokens):
+        self.version += 1
+        matcher, score_index = live
+        if matcher is not None:
+            matcher.refresh(tokens, self.version)
+        if score_index is not None:
+            score_index.version = self.version
+
+    def _add_keys(self, index):
+        for part_number in [self.string_at('part_number', index)] + [alias[0] for alias in self.aliases.get(index, ())]:
+            if part_number:
+                _add_key(self._part_rows, part_number, index)
+        url = self.string_at('url', index)
+        if url:
+            _add_key(self._url_rows, url, index)
+
+    def locate(self, part_number=None, url=None):
+        # First row holding a part number (its own or an alias), else the first row with the URL, or None
+        if self._part_rows is None:
+            self._part_rows, self._url_rows = {}, {}
+            for index in range(len(self)):
+                self._add_keys(index)
+        if part_number and part_number in self._part_rows:
+            return self._part_rows[part_number][0]
+        if url and url in self._url_rows:
+            return self._url_rows[url][0]
+        return None
+
+    def upsert(self, type, part_number, brand, model, rank, benchmark, samples, url):
+        # Insert or update the row identified by part number, or by URL when the part number is
+        # empty or unknown. A new part number for a known URL becomes an alias of that URL's row.
+        # Returns (row index, 'inserted' | 'updated' | 'aliased').
+        rank = int(rank) if rank else 0
+        benchmark = float(benchmark) if benchmark else 0.0
+        samples = int(samples) if samples else 0
+        part_number, url = part_number or '', url or ''
+        index = self.locate(part_number, url)
+        if index is None:
+            return self.append(type, part_number, brand, model, rank, benchmark, samples, url), 'inserted'
+
+        if self._string_ids is None:
+            self._thaw()
+        live = self._live_indexes()
+        tokens = self._detach(index, live)
+        aliases = self.aliases.get(index, [])
+        alias = next((i for i, entry in enumerate(aliases) if part_number and entry[0] == part_number), None)
+        if alias is not None:
+            aliases[alias] = (part_number, brand or '', model or '')
+            status = 'updated'
+        elif part_number and part_number != self.string_at('part_number', index):
+            if not self.string_at('part_number', index) and (brand or '', model or '') == (self.string_at('brand', index), self.string_at('model', index)):
+                # The row's own part number, reported for the first time
+                self.codes['part_number'][index] = self.intern(part_number)
+                status = 'updated'
+            else:
+                self.aliases.setdefault(index, []).append((part_number, brand or '', model or ''))
+                status = 'aliased'
+        else:
+            codes = self.codes
+            codes['type'][index] = self.intern(type)
+            codes['brand'][index] = self.intern(brand)
+            codes['model'][index] = self.intern(model)
+            codes['url'][index] = self.intern(url)
+            status = 'updated'
+        self.ranks[index] = rank
+        self.benchmarks[index] = benchmark
+        self.samples[index] = samples
+        tokens |= self._attach(index, live)
+        self._commit(live, tokens)
+        return index, status
+
+    def remove(self, part_number=None, url=None):
+        # Delete the row identified by part number or URL. When the part number belongs to a row
+        # with aliases, only that name goes and an alias takes its place.
+        # Returns 'deleted', 'unaliased' or None when nothing matched.
+        index = self.locate(part_number, url)
+        if index is None:
+            return None
+        if self._string_ids is None:
+            self._thaw()
+        aliases = self.aliases.get(index)
+        own = self.string_at('part_number', index)
+        if part_number and aliases and (part_number == own or any(entry[0] == part_number for entry in aliases)):
+            live = self._live_indexes()
+            tokens = self._detach(index, live)
+            if part_number == own:
+                own, brand, model = aliases.pop(0)
+                self.codes['part_number'][index] = self.intern(own)
+                self.codes['brand'][index] = self.intern(brand)
+                self.codes['model'][index] = self.intern(model)
+            else:
+                aliases[:] = [entry for entry in aliases if entry[0] != part_number]
+            if not aliases:
+                del self.aliases[index]
+            tokens |= self._attach(index, live)
+            self._commit(live, tokens)
+            return 'unaliased'
+        self.delete(index)
+        return 'deleted'
+
+    def delete(self, index):
+        # Delete a row by moving the last row into its place
+        if self._string_ids is None:
+            self._thaw()
+        live = self._live_indexes()
+        last = len(self) - 1
+        tokens = self._detach(index, live)
+        if last != index:
+            tokens |= self._detach(last, live)
+            for codes in self.codes.values():
+                codes[index] = codes[last]
+            for column in (self.ranks, self.benchmarks, self.samples):
+                column[index] = column[last]
+        for column in list(self.codes.values()) + [self.ranks, self.benchmarks, self.samples]:
+            column.pop()
+        self.aliases.pop(index, None)
+        moved = self.aliases.pop(last, None)
+        if moved and last != index:
+            self.aliases[index] = moved
+        if live[0] is not None:
+            live[0].truncate(last)
+        if last != index:
+            tokens |= self._attach(index, live)
+        self._commit(live, tokens)
+
+    def deduplicate(self):
+        # Collapse rows sharing URL, rank, benchmark and samples (one model listed under several
+        # vendor part numbers) into the first such row, which keeps the others as aliases.
+        # A full pass that rebuilds derived indexes; returns the number of rows removed.
+        strings = self.strings
+        codes = self.codes
+        keep = []
+        aliases = {}
+        canonical_rows = {}
+        for index in range(len(self)):
+            url = strings[codes['url'][index]]
+            key = (url, self.ranks[index], self.benchmarks[index], self.samples[index])
+            canonical = canonical_rows.get(key) if url else None
+            if canonical is None:
+                if url:
+                    canonical_rows[key] = len(keep)
+                if index in self.aliases:
+                    aliases[len(keep)] = list(self.aliases[index])
+                keep.append(index)
+                continue
+            names = (strings[codes['part_number'][index]], strings[codes['brand'][index]], strings[codes['model'][index]])
+            first = keep[canonical]
+            target = aliases.setdefault(canonical, [])
+            if names != (strings[codes['part_number'][first]], strings[codes['brand'][first]], strings[codes['model'][first]]):
+                target.append(names)
+            target.extend(self.aliases.get(index, ()))
+        removed = len(self) - len(keep)
+        if removed:
+            if self._string_ids is None:
+                self._thaw()
+            self.codes = {column: array('I', (column_codes[i] for i in keep)) for column, column_codes in codes.items()}
+            self.ranks = array('i', (self.ranks[i] for i in keep))
+            self.benchmarks = array('d', (self.benchmarks[i] for i in keep))
+            self.samples = array('i', (self.samples[i] for i in keep))
+            self.aliases = {index: entries for index, entries in aliases.items() if entries}
+            self._part_rows = self._url_rows = None
+            self.version += 1
+        return removed
+
+    @property
+    def matcher(self):
+        # Model-name index, built on first use and rebuilt after the table changes
+        if self._matcher is None or self._matcher.version != self.version:
+            with instrumentation.span('build_matcher', rows=len(self)):
+                self._matcher = ModelMatcher(self)
+        return self._matcher
+
+    @property
+    def score_index(self):
+        # Benchmark and rank orderings, built on first use and rebuilt after the table changes
+        if self._score_index is None or self._score_index.version != self.version:
+            with instrumentation.span('build_score_index', rows=len(self)):
+                self._score_index = ScoreIndex(self)
+        return self._score_index
+
+    def better_than(self, score, rank=float('inf'), k=1, **filters):
+        # Up to k rows with a higher benchmark and a better rank, best first.
+        # Accepts the brand, max_rank and min_samples filters of ScoreIndex.top.
+        indices = self.score_index.top(k, above=score, below_rank=rank, **filters)
+        return [BenchmarkRow(self, index) for index in indices]
+
+    def find(self, name):
+        # Best matching row for a raw hardware name, or None
+        instrumentation.count('match.lookups')
+        with instrumentation.span('match'):
+            index = self.matcher.match(name)
+        return BenchmarkRow(self, index) if index is not None else None
+
+    def memory_usage(self):
+        # Approximate bytes held by the table (arrays plus string pool)
+        total = sum(codes.itemsize * len(codes) for codes in self.codes.values())
+        total += self.ranks.itemsize * len(self.ranks)
+        total += self.benchmarks.itemsize * len(self.benchmarks)
+        total += self.samples.itemsize * len(self.samples)
+        total += sum(sys.getsizeof(s) for s in self.strings)
+        return total
+
+
+def _add_key(rows, key, index):
+    # Record a row under a lookup key. Part numbers and URLs are not unique in the tables
+    # (one part listed twice), so each key keeps every row holding it, lowest first.
+    indices = rows.get(key, ())
+    if index not in indices:
+        rows[key] = tuple(sorted(indices + (index,)))
+
+
+def _drop_key(rows, key, index):
+    # Forget a row under a lookup key; the key stays while other rows still hold it
+    indices = rows.get(key, ())
+    if index in indices:
+        indices = tuple(i for i in indices if i != index)
+        if indices:
+            rows[key] = indices
+        else:
+            del rows[key]
+
+
+def read_benchmark_csv(file, table=None):
+    # Parse an open UserBenchmark CSV file, appending its rows to a BenchmarkTable
+    if table is None:
+        table = BenchmarkTable(getattr(file, 'name', ''))
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return table
+    rows = len(table)
+    positions = {column: i for i, column in enumerate(header)}
+    indices = [positions.get(column) for column in CSV_COLUMNS]
+    width = len(header)
+    try:
+        while True:
+            batch = list(islice(reader, LOAD_BATCH))
+            if not batch:
+                break
+            if not all(batch):
+                batch = [row for row in batch if row]
+                if not batch:
+                    continue
+            if min(map(len, batch)) < width:
+                batch = [row if len(row) >= width else row + [''] * (width - len(row)) for row in batch]
+            fields = list(zip(*batch))
+            columns = [fields[i] if i is not None else ('',) * len(batch) for i in indices]
+            try:
+                table.extend(columns)
+            except ValueError:
+                # Keep the rows before the bad value, then let append() report it
+                for row in zip(*columns):
+                    table.append(*row)
+    finally:
+        table.finish_loading()
+        instrumentation.count('csv.rows', len(table) - rows)
+    return table
+
+
+def write_benchmark_csv(table, file):
+    # Write a table in the UserBenchmark CSV format, each alias as its own row after its canonical row
+    writer = csv.writer(file)
+    writer.writerow(CSV_COLUMNS)
+    for row in table:
+        benchmark = row.benchmark
+        benchmark = int(benchmark) if benchmark.is_integer() else benchmark  # "370", as in the source files
+        writer.writerow([row.type, row.part_number, row.brand, row.model, row.rank, benchmark, row.samples, row.url])
+        for part_number, brand, model in row.aliases:
+            writer.writerow([row.type, part_number, brand, model, row.rank, benchmark, row.samples, row.url])
+
+
+def load_benchmark_table(filename):
+    # Load a UserBenchmark CSV file as a BenchmarkTable.
+    # Errors are reported and whatever was read so far is returned, like the original loader.
+    table = BenchmarkTable(filename)
+    try:
+        with open(filename, 'r', newline='') as file:
+            read_benchmark_csv(file, table)
+    except FileNotFoundError:
+        print(f"Error: The file {filename} was not found.")
+    except Exception as e:
+        print(f"Error while reading the file {filename}: {e}")
+    return table
@@ -1,4 +1,3 @@
-import csv
 import tkinter as tk
 from tkinter import ttk
 import sys
@@ -6,31 +5,123 @@ import platform
 import psutil
 import subprocess
 import os
-import requests
-import wmi
-import cpuinfo
 import re
-
-# Class to represent benchmark data for different components
-class BenchmarkData:
-    def __init__(self, type, part_number, brand, model, rank, benchmark, samples, url):
-        self.type = type
-        self.part_number = part_number
-        self.brand = brand
-        self.model = model
-        self.rank = int(rank) if rank else 0
-        self.benchmark = float(benchmark) if benchmark else 0.0
-        self.samples = int(samples) if samples else 0
-        self.url = url
-
-    def __repr__(self):
-        return f"{self.type}: {self.brand} {self.model} (Rank: {self.rank}, Benchmark: {self.benchmark})"
+import queue
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from benchmark_cache import load_cached_table
+from analysis_engine import BENCHMARK_DIR, AnalysisEngine, normalize_system_info
+from usage_sampler import UsageSampler
+from process_attribution import ProcessSampler
+from history_store import HISTORY_DAYS, HISTORY_FILE, HistoryStore
+import storage_probe
+from probe_backends import STATIC_DEFAULTS, default_backend, run_probes
+import micro_benchmark
+from benchmark_browser import BenchmarkBrowser
+import instrumentation
+
+# Hardware probes.
+# Each probe returns a dict of system_info entries and may run on any worker thread.
+# CPU, RAM, GPU and storage identity come from the platform's probe backend and are cached by the
+# analyzer; usage is re-read on every analysis.
+
+PROBE_POLL_MS = 50  # How often the Tk thread checks for finished probes
+CPU_SAMPLE_SECONDS = 0.5  # CPU measurement interval when no usage window is available
+PROBE_TIMEOUTS = {'measure': 60.0}  # Probes allowed longer than probe_backends.PROBE_TIMEOUT
+
+
+def probe_usage(sampler=None):
+    # Get the volatile usage metrics.
+    # With a running UsageSampler, CPU usage is the window average and the window summary is
+    # attached for percentile-based recommendations; otherwise CPU is measured over a short
+    # interval, since an instantaneous reading is meaningless.
+    summary = sampler.summary() if sampler is not None else None
+    if summary and summary['metrics'].get('cpu'):
+        info = {'cpu_usage': summary['metrics']['cpu']['mean'], 'usage': summary}
+    else:
+        info = {'cpu_usage': psutil.cpu_percent(interval=CPU_SAMPLE_SECONDS)}
+    info['memory_usage'] = psutil.virtual_memory().percent
+    # Get disk information
+    try:
+        info['disk'] = psutil.disk_usage('/').percent
+    except Exception:
+        info['disk'] = "N/A"
+    return info
+
+
+def probe_storage_io(sampler):
+    # Per-drive throughput, latency and queue depth since the previous analysis
+    if not sampler.ready():
+        sampler.sample()
+        time.sleep(CPU_SAMPLE_SECONDS)
+    return {'storage_io': sampler.sample()}
+
+
+def probe_processes(sampler):
+    # Top processes per resource. A sampler that has not sampled yet is primed first,
+    # since per-process rates need two readings.
+    if not sampler.ready():
+        sampler.sample()
+        time.sleep(CPU_SAMPLE_SECONDS)
+    sampler.sample()
+    return {'processes': sampler.attribution()}
+
+
+def probe_history(store):
+    # Statistics of the recorded usage history, for trend and sustained-load recommendations
+    return {'history': store.summary(time.time() - HISTORY_DAYS * 86400)}
+
+
+def probe_measurements():
+    # Measure the CPU, RAM and the drive holding the temp directory with the micro-benchmarks.
+    # Uncalibrated scores are not on the tables' scale, so those components keep their table scores.
+    results = micro_benchmark.run_suite()
+    measured = {component: score for component, score in results['scores'].items() if component in results['calibrated']}
+    return {'measured': measured, 'measured_raw': results['raw']}
+
+
+def timed_probe(name, probe):
+    # Run a probe inside an instrumentation span named after it
+    with instrumentation.span(f'probe.{name}'):
+        return probe()
+
+
+# Values used when a probe fails
+PROBE_DEFAULTS = {
+    **STATIC_DEFAULTS,
+    'usage': {'cpu_usage': 0.0, 'memory_usage': 0.0, 'disk': "N/A"},
+    'storage_io': {},
+    'processes': {},
+    'measure': {},
+    'history': {},
+}
 
 # Main class for the Bottleneck Analyzer application
 class BottleneckAnalyzer:
     def __init__(self, root):
         self.root = root
         self.system_info = {}
+        self.static_info = {}  # Hardware facts that do not change between analyses
+        self.probe_executor = ThreadPoolExecutor(max_workers=len(PROBE_DEFAULTS), thread_name_prefix="probe")
+        self.probe_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="probe-runner")
+        self.probe_run = None  # Future of the run_probes call of the analysis in progress
+        self.probe_results = queue.Queue()  # Finished probes, for showing progress
+        self.probe_pending = set()
+        self.probe_generation = 0  # Results of an earlier analysis that timed out are ignored
+        self.trace = None  # Instrumentation run of the analysis in progress
+        self.browser_window = None
+        self.pending_info = {}
+        self.backend = default_backend()  # WMI on Windows, sysfs on Linux, or a recorded fixture
+        self.static_probes = self.backend.probes()
+        self.sampler = UsageSampler()  # Usage history for percentile-based recommendations
+        self.history = self.open_history()  # Long-term usage and analysis history, or None
+        if self.history is not None:
+            self.sampler.on_sample = self.history.add_samples
+        self.sampler.start()
+        self.process_sampler = ProcessSampler()  # Per-process deltas between analyses, to name the top consumers
+        self.disk_io_sampler = storage_probe.DiskIOSampler()
         self.setup_ui() # Set up the user interface
         self.load_benchmark_data() # Load benchmark data from CSV files
 
@@ -47,6 +138,11 @@ class BottleneckAnalyzer:
         self.analyze_button = ttk.Button(self.root, text="Analyze System", command=self.analyze_system)
         self.analyze_button.pack(pady=20)
 
+        # Optional measurement mode: score the hardware with local micro-benchmarks
+        self.measure_var = tk.BooleanVar(self.root, value=False)
+        self.measure_check = ttk.Checkbutton(self.root, text="Measure performance (takes a few seconds)", variable=self.measure_var)
+        self.measure_check.pack(pady=5)
+
         self.upgrade_combo = ttk.Combobox(self.root, values=["CPU", "GPU", "RAM", "SSD"])
         self.upgrade_combo.set("Select component")  # Set a default text
         self.upgrade_combo.pack(pady=10)
@@ -57,57 +153,177 @@ class BottleneckAnalyzer:
         self.recommendation_label = ttk.Label(self.root, text="Upgrade recommendation will appear here", wraplength=400)
         self.recommendation_label.pack(pady=10)
 
+        self.browse_button = ttk.Button(self.root, text="Browse Benchmarks", command=self.open_browser)
+        self.browse_button.pack(pady=5)
+
+        # Stage timings of the last run and over the session, when instrumentation is on
+        self.timings_var = tk.BooleanVar(self.root, value=instrumentation.TRACER.enabled)
+        self.timings_check = ttk.Checkbutton(self.root, text="Record stage timings", variable=self.timings_var,
+                                             command=self.toggle_timings)
+        self.timings_check.pack(pady=5)
+        self.timings_label = ttk.Label(self.root, text="", font="TkFixedFont", justify="left")
+        self.timings_label.pack(pady=5)
+
+    def toggle_timings(self):
+        instrumentation.TRACER.enabled = self.timings_var.get()
+        if not self.timings_var.get():
+            self.timings_label.config(text="")
+
+    def show_timings(self, run):
+        if instrumentation.TRACER.enabled:
+            self.timings_label.config(text=instrumentation.format_summary(instrumentation.TRACER.summary(), run))
+
+    def open_history(self):
+        try:
+            return HistoryStore(HISTORY_FILE)
+        except Exception as e:
+            print(f"Error opening usage history: {e}")
+            return None
+
+    def close(self):
+        # Stop sampling and write out buffered history
+        self.sampler.stop()
+        if self.history is not None:
+            self.history.close()
+
+    def open_browser(self):
+        # Searchable view of the benchmark tables, comparing selected parts with the installed ones
+        if self.browser_window is not None and self.browser_window.winfo_exists():
+            self.browser_window.lift()
+            return
+        self.browser_window = tk.Toplevel(self.root)
+        self.browser_window.title("Benchmark Browser")
+        BenchmarkBrowser(self.browser_window, self.engine.tables, installed=self.installed_part).pack(
+            fill='both', expand=True, padx=10, pady=10)
+
+    def installed_part(self, attr):
+        # Name of the analyzed system's part in a benchmark table, or None before an analysis
+        key = attr[:-len('_data')]
+        if not self.system_info or key not in ('cpu', 'gpu', 'ram', 'ssd'):
+            return None
+        return self.engine.installed_name(self.system_info, key)
+
     def load_benchmark_data(self):
         # Load benchmark data from CSV files
-        self.cpu_data = self.load_csv('Benchmarks/CPU_UserBenchmarks.csv')
-        self.gpu_data = self.load_csv('Benchmarks/GPU_UserBenchmarks.csv')
-        self.ram_data = self.load_csv('Benchmarks/RAM_UserBenchmarks.csv')
-        self.ssd_data = self.load_csv('Benchmarks/SSD_UserBenchmarks.csv')
-        self.hdd_data = self.load_csv('Benchmarks/HDD_UserBenchmarks.csv')
-        self.usb_data = self.load_csv('Benchmarks/USB_UserBenchmarks.csv')
+        with instrumentation.run('load'):
+            self.engine = AnalysisEngine.load(BENCHMARK_DIR, loader=self.load_csv)
+        for attr, table in self.engine.tables.items():
+            setattr(self, attr, table)
 
     def load_csv(self, filename):
-        # Load data from a given CSV file and return as a list of BenchmarkData objects
-        data = []
-        try:
-            with open(filename, 'r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    benchmark_entry = BenchmarkData(
-                        type=row.get('Type'),
-                        part_number=row.get('Part Number'),
-                        brand=row.get('Brand'),
-                        model=row.get('Model'),
-                        rank=row.get('Rank'),
-                        benchmark=row.get('Benchmark'),
-                        samples=row.get('Samples'),
-                        url=row.get('URL')
-                    )
-                    data.append(benchmark_entry)
-        except FileNotFoundError:
-            print(f"Error: The file {filename} was not found.")
-        except Exception as e:
-            print(f"Error while reading the file {filename}: {e}")
-        
-        return data
+        # Load data from a given CSV file into a columnar BenchmarkTable, via the compiled cache.
+        # Iterating the table yields BenchmarkRow views (type, part_number, brand, model, rank, ...).
+        return load_cached_table(filename)
 
     def analyze_system(self):
-        # Analyze the current system
-        self.collect_system_info()
-        
+        # Analyze the current system.
+        # Probes run on a worker pool; results are polled from the Tk thread so the window stays responsive.
+        if self.probe_run is not None:
+            return
+        self.analyze_button.config(state="disabled")
+        self.bottleneck_label.config(text="Bottleneck: Analyzing...")
+        self.trace = instrumentation.begin_run('analyze_system', measure=self.measure_var.get())
+        self.pending_info = dict(self.static_info)
+        self.probe_pending = self.start_probes()
+        self.update_probe_progress()
+        self.root.after(PROBE_POLL_MS, self.poll_probes)
+
+    def probes_to_run(self):
+        # The volatile usage probe, plus any static probe whose result is not cached yet
+        probes = {name: probe for name, probe in self.static_probes.items() if name not in self.static_info}
+        probes['usage'] = partial(probe_usage, self.sampler)
+        probes['processes'] = partial(probe_processes, self.process_sampler)
+        probes['storage_io'] = partial(probe_storage_io, self.disk_io_sampler)
+        if self.history is not None:
+            probes['history'] = partial(probe_history, self.history)
+        if self.measure_var.get():
+            probes['measure'] = probe_measurements
+        return probes
+
+    def start_probes(self):
+        # Start run_probes for this analysis on the runner thread; returns the names of the probes.
+        # Each probe also reports its result as it finishes, so progress can be shown meanwhile.
+        probes = self.probes_to_run()
+        self.probe_generation += 1
+        generation = self.probe_generation
+
+        def reporting(name, probe):
+            def run():
+                result = probe()
+                self.probe_results.put((generation, name, result))
+                return result
+            return run
+
+        tracked = {name: reporting(name, probe) for name, probe in probes.items()}
+        self.probe_run = self.probe_runner.submit(contextvars.copy_context().run, self.run_probes, tracked)  # In this analysis's run
+        return set(probes)
+
+    def run_probes(self, probes):
+        # Run probes concurrently on the probe pool, with the analyzer's timeouts and defaults
+        return run_probes({name: partial(timed_probe, name, probe) for name, probe in probes.items()},
+                          executor=self.probe_executor, timeouts=PROBE_TIMEOUTS, defaults=PROBE_DEFAULTS)
+
+    def merge_probe_results(self, results, errors, info):
+        # Merge the results of run_probes into info, reporting failures and caching the static
+        # results of probes that succeeded
+        for name, error in errors.items():
+            if isinstance(error, TimeoutError):
+                print(f"Timed out getting {name} info")
+                instrumentation.count('probe.timeouts')
+            else:
+                print(f"Error getting {name} info: {error}")
+                instrumentation.count('probe.errors')
+        for name, result in results.items():
+            if name in self.static_probes and name not in errors:
+                self.static_info.update(result)
+            info.update(result)
+
+    def poll_probes(self):
+        # Show probes as they finish, and merge all results once run_probes has returned
+        while not self.probe_results.empty():
+            generation, name, result = self.probe_results.get_nowait()
+            if generation != self.probe_generation or name not in self.probe_pending:
+                continue  # Finished after its analysis gave up on it
+            self.probe_pending.discard(name)
+            self.pending_info.update(result)
+
+        if not self.probe_run.done():
+            self.update_probe_progress()
+            self.root.after(PROBE_POLL_MS, self.poll_probes)
+        else:
+            results, errors = self.probe_run.result()
+            self.probe_run = None
+            self.probe_pending = set()
+            info = dict(self.static_info)
+            self.merge_probe_results(results, errors, info)
+            self.system_info = info
+            self.finish_analysis()
+
+    def update_probe_progress(self):
+        info = self.pending_info
+        done = [f"{label}: {info[key]}" for key, label in (('cpu', 'CPU'), ('ram', 'RAM'), ('gpu', 'GPU')) if key in info]
+        waiting = ", ".join(sorted(self.probe_pending))
+        self.system_info_label.config(text="System Information:\n" + "\n".join(done + [f"Collecting: {waiting}..."]))
+
+    def finish_analysis(self):
+        self.normalize_system_info()
+
         results = []
         for component, value in self.system_info.items():
             if component in ['cpu_usage', 'memory_usage', 'disk']:
                 score = self.calculate_score(component, value)
                 results.append((component, value, score))
         
+        # update_ui also shows the bottleneck
         self.update_ui(results)
-        
-        bottleneck = self.detect_bottleneck()
+        self.record_history()
+
         upgrade_recommendations = self.generate_upgrade_recommendations()
-        
-        self.bottleneck_label.config(text=f"Bottleneck: {bottleneck}")
+
         self.recommendation_label.config(text=f"Upgrade Recommendations:\n{upgrade_recommendations}")
+        self.analyze_button.config(state="normal")
+        run, self.trace = instrumentation.end_run(self.trace), None
+        self.show_timings(run)
 
     def update_ui(self, results):
         # Update the UI with system information and bottleneck analysis results
@@ -119,114 +335,54 @@ class BottleneckAnalyzer:
             f"GPU: {self.system_info['gpu']}\n"
             f"Disk Usage: {self.system_info['disk']:.1f}%"
         )
+        storage = self.system_info.get('storage')
+        if storage:
+            drives = ", ".join(f"{device['model'] or device['name']} ({device['kind'].upper()})" for device in storage)
+            system_info_text += f"\nStorage: {drives}"
+        measured = self.system_info.get('measured')
+        if measured:
+            scores = ", ".join(f"{component.upper()} {score:.1f}" for component, score in measured.items())
+            system_info_text += f"\nMeasured scores: {scores}"
         self.system_info_label.config(text=f"System Information:\n{system_info_text}")
 
         bottleneck = self.detect_bottleneck()
         self.bottleneck_label.config(text=f"Bottleneck: {bottleneck}")
 
-    def collect_system_info(self):
-        # Collect detailed system information
-        self.system_info = {}
-        
-        # Get detailed CPU info
-        cpu_info = cpuinfo.get_cpu_info()
-        cpu_brand = cpu_info['brand_raw']
-        cpu_freq = psutil.cpu_freq().max / 1000  # Convert to GHz
-        cpu_cores = psutil.cpu_count(logical=False)
-        cpu_threads = psutil.cpu_count(logical=True)
-        self.system_info['cpu'] = cpu_brand  # Store just the brand and model
-        self.system_info['cpu_usage'] = psutil.cpu_percent()
-
-        # Get RAM info
-        c = wmi.WMI()
-        ram_modules = c.Win32_PhysicalMemory()
-        total_ram = sum(int(module.Capacity) for module in ram_modules) / (1024**3)  # Convert to GB
-        if ram_modules:
-            ram_speed = ram_modules[0].Speed
-            ram_type = ram_modules[0].MemoryType
-            ram_manufacturer = ram_modules[0].Manufacturer
-            ram_type_name = "DDR4" if ram_type == 26 else "DDR5" if ram_type == 30 else f"Type {ram_type}"
-            ram_model = f"{ram_manufacturer} {ram_type_name} {ram_speed}MHz"
-            self.system_info['ram'] = ram_model  # Store just the RAM model
-        else:
-            self.system_info['ram'] = "Unknown RAM"
-        self.system_info['memory_usage'] = psutil.virtual_memory().percent
-
-        # Get GPU information
+    def record_history(self):
+        # Keep this analysis in the history, so later ones can see how the machine is trending
+        if self.history is None:
+            return
         try:
-            gpu_info = c.Win32_VideoController()[0]
-            self.system_info['gpu'] = gpu_info.Name
-            self.system_info['gpu_usage'] = "N/A"
+            self.history.record_analysis(self.system_info, self.detect_bottleneck(), self.engine.component_scores(self.system_info))
         except Exception as e:
-            print(f"Error getting GPU info: {e}")
-            self.system_info['gpu'] = "Unknown GPU"
-            self.system_info['gpu_usage'] = "N/A"
-
-        # Get disk information
-        try:
-            self.system_info['disk'] = psutil.disk_usage('/').percent
-        except:
-            self.system_info['disk'] = "N/A"
+            print(f"Error recording analysis history: {e}")
 
+    def collect_system_info(self):
+        # Collect detailed system information synchronously, running the probes concurrently.
+        # Static hardware facts are cached across calls; usage metrics are always re-read.
+        info = dict(self.static_info)
+        results, errors = self.run_probes(self.probes_to_run())
+        self.merge_probe_results(results, errors, info)
+        self.system_info = info
+        self.normalize_system_info()
+
+    def normalize_system_info(self):
         # Ensure all percentage values are floats
-        for key in ['cpu_usage', 'memory_usage', 'disk']:
-            try:
-                self.system_info[key] = float(self.system_info[key])
-            except ValueError:
-                self.system_info[key] = 0.0
+        self.system_info = normalize_system_info(self.system_info)
+
+    # Analysis is delegated to the headless AnalysisEngine, using the current snapshot and selection
 
     def calculate_score(self, component, value):
-        component = component.lower()
-        
-        if component == 'cpu':
-            # Assuming value is clock speed in GHz
-            return value * 1000  # Simple score based on clock speed
-        
-        elif component == 'gpu':
-            # Assuming value is VRAM in GB
-            return value * 500  # Simple score based on VRAM
-        
-        elif component == 'ram':
-            # Assuming value is RAM size in GB
-            return value * 100  # Simple score based on RAM size
-        
-        elif component == 'ssd' or component == 'hdd':
-            # Assuming value is storage size in GB
-            return value * 0.5  # Simple score based on storage size
-        
-        else:
-            # For unknown components, return a default score
-            return 0
+        return self.engine.calculate_score(component, value)
 
     def detect_bottleneck(self):
-        cpu_score = self.get_benchmark_score(self.cpu_data, "Generic CPU")
-        gpu_score = self.get_benchmark_score(self.gpu_data, self.system_info['gpu'])
-        ram_score = self.get_benchmark_score(self.ram_data, "Generic RAM")
-        ssd_score = self.get_benchmark_score(self.ssd_data, "Generic SSD")
-
-        scores = {"CPU": cpu_score, "GPU": gpu_score, "RAM": ram_score, "SSD": ssd_score}
-        
-        # More sophisticated bottleneck detection
-        cpu_gpu_ratio = cpu_score / gpu_score if gpu_score else float('inf')
-        if cpu_gpu_ratio < 0.5:
-            return "CPU (significantly weaker than GPU)"
-        elif cpu_gpu_ratio > 2:
-            return "GPU (significantly weaker than CPU)"
-        elif ram_score < min(cpu_score, gpu_score) * 0.5:
-            return "RAM (significantly slower than CPU/GPU)"
-        elif ssd_score < min(cpu_score, gpu_score, ram_score) * 0.3:
-            return "SSD (significantly slower than other components)"
-        else:
-            return "Balanced system (no significant bottleneck)"
+        return self.engine.detect_bottleneck(self.system_info)
 
     def get_benchmark_score(self, benchmark_data, component_name):
-        # Get the benchmark score for a given component
-        if isinstance(component_name, (int, float)):
-            return component_name  # Return the usage percentage as the score
-        for item in benchmark_data:
-            if component_name.lower() in item.model.lower():
-                return item.benchmark
-        return 0.0  # Return a low score if no match is found to ensure upgrades are recommended
+        return self.engine.get_benchmark_score(benchmark_data, component_name)
+
+    def get_component_rank(self, benchmark_data, component_name):
+        return self.engine.get_component_rank(benchmark_data, component_name)
 
     def recommend_upgrade(self):
         # Generate upgrade recommendations
@@ -235,12 +391,14 @@ class BottleneckAnalyzer:
             self.recommendation_label.config(text="Please select a component to upgrade")
             return
 
+        trace = instrumentation.begin_run('recommend_upgrade', component=component)
         recommendation = self.get_recommendation(component)
         compatibility = self.check_compatibility(recommendation)
         potential_bottleneck = self.analyze_potential_bottleneck(recommendation)
 
         # Generate general upgrade recommendations
         general_recommendations = self.generate_general_recommendations()
+        run = instrumentation.end_run(trace)
 
         result = f"Recommended {component} upgrade: {recommendation}\n"
         result += f"Compatibility: {compatibility}\n"
@@ -248,235 +406,31 @@ class BottleneckAnalyzer:
         result += "General Upgrade Recommendations:\n" + general_recommendations
 
         self.recommendation_label.config(text=result)
+        self.show_timings(run)
 
     def get_recommendation(self, component):
-        # Get a specific upgrade recommendation for a given component
-        component_lower = component.lower()
-        benchmark_data = {
-            "cpu": self.cpu_data,
-            "gpu": self.gpu_data,
-            "ram": self.ram_data,
-            "ssd": self.ssd_data
-        }.get(component_lower)
-
-        if not benchmark_data:
-            return f"No benchmark data available for {component}"
-
-        current_model = self.system_info.get(component_lower, "Unknown")
-        current_score = self.get_benchmark_score(benchmark_data, current_model)
-        current_rank = self.get_component_rank(benchmark_data, current_model)
-
-        # Find better performing components
-        better_components = [item for item in benchmark_data if item.benchmark > current_score and item.rank < current_rank]
-        
-        if better_components:
-            # Sort by highest benchmark and lowest rank
-            better_components.sort(key=lambda x: (-x.benchmark, x.rank))
-            
-            # Recommend the component with the highest benchmark and lowest rank
-            recommendation = better_components[0]
-            return f"{recommendation.brand} {recommendation.model} (Rank: {recommendation.rank}, Score: {recommendation.benchmark:.1f})"
-        else:
-            return f"Your current {component} is already top-tier. No upgrade necessary."
-
-    def generate_general_recommendations(self):
-        recommendations = []
-
-        components = [
-            ('CPU', self.cpu_data, self.system_info.get('cpu', 'Unknown')),
-            ('RAM', self.ram_data, self.system_info.get('ram', 'Unknown')),
-            ('GPU', self.gpu_data, self.system_info.get('gpu', 'Unknown')),
-            ('SSD', self.ssd_data, self.system_info.get('disk', 'Unknown'))
-        ]
-
-        for component_name, benchmark_data, current_model in components:
-            current_score = self.get_benchmark_score(benchmark_data, current_model)
-            current_rank = self.get_component_rank(benchmark_data, current_model)
-
-            better_components = [item for item in benchmark_data if item.benchmark > current_score and item.rank < current_rank]
-            
-            if better_components:
-                # Sort by highest benchmark and lowest rank
-                better_components.sort(key=lambda x: (-x.benchmark, x.rank))
-                
-                # Recommend the component with the highest benchmark and lowest rank
-                recommendation = better_components[0]
-                improvement_percentage = ((recommendation.benchmark - current_score) / current_score) * 100
-                
-                recommendations.append(f"Consider upgrading your {component_name} to {recommendation.brand} {recommendation.model} "
-                                       f"(Rank: {recommendation.rank}, Score: {recommendation.benchmark:.1f}). "
-                                       f"This would provide a {improvement_percentage:.1f}% performance improvement.")
-            else:
-                recommendations.append(f"Your {component_name} ({current_model}) is already high-performing. No immediate upgrade necessary.")
-
-        # Storage recommendation
-        disk_usage = self.system_info['disk']
-        if isinstance(disk_usage, float):
-            if disk_usage > 80:
-                recommendations.append(f"Disk usage is high ({disk_usage:.1f}%). Consider upgrading to a larger or faster storage device.")
-            elif disk_usage > 60:
-                recommendations.append(f"Disk usage is moderate ({disk_usage:.1f}%). An SSD upgrade might improve system responsiveness.")
-        else:
-            recommendations.append("Unable to determine disk usage. Consider checking your storage device's health.")
-
-        return "\n".join(recommendations)
-
-    def get_component_rank(self, benchmark_data, component_name):
-        for item in benchmark_data:
-            if component_name.lower() in item.model.lower():
-                return item.rank
-        return float('inf')  # Return a high rank if no match is found
+        return self.engine.get_recommendation(self.system_info, component)
 
     def get_price(self, model):
-        # This is a placeholder. In a real application, you'd want to use an API or web scraping to get current prices.
-        # For demonstration, we'll return a random price between $100 and $1000
-        import random
-        return random.uniform(100, 1000)
+        return self.engine.get_price(model)
 
     def check_compatibility(self, recommendation):
-        component = self.upgrade_combo.get().lower()
-        
-        if component == "cpu":
-            current_socket = self.get_cpu_socket(self.system_info.get('cpu', 'Unknown'))
-            new_socket = self.get_cpu_socket(recommendation)
-            if current_socket != new_socket:
-                return f"Incompatible: Current socket {current_socket}, recommended CPU uses {new_socket}"
-        elif component == "ram":
-            current_type = self.get_ram_type(self.system_info.get('memory', 'Unknown'))
-            new_type = self.get_ram_type(recommendation)
-            if current_type != new_type:
-                return f"Incompatible: Current RAM type {current_type}, recommended RAM is {new_type}"
-        
-        return "Compatible with current system"
-
-    def get_cpu_socket(self, cpu_model):
-        # This is a placeholder. In a real application, you'd want to use a database or API to get this information.
-        return "LGA1200"  # Example socket
-
-    def get_ram_type(self, ram_model):
-        # This is a placeholder. In a real application, you'd want to use a database or API to get this information.
-        return "DDR4"  # Example RAM type
+        return self.engine.check_compatibility(self.system_info, self.upgrade_combo.get(), recommendation)
 
     def analyze_potential_bottleneck(self, recommendation):
-        current_scores = {
-            "CPU": self.get_benchmark_score(self.cpu_data, "Generic CPU"),
-            "GPU": self.get_benchmark_score(self.gpu_data, self.system_info['gpu']),
-            "RAM": self.get_benchmark_score(self.ram_data, "Generic RAM"),
-            "SSD": self.get_benchmark_score(self.ssd_data, "Generic SSD")
-        }
-        
-        component = self.upgrade_combo.get()
-        if component and component.lower() in ["cpu", "gpu", "ram", "ssd"]:
-            data_attr = f"{component.lower()}_data"
-            if hasattr(self, data_attr):
-                new_score = self.get_benchmark_score(getattr(self, data_attr), recommendation)
-                current_scores[component] = new_score
-            else:
-                return f"Error: No benchmark data available for {component}"
-        else:
-            return "Error: Invalid component selected"
-        
-        bottleneck = min(current_scores, key=current_scores.get)
-        if bottleneck == component:
-            return f"No new bottleneck introduced. {component} will still be the limiting factor."
-        else:
-            return f"Potential new bottleneck: {bottleneck}"
+        return self.engine.analyze_potential_bottleneck(self.system_info, self.upgrade_combo.get(), recommendation)
 
     def generate_upgrade_recommendations(self):
-        recommendations = []
-
-        # CPU recommendation
-        cpu_usage = self.system_info['cpu_usage']
-        if cpu_usage > 80:
-            recommendations.append(f"CPU usage is high ({cpu_usage:.1f}%). Consider upgrading your CPU.")
-        elif cpu_usage > 60:
-            recommendations.append(f"CPU usage is moderate ({cpu_usage:.1f}%). An upgrade might improve performance.")
-
-        # RAM recommendation
-        ram_usage = self.system_info['memory_usage']
-        if ram_usage > 80:
-            recommendations.append(f"RAM usage is high ({ram_usage:.1f}%). Consider adding more RAM.")
-        elif ram_usage > 60:
-            recommendations.append(f"RAM usage is moderate ({ram_usage:.1f}%). Adding more RAM might improve performance.")
-
-        # GPU recommendation
-        # Since we don't have GPU usage, we'll make a generic recommendation
-        recommendations.append("Consider upgrading your GPU if you experience lag in graphics-intensive applications.")
-
-        # Storage recommendation
-        disk_usage = self.system_info['disk']
-        if disk_usage > 80:
-            recommendations.append(f"Disk usage is high ({disk_usage:.1f}%). Consider upgrading to a larger or faster storage device.")
-        elif disk_usage > 60:
-            recommendations.append(f"Disk usage is moderate ({disk_usage:.1f}%). An SSD upgrade might improve system responsiveness.")
-
-        # If no specific recommendations, provide a general suggestion
-        if not recommendations:
-            recommendations.append("Your system is performing well. No immediate upgrades necessary.")
-
-        return "\n".join(recommendations)
-
-    def get_component_rank(self, benchmark_data, component_name):
-        if not isinstance(component_name, str):
-            return float('inf')  # Return a high rank if component_name is not a string
-        
-        component_name_lower = component_name.lower()
-        for item in benchmark_data:
-            if isinstance(item.model, str) and component_name_lower in item.model.lower():
-                return item.rank
-        return float('inf')  # Return a high rank if no match is found
+        return self.engine.generate_upgrade_recommendations(self.system_info)
 
     def generate_general_recommendations(self):
-        recommendations = []
-
-        components = [
-            ('CPU', self.cpu_data, str(self.system_info.get('cpu', 'Unknown'))),
-            ('RAM', self.ram_data, str(self.system_info.get('ram', 'Unknown'))),
-            ('GPU', self.gpu_data, str(self.system_info.get('gpu', 'Unknown'))),
-            ('SSD', self.ssd_data, str(self.system_info.get('disk', 'Unknown')))
-        ]
-
-        for component_name, benchmark_data, current_model in components:
-            current_score = self.get_benchmark_score(benchmark_data, current_model)
-            current_rank = self.get_component_rank(benchmark_data, current_model)
-
-            better_components = [item for item in benchmark_data if item.benchmark > current_score and item.rank < current_rank]
-            
-            if better_components:
-                better_components.sort(key=lambda x: (-x.benchmark, x.rank))
-                recommendation = better_components[0]
-                
-                if current_score > 0:
-                    improvement_percentage = ((recommendation.benchmark - current_score) / current_score) * 100
-                    recommendations.append(f"Consider upgrading your {component_name} to {recommendation.brand} {recommendation.model} "
-                                           f"(Rank: {recommendation.rank}, Score: {recommendation.benchmark:.1f}). "
-                                           f"This would provide a {improvement_percentage:.1f}% performance improvement.")
-                else:
-                    recommendations.append(f"Consider upgrading your {component_name} to {recommendation.brand} {recommendation.model} "
-                                           f"(Rank: {recommendation.rank}, Score: {recommendation.benchmark:.1f}) "
-                                           f"for better performance.")
-            else:
-                if current_score > 0:
-                    recommendations.append(f"Your {component_name} ({current_model}, Score: {current_score:.1f}) is already high-performing. No immediate upgrade necessary.")
-                else:
-                    recommendations.append(f"Unable to determine the performance of your current {component_name} ({current_model}). Consider checking for updates or potential issues.")
-
-        # Storage recommendation
-        disk_usage = self.system_info.get('disk_usage')
-        if isinstance(disk_usage, (int, float)):
-            if disk_usage > 80:
-                recommendations.append(f"Disk usage is high ({disk_usage:.1f}%). Consider upgrading to a larger or faster storage device.")
-            elif disk_usage > 60:
-                recommendations.append(f"Disk usage is moderate ({disk_usage:.1f}%). An SSD upgrade might improve system responsiveness.")
-        else:
-            recommendations.append("Unable to determine disk usage. Consider checking your storage device's health.")
-
-        return "\n".join(recommendations)
+        return self.engine.generate_general_recommendations(self.system_info)
 
 def main():
     root = tk.Tk()
     app = BottleneckAnalyzer(root)
     root.mainloop()
+    app.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,470 @@
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+
+from usage_sampler import SATURATION_THRESHOLDS, percentile, summarize
+
+# Persistent utilization history.
+#
+# Usage samples and analysis results are appended to a small SQLite database so
+# a machine's load can be followed over days and weeks. Samples are kept in
+# three tiers: raw values for an hour, then 1-minute and 1-hour rollups for
+# progressively longer. A rollup row holds the count, sum, minimum and maximum
+# of its bucket plus a sparse log-scale sketch of the values (keys spaced so
+# each bucket spans 2% of its value), so percentiles and saturated shares over
+# any range come from merging a few hundred sketches rather than rereading every
+# sample. Writes are buffered and committed in one transaction per flush, and
+# rollups are accumulated in memory and merged into their rows at each flush.
+
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bottleneck_history.sqlite')
+
+# Tier bucket width in seconds (0 = raw samples) -> seconds of data kept
+DEFAULT_RETENTION = {
+    0: 3600,
+    60: 3 * 86400,
+    3600: 180 * 86400,
+}
+ANALYSIS_RETENTION = 180 * 86400
+WAL_SIZE_LIMIT = 1 << 20    # Bytes the write-ahead log is truncated to after a checkpoint
+ROLLUP_TIERS = (60, 3600)
+
+FLUSH_INTERVAL = 60.0       # Seconds between commits of buffered samples
+PRUNE_INTERVAL = 3600.0     # Seconds between retention passes
+SKETCH_ACCURACY = 0.02      # Relative error of percentiles read from rollups
+HISTORY_DAYS = 7.0          # Range attached to each analysis as system_info['history']
+MIN_TREND_DAYS = 1.0        # Shortest sampled span a per-day trend is extrapolated from
+
+# Metrics from UsageSampler that are not kept, to bound the database size
+SKIPPED_PREFIXES = ('cpu_core_',)
+
+# system_info entries stored with each analysis
+ANALYSIS_KEYS = ('cpu', 'gpu', 'ram', 'cpu_usage', 'memory_usage', 'disk')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS samples (
+    metric INTEGER NOT NULL, ts REAL NOT NULL, value REAL NOT NULL,
+    PRIMARY KEY (metric, ts)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    tier INTEGER NOT NULL, metric INTEGER NOT NULL, start INTEGER NOT NULL,
+    count INTEGER NOT NULL, sum REAL NOT NULL, min REAL NOT NULL, max REAL NOT NULL, sketch BLOB NOT NULL,
+    PRIMARY KEY (tier, metric, start)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS analyses (
+    ts REAL PRIMARY KEY, bottleneck TEXT, scores TEXT, snapshot TEXT) WITHOUT ROWID;
+"""
+
+_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+ZERO_KEY = -(1 << 15)       # Sketch key of zero and negative values
+MIN_POSITIVE = 1e-9         # Smallest and largest positive values keep their keys within int16
+MAX_VALUE = 1e15
+
+
+def sketch_key(value):
+    if value < MIN_POSITIVE:
+        return ZERO_KEY
+    return math.ceil(math.log(min(value, MAX_VALUE)) / _LOG_GAMMA)
+
+
+def sketch_value(key):
+    # Representative value of a sketch key, within SKETCH_ACCURACY of every value mapped to it
+    if key == ZERO_KEY:
+        return 0.0
+    return 2 * _GAMMA ** key / (_GAMMA + 1)
+
+
+def encode_sketch(sketch):
+    # {key: count} -> blob of the sorted keys as int16 followed by their counts as uint32
+    keys = sorted(sketch)
+    return array('h', keys).tobytes() + array('I', (sketch[key] for key in keys)).tobytes()
+
+
+def decode_sketch(blob, into=None):
+    size = len(blob) // 6
+    keys = array('h')
+    keys.frombytes(blob[:size * 2])
+    counts = array('I')
+    counts.frombytes(blob[size * 2:])
+    sketch = into if into is not None else {}
+    for key, count in zip(keys, counts):
+        sketch[key] = sketch.get(key, 0) + count
+    return sketch
+
+
+def sketch_percentile(sketch, p, low=None, high=None):
+    # Percentile (0-100) of the values in a sketch, clamped to the known minimum and maximum
+    total = sum(sketch.values())
+    if not total:
+        return None
+    rank = (total - 1) * p / 100.0
+    seen = 0
+    value = 0.0
+    for key in sorted(sketch):
+        seen += sketch[key]
+        if seen > rank:
+            value = sketch_value(key)
+            break
+    if low is not None:
+        value = max(value, low)
+    if high is not None:
+        value = min(value, high)
+    return value
+
+
+class Rollup:
+    # Statistics of one metric's values in one bucket, not yet merged into the database
+    __slots__ = ('count', 'sum', 'min', 'max', 'sketch')
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = {}
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        key = sketch_key(value)
+        self.sketch[key] = self.sketch.get(key, 0) + 1
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_FILE, retention=None, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.retention = dict(DEFAULT_RETENTION)
+        self.retention.update(retention or {})
+        self.flush_interval = flush_interval
+        # Samples arrive on the usage sampler's thread and queries on others, so one lock guards it all
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA auto_vacuum = INCREMENTAL')  # Only takes effect on a new file
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute(f'PRAGMA journal_size_limit = {WAL_SIZE_LIMIT}')
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        self.metric_ids = dict(self.connection.execute('SELECT name, id FROM metrics'))
+        self.pending_samples = []   # (metric id, ts, value)
+        self.pending_rollups = {}   # (tier, metric id, bucket start) -> Rollup
+        self.last_flush = time.monotonic()
+        self.last_prune = 0.0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _metric_id(self, name):
+        metric = self.metric_ids.get(name)
+        if metric is None:
+            with self.connection:
+                self.connection.execute('INSERT OR IGNORE INTO metrics (name) VALUES (?)', (name,))
+            metric = self.metric_ids[name] = self.connection.execute(
+                'SELECT id FROM metrics WHERE name = ?', (name,)).fetchone()[0]
+        return metric
+
+    # Writing
+
+    def add_samples(self, timestamp, values):
+        # Buffer one reading of several metrics ({metric: value}) taken at a wall-clock timestamp.
+        # Signature matches UsageSampler.on_sample.
+        with self.lock:
+            if self.closed:
+                return
+            for name, value in values.items():
+                if name.startswith(SKIPPED_PREFIXES) or not isinstance(value, (int, float)):
+                    continue
+                metric = self._metric_id(name)
+                self.pending_samples.append((metric, timestamp, float(value)))
+                for tier in ROLLUP_TIERS:
+                    key = (tier, metric, int(timestamp // tier) * tier)
+                    rollup = self.pending_rollups.get(key)
+                    if rollup is None:
+                        rollup = self.pending_rollups[key] = Rollup()
+                    rollup.add(float(value))
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+
+    def record_analysis(self, system_info, bottleneck, scores=None, timestamp=None):
+        # Keep the outcome of an analysis along with the hardware and load it was made for
+        snapshot = {key: system_info[key] for key in ANALYSIS_KEYS if key in system_info}
+        with self.lock:
+            if self.closed:
+                return
+            with self.connection:
+                self.connection.execute('INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?)',
+                                        (timestamp if timestamp is not None else time.time(), bottleneck,
+                                         json.dumps(scores or {}), json.dumps(snapshot)))
+
+    def flush(self):
+        # Commit buffered samples and merge pending rollups into their rows, in one transaction
+        with self.lock:
+            if self.closed or not (self.pending_samples or self.pending_rollups):
+                return
+            connection = self.connection
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO samples VALUES (?, ?, ?)', self.pending_samples)
+                for (tier, metric, start), rollup in self.pending_rollups.items():
+                    row = connection.execute('SELECT count, sum, min, max, sketch FROM rollups '
+                                             'WHERE tier = ? AND metric = ? AND start = ?', (tier, metric, start)).fetchone()
+                    count, total, low, high, sketch = rollup.count, rollup.sum, rollup.min, rollup.max, rollup.sketch
+                    if row is not None:
+                        count += row[0]
+                        total += row[1]
+                        low = min(low, row[2])
+                        high = max(high, row[3])
+                        decode_sketch(row[4], sketch)
+                    connection.execute('INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                       (tier, metric, start, count, total, low, high, encode_sketch(sketch)))
+            self.pending_samples = []
+            self.pending_rollups = {}
+            self.last_flush = time.monotonic()
+            if time.monotonic() - self.last_prune >= PRUNE_INTERVAL:
+                self.prune()
+
+    def prune(self, now=None):
+        # Drop data older than each tier's retention and return the freed pages to the file system
+        now = time.time() if now is None else now
+        with self.lock:
+            connection = self.connection
+            with connection:
+                for metric in self.metric_ids.values():
+                    connection.execute('DELETE FROM samples WHERE metric = ? AND ts < ?', (metric, now - self.retention[0]))
+                    for tier in ROLLUP_TIERS:
+                        connection.execute('DELETE FROM rollups WHERE tier = ? AND metric = ? AND start < ?',
+                                           (tier, metric, now - self.retention[tier]))
+                connection.execute('DELETE FROM analyses WHERE ts < ?', (now - ANALYSIS_RETENTION,))
+            connection.executescript('PRAGMA incremental_vacuum;')  # execute() would free a single page
+            self.last_prune = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.flush()
+            self.closed = True
+            self.connection.close()
+
+    # Queries. Each flushes buffered samples first, so results include everything recorded so far.
+
+    def metrics(self):
+        with self.lock:
+            return sorted(self.metric_ids)
+
+    def tier_for(self, start, now=None):
+        # Finest tier whose retention still covers start: 0 (raw), 60 or 3600
+        age = (time.time() if now is None else now) - start
+        for tier in (0,) + ROLLUP_TIERS:
+            if age <= self.retention[tier]:
+                return tier
+        return ROLLUP_TIERS[-1]
+
+    def _rows(self, tier, metric, start, end):
+        if tier == 0:
+            return self.connection.execute('SELECT ts, value FROM samples WHERE metric = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                                           (metric, start, end)).fetchall()
+        return self.connection.execute('SELECT start, count, sum, min, max, sketch FROM rollups '
+                                       'WHERE tier = ? AND metric = ? AND start >= ? AND start < ? ORDER BY start',
+                                       (tier, metric, int(start // tier) * tier, end)).fetchall()
+
+    def range(self, metric, start, end=None, tier=None):
+        # Values of a metric over [start, end): (ts, value) pairs for raw samples, otherwise one
+        # (bucket start, mean, min, max, count) tuple per rollup bucket. The tier defaults to the
+        # finest one still holding start.
+        end = time.time() if end is None else end
+        tier = self.tier_for(start) if tier is None else tier
+        with self.lock:
+            self.flush()
+            metric_id = self.metric_ids.get(metric)
+            if metric_id is None:
+                return []
+            rows = self._rows(tier, metric_id, start, end)
+        if tier == 0:
+            return rows
+        return [(bucket, total / count, low, high, count) for bucket, count, total, low, high, _ in rows]
+
+    def stats(self, metric, start, end=None, threshold=None):
+        # Statistics of a metric over [start, end) in the form of usage_sampler.summarize, plus
+        # 'count' and 'trend_per_day' (the least-squares slope of its rollup means, per day, or None
+        # when the samples span less than MIN_TREND_DAYS).
+        # Exact from raw samples while they are kept, otherwise read from the rollup sketches.
+        now = time.time()
+        end = now if end is None else end
+        if threshold is None:
+            threshold = SATURATION_THRESHOLDS.get(metric)
+        tier = self.tier_for(start, now)
+        with self.lock:
+            self.flush()
+            metric_id = self.metric_ids.get(metric)
+            if metric_id is None:
+                return None
+            rows = self._rows(tier, metric_id, start, end)
+            trend_tier = tier or ROLLUP_TIERS[0]
+            trend_rows = rows if tier else self._rows(trend_tier, metric_id, start, end)
+        if not rows:
+            return None
+
+        if tier == 0:
+            times = [row[0] for row in rows]
+            interval = (times[-1] - times[0]) / (len(times) - 1) if len(times) > 1 else 0.0
+            stats = summarize([row[1] for row in rows], interval, threshold)
+            stats['count'] = len(rows)
+        else:
+            sketch = {}
+            count = 0
+            total = 0.0
+            low, high = math.inf, -math.inf
+            for _, bucket_count, bucket_sum, bucket_min, bucket_max, blob in rows:
+                count += bucket_count
+                total += bucket_sum
+                low = min(low, bucket_min)
+                high = max(high, bucket_max)
+                decode_sketch(blob, sketch)
+            stats = {
+                'mean': total / count,
+                'p50': sketch_percentile(sketch, 50, low, high),
+                'p95': sketch_percentile(sketch, 95, low, high),
+                'max': high,
+                'last': rows[-1][2] / rows[-1][1],
+                'count': count,
+            }
+            if threshold is not None:
+                threshold_key = sketch_key(threshold)
+                stats['saturated_fraction'] = sum(n for key, n in sketch.items() if key >= threshold_key) / count
+        stats['trend_per_day'] = trend(trend_rows, trend_tier)
+        return stats
+
+    def percentiles(self, metric, start, end=None, ps=(50, 95, 99)):
+        # {p: value} for a metric over [start, end)
+        end = time.time() if end is None else end
+        tier = self.tier_for(start)
+        with self.lock:
+            self.flush()
+            metric_id = self.metric_ids.get(metric)
+            rows = self._rows(tier, metric_id, start, end) if metric_id is not None else []
+        if not rows:
+            return {p: None for p in ps}
+        if tier == 0:
+            ordered = sorted(row[1] for row in rows)
+            return {p: percentile(ordered, p, presorted=True) for p in ps}
+        sketch = {}
+        for row in rows:
+            decode_sketch(row[5], sketch)
+        low, high = min(row[3] for row in rows), max(row[4] for row in rows)
+        return {p: sketch_percentile(sketch, p, low, high) for p in ps}
+
+    def summary(self, start, end=None):
+        # Statistics of every metric over [start, end), shaped like UsageSampler.summary() so the
+        # engine can judge a long history the same way as the live window
+        now = time.time()
+        end = now if end is None else end
+        metrics = {}
+        for metric in self.metrics():
+            stats = self.stats(metric, start, end)
+            if stats is not None:
+                metrics[metric] = stats
+        with self.lock:
+            first = self.connection.execute('SELECT MIN(start) FROM rollups WHERE start >= ?', (int(start // 3600) * 3600,)).fetchone()[0]
+        first = max(start, first) if first is not None else end
+        samples = max((stats['count'] for stats in metrics.values()), default=0)
+        return {
+            'samples': samples,
+            'duration': max(0.0, end - first),
+            'interval': (end - first) / samples if samples else 0.0,
+            'tier': self.tier_for(start, now),
+            'metrics': metrics,
+        }
+
+    def analyses(self, start, end=None):
+        # Recorded analyses over [start, end), oldest first, as dicts
+        end = time.time() if end is None else end
+        with self.lock:
+            rows = self.connection.execute('SELECT ts, bottleneck, scores, snapshot FROM analyses WHERE ts >= ? AND ts < ? ORDER BY ts',
+                                           (start, end)).fetchall()
+        return [{'time': ts, 'bottleneck': bottleneck, 'scores': json.loads(scores), 'system_info': json.loads(snapshot)}
+                for ts, bottleneck, scores, snapshot in rows]
+
+
+def trend(rows, tier):
+    # Count-weighted least-squares slope of rollup bucket means, in units per day; None when the
+    # buckets span less than MIN_TREND_DAYS, as a slope over minutes says little about days
+    points = [(start + tier / 2.0, total / count, count) for start, count, total, _, _, _ in rows if count]
+    if not points or points[-1][0] - points[0][0] + tier < MIN_TREND_DAYS * 86400:
+        return None
+    weight = sum(count for _, _, count in points)
+    if len(points) < 2 or not weight:
+        return 0.0
+    mean_t = sum(t * count for t, _, count in points) / weight
+    mean_v = sum(v * count for _, v, count in points) / weight
+    spread = sum(count * (t - mean_t) ** 2 for t, _, count in points)
+    if not spread:
+        return 0.0
+    return sum(count * (t - mean_t) * (v - mean_v) for t, v, count in points) / spread * 86400.0
+
+
+def parse_age(text):
+    # "90m", "12h", "7d" or plain seconds -> seconds
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or query the local utilization history.")
+    parser.add_argument('--db', default=HISTORY_FILE, help="history database file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help="sample utilization into the history until interrupted")
+    record.add_argument('--interval', type=float, default=1.0, help="seconds between samples")
+    query = commands.add_parser('query', help="print statistics of recorded metrics")
+    query.add_argument('--since', default='1d', help="how far back, e.g. 90m, 12h, 7d (default: 1d)")
+    query.add_argument('--metric', action='append', help="metric to report (default: all)")
+    query.add_argument('--series', action='store_true', help="print the values instead of statistics")
+    commands.add_parser('analyses', help="print recorded analyses").add_argument('--since', default='7d')
+    args = parser.parse_args(argv)
+
+    with HistoryStore(args.db) as store:
+        if args.command == 'record':
+            from usage_sampler import UsageSampler
+            sampler = UsageSampler(interval=args.interval)
+            sampler.on_sample = store.add_samples
+            sampler.start()
+            print(f"Recording to {args.db}; press Ctrl+C to stop", file=sys.stderr)
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+            finally:
+                sampler.stop()
+            return 0
+
+        start = time.time() - parse_age(args.since)
+        if args.command == 'analyses':
+            for analysis in store.analyses(start):
+                print(json.dumps(analysis))
+            return 0
+        for metric in args.metric or store.metrics():
+            if args.series:
+                print(json.dumps({'metric': metric, 'tier': store.tier_for(start), 'values': store.range(metric, start)}))
+            else:
+                print(json.dumps({'metric': metric, **(store.stats(metric, start) or {})}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Phase-level instrumentation.
+#
+# Timing spans and counters around the stages of an analysis: table loading,
+# hardware probes, name matching, bottleneck detection and recommendations.
+# Instrumentation is off by default: span() then hands out one shared no-op
+# object and count() returns at once, so a hook costs a function call. When on,
+# every span feeds a per-stage histogram of durations, and the spans and
+# counters recorded between begin_run() and end_run() form a per-run trace
+# that is exported as JSON. The run in progress is tracked per thread (a context
+# variable), so runs on different threads do not collect each other's spans;
+# work handed to a pool joins the run when submitted with contextvars.copy_context().
+
+# Directory for per-run trace files; setting it turns instrumentation on at import
+TRACE_ENV = 'BOTTLENECK_TRACE'
+
+SUMMARY_PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    # Durations in power-of-two microsecond buckets: bucket b counts durations below 2**b µs
+    # (and at least 2**(b-1) µs), so any number of samples fits in a few dozen counters
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        # Upper edge of the bucket holding the p-th percentile, in seconds, capped at the maximum
+        if not self.count:
+            return None
+        target = self.count * p / 100.0
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        summary = {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total * 1000 / self.count if self.count else 0.0,
+            'max_ms': self.max * 1000,
+        }
+        for p in SUMMARY_PERCENTILES:
+            value = self.percentile(p)
+            summary[f'p{p}_ms'] = value * 1000 if value is not None else None
+        summary['buckets'] = {str(1 << bucket): self.buckets[bucket] for bucket in sorted(self.buckets)}
+        return summary
+
+
+class Trace:
+    # Spans and counters of one run, e.g. one "Analyze System" click or one batch record
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.counters = {}
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'attrs': self.attrs,
+            'started': self.started,
+            'duration_ms': self.duration * 1000 if self.duration is not None else None,
+            'spans': self.spans,
+            'counters': self.counters,
+        }
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'attrs', 'parent', 'start')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, key, value):
+        # Attach a detail to the span's trace entry, such as the number of rows it loaded
+        self.attrs[key] = value
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end = time.perf_counter()
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._finish(self, end)
+        return False
+
+
+class NullSpan:
+    # What span() returns while instrumentation is off
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.trace_dir = None       # Where end_run() writes trace files; None keeps them in memory only
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.histograms = {}        # Span name -> Histogram, over all runs and spans outside runs
+        self.counters = {}          # Counter name -> total
+        self.current = contextvars.ContextVar('current_run', default=None)  # Trace of the run in progress
+        self.last_run = None        # Exported dict of the latest finished run
+        self.runs = 0
+
+    def configure(self, enabled=True, trace_dir=None):
+        self.enabled = enabled
+        self.trace_dir = trace_dir
+        if trace_dir:
+            os.makedirs(trace_dir, exist_ok=True)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+            self.last_run = None
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            run = self.current.get()
+            if run is not None:
+                counters = run.counters
+                counters[name] = counters.get(name, 0) + n
+
+    def _finish(self, span, end):
+        duration = end - span.start
+        with self.lock:
+            histogram = self.histograms.get(span.name)
+            if histogram is None:
+                histogram = self.histograms[span.name] = Histogram()
+            histogram.add(duration)
+            run = self.current.get()
+            if run is not None and span.start >= run.origin:
+                entry = {
+                    'name': span.name,
+                    'start_ms': (span.start - run.origin) * 1000,
+                    'duration_ms': duration * 1000,
+                    'thread': threading.current_thread().name,
+                }
+                if span.parent is not None:
+                    entry['parent'] = span.parent
+                if span.attrs:
+                    entry['attrs'] = span.attrs
+                run.spans.append(entry)
+
+    def begin_run(self, name, **attrs):
+        # Start collecting a trace; spans in this context land in it until end_run().
+        # Returns None while instrumentation is off.
+        if not self.enabled:
+            return None
+        trace = Trace(name, attrs)
+        self.current.set(trace)
+        return trace
+
+    def end_run(self, trace):
+        # Finish a run started by begin_run(); returns its exported dict, also written to
+        # trace_dir when one is configured
+        if trace is None:
+            return None
+        trace.duration = time.perf_counter() - trace.origin
+        if self.current.get() is trace:
+            self.current.set(None)
+        with self.lock:
+            self.runs += 1
+            sequence = self.runs
+            exported = self.last_run = trace.to_dict()
+        if self.trace_dir:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(trace.started))
+            filename = os.path.join(self.trace_dir, f"{stamp}-{os.getpid()}-{sequence:05d}-{trace.name}.json")
+            try:
+                with open(filename, 'w') as file:
+                    json.dump(exported, file, indent=1)
+            except OSError as e:
+                print(f"Error writing trace {filename}: {e}")
+        return exported
+
+    @contextmanager
+    def run(self, name, **attrs):
+        trace = self.begin_run(name, **attrs)
+        try:
+            yield trace
+        finally:
+            self.end_run(trace)
+
+    def merge(self, exported):
+        # Fold a trace exported in another process into the run count, histograms and counter totals
+        with self.lock:
+            self.runs += 1
+            for entry in exported.get('spans', ()):
+                histogram = self.histograms.get(entry['name'])
+                if histogram is None:
+                    histogram = self.histograms[entry['name']] = Histogram()
+                histogram.add(entry['duration_ms'] / 1000.0)
+            for name, value in exported.get('counters', {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        # Aggregate histograms per stage and counter totals, as a JSON-friendly dict
+        with self.lock:
+            return {
+                'runs': self.runs,
+                'stages': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+
+def format_summary(summary, run=None):
+    # Plain-text table of a summary(), optionally preceded by the stage times of one run
+    lines = []
+    if run is not None and run.get('spans'):
+        lines.append(f"Last run: {run['duration_ms']:.1f} ms")
+        totals = {}
+        for entry in run['spans']:
+            totals[entry['name']] = totals.get(entry['name'], 0.0) + entry['duration_ms']
+        for name, total in sorted(totals.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name}: {total:.1f} ms")
+    if summary.get('runs'):
+        lines.append(f"Runs: {summary['runs']}")
+    stages = summary.get('stages', {})
+    if stages:
+        width = max(len(name) for name in stages)
+        lines.append(f"{'stage':<{width}}  {'count':>7}  {'mean ms':>9}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}")
+        for name, stats in sorted(stages.items(), key=lambda item: -item[1]['total_ms']):
+            lines.append(f"{name:<{width}}  {stats['count']:>7}  {stats['mean_ms']:>9.2f}  {stats['p50_ms']:>9.2f}  "
+                         f"{stats['p95_ms']:>9.2f}  {stats['max_ms']:>9.2f}")
+    counters = summary.get('counters', {})
+    if counters:
+        lines.append("Counters: " + ", ".join(f"{name} {value}" for name, value in counters.items()))
+    return "\n".join(lines)
+
+
+TRACER = Tracer()
+if os.environ.get(TRACE_ENV):
+    TRACER.configure(True, os.environ[TRACE_ENV])
+
+# Module-level shortcuts to the process-wide tracer
+span = TRACER.span
+count = TRACER.count
+begin_run = TRACER.begin_run
+end_run = TRACER.end_run
+run = TRACER.run
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Synthetic micro-benchmarks of the local machine.
+#
+# Short probes measure single- and multi-core CPU throughput, memory copy
+# bandwidth, and sequential and random disk I/O against a temporary file. Raw
+# results are converted to the scale of the UserBenchmark "Benchmark" column
+# by comparing them with a reference machine that scores REFERENCE_SCORE in
+# every table. The built-in reference figures are rough; running "calibrate"
+# on a machine whose parts are in the tables stores correction factors that
+# make scores line up with the tables on similar hardware.
+
+REFERENCE_SCORE = 100.0
+
+# Raw results of the reference machine
+REFERENCE = {
+    'cpu_single_ops': 4.0e6,        # Kernel iterations per second on one core
+    'cpu_multi_ops': 40.0e6,        # Kernel iterations per second on all cores
+    'memory_copy_bps': 10.0e9,      # Bytes copied per second between large buffers
+    'disk_seq_read_bps': 500.0e6,
+    'disk_seq_write_bps': 450.0e6,
+    'disk_random_read_iops': 8000.0,
+}
+
+# How much each raw result contributes to a component's score
+WEIGHTS = {
+    'cpu': {'cpu_single_ops': 0.5, 'cpu_multi_ops': 0.5},
+    'ram': {'memory_copy_bps': 1.0},
+    'ssd': {'disk_seq_read_bps': 0.3, 'disk_seq_write_bps': 0.2, 'disk_random_read_iops': 0.5},
+}
+
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micro_benchmark_calibration.json')
+
+KERNEL_CHUNK = 50000
+START_DELAY = 0.1           # Seconds between scheduling the multi-core run and its shared start time
+DISK_BLOCK = 1 << 20
+RANDOM_BLOCK = 4096
+
+
+def cpu_kernel(iterations):
+    # Mixed integer and floating point work, representative of interpreter-bound code
+    acc = 0
+    x = 1.0001
+    for i in range(iterations):
+        acc = (acc + i * 7) & 0xFFFFFF
+        x = x * 1.0000001 + 0.5 / (i + 1)
+    return acc, x
+
+
+def measure_cpu_single(duration=0.5):
+    # Kernel iterations per second on the calling core
+    iterations = 0
+    start = time.perf_counter()
+    while True:
+        cpu_kernel(KERNEL_CHUNK)
+        iterations += KERNEL_CHUNK
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return iterations / elapsed
+
+
+def _run_window(start, deadline):
+    # Kernel iterations run between two wall-clock times, and when the last chunk ended.
+    # A worker that only gets going after the deadline does nothing, so it cannot stretch the window.
+    delay = start - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    iterations = 0
+    now = time.time()
+    while now < deadline:
+        cpu_kernel(KERNEL_CHUNK)
+        iterations += KERNEL_CHUNK
+        now = time.time()
+    return iterations, now
+
+
+def measure_cpu_multi(duration=0.5, workers=None):
+    # Combined kernel iterations per second with one process per logical CPU.
+    # Every worker runs between one shared start time and deadline, and the total is divided by
+    # that common window, so workers that start late add fewer iterations rather than extra time.
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(time.sleep, [0.01] * workers))  # Start the worker processes first
+        start = time.time() + START_DELAY
+        results = list(executor.map(_run_window, [start] * workers, [start + duration] * workers))
+    iterations = sum(count for count, _ in results)
+    end = max(finished for _, finished in results)
+    return iterations / (end - start) if end > start else 0.0
+
+
+def measure_memory(size=64 << 20, duration=0.5):
+    # Copy bandwidth between two large buffers, in bytes per second
+    source = bytearray(os.urandom(1 << 16)) * (size >> 16)
+    target = memoryview(bytearray(len(source)))
+    copied = 0
+    start = time.perf_counter()
+    while True:
+        target[:] = source
+        copied += len(source)
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return copied / elapsed
+
+
+def _drop_cache(fd):
+    # Ask the OS to evict the file from the page cache so reads hit the device
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+def measure_disk(directory=None, size=64 << 20, duration=0.5):
+    # Sequential write and read throughput and random 4 KiB read IOPS on a temporary file.
+    # Without posix_fadvise (e.g. on Windows) reads may be served from the page cache.
+    results = {}
+    block = os.urandom(DISK_BLOCK)
+    fd, path = tempfile.mkstemp(prefix='bottleneck-', suffix='.bin', dir=directory)
+    try:
+        start = time.perf_counter()
+        for _ in range(size // DISK_BLOCK):
+            os.write(fd, block)
+        os.fsync(fd)
+        results['disk_seq_write_bps'] = size / (time.perf_counter() - start)
+
+        _drop_cache(fd)
+        os.lseek(fd, 0, os.SEEK_SET)
+        start = time.perf_counter()
+        while os.read(fd, DISK_BLOCK):
+            pass
+        results['disk_seq_read_bps'] = size / (time.perf_counter() - start)
+
+        _drop_cache(fd)
+        blocks = size // RANDOM_BLOCK
+        reads = 0
+        start = time.perf_counter()
+        while True:
+            offset = random.randrange(blocks) * RANDOM_BLOCK
+            if hasattr(os, 'pread'):
+                os.pread(fd, RANDOM_BLOCK, offset)
+            else:
+                os.lseek(fd, offset, os.SEEK_SET)
+                os.read(fd, RANDOM_BLOCK)
+            reads += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= duration:
+                break
+        results['disk_random_read_iops'] = reads / elapsed
+    finally:
+        os.close(fd)
+        os.remove(path)
+    return results
+
+
+def load_calibration(path=CALIBRATION_FILE):
+    # Per-component correction factors; 1.0 when not calibrated
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def normalize(raw, calibration=None):
+    # Convert raw results to Benchmark-column scores for 'cpu', 'ram' and 'ssd'
+    calibration = load_calibration() if calibration is None else calibration
+    scores = {}
+    for component, weights in WEIGHTS.items():
+        if not all(raw.get(metric) for metric in weights):
+            continue
+        ratio = sum(weight * raw[metric] / REFERENCE[metric] for metric, weight in weights.items())
+        scores[component] = ratio * REFERENCE_SCORE * calibration.get(component, 1.0)
+    return scores
+
+
+def run_suite(duration=0.5, disk_dir=None, disk_size=64 << 20, components=('cpu', 'ram', 'ssd')):
+    # Run the probes for the requested components.
+    # Returns {'raw': {metric: value}, 'scores': {component: score}, 'calibrated': [component, ...],
+    # 'seconds': total time}. Only the calibrated components' scores are on the tables' scale.
+    start = time.perf_counter()
+    raw = {}
+    if 'cpu' in components:
+        raw['cpu_single_ops'] = measure_cpu_single(duration)
+        raw['cpu_multi_ops'] = measure_cpu_multi(duration)
+    if 'ram' in components:
+        raw['memory_copy_bps'] = measure_memory(duration=duration)
+    if 'ssd' in components:
+        raw.update(measure_disk(disk_dir, disk_size, duration))
+    calibration = load_calibration()
+    return {'raw': raw, 'scores': normalize(raw, calibration), 'calibrated': sorted(calibration),
+            'seconds': time.perf_counter() - start}
+
+
+def calibrate(raw, table_scores, path=CALIBRATION_FILE):
+    # Store factors that map this machine's raw results onto its parts' known table scores.
+    # table_scores maps 'cpu', 'ram' and 'ssd' to Benchmark-column scores of the installed parts.
+    uncalibrated = normalize(raw, calibration={})
+    calibration = load_calibration(path)
+    for component, table_score in table_scores.items():
+        if table_score and uncalibrated.get(component):
+            calibration[component] = table_score / uncalibrated[component]
+    with open(path, 'w') as file:
+        json.dump(calibration, file, indent=2)
+    return calibration
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure this machine and score it on the benchmark tables' scale.")
+    parser.add_argument('command', nargs='?', choices=['run', 'calibrate'], default='run')
+    parser.add_argument('--duration', type=float, default=0.5, help="seconds per timed probe")
+    parser.add_argument('--disk-dir', help="directory for the disk test file (default: system temp directory)")
+    parser.add_argument('--disk-size', type=int, default=64, help="disk test file size in MiB")
+    parser.add_argument('--cpu', help="calibrate: name of the installed CPU, as found in the CPU table")
+    parser.add_argument('--ram', help="calibrate: name of the installed RAM kit")
+    parser.add_argument('--ssd', help="calibrate: name of the drive holding --disk-dir")
+    parser.add_argument('--benchmarks', default='Benchmarks', help="directory containing the benchmark CSV files")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.duration, args.disk_dir, args.disk_size << 20)
+    if args.command == 'calibrate':
+        from analysis_engine import AnalysisEngine
+        engine = AnalysisEngine.load(args.benchmarks)
+        table_scores = {}
+        for component, name in (('cpu', args.cpu), ('ram', args.ram), ('ssd', args.ssd)):
+            row = engine.tables[f'{component}_data'].find(name) if name else None
+            if name and row is None:
+                print(f"Warning: {name!r} was not found in the {component.upper()} table", file=sys.stderr)
+            elif row is not None:
+                table_scores[component] = row.benchmark
+        if not table_scores:
+            print("Error: give at least one of --cpu, --ram or --ssd to calibrate", file=sys.stderr)
+            return 1
+        results['calibration'] = calibrate(results['raw'], table_scores)
+        results['scores'] = normalize(results['raw'], results['calibration'])
+        results['calibrated'] = sorted(results['calibration'])
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+import math
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+import instrumentation
+
+# Matching of raw hardware names (cpuinfo brand strings, WMI device names, ...)
+# against the Model column of a benchmark table.
+#
+# Names are normalized into tokens, and an inverted index maps each token to the
+# rows containing it. Candidates are the rows holding every model number of the
+# query, or when it has none the rows sharing its rarest tokens, and they are
+# scored with an IDF-weighted cosine. A row must also agree on variant suffixes
+# ("Super", "Ti", "v4") and match more than the brand. Unknown query words are
+# resolved fuzzily through a character trigram index over the vocabulary; model
+# numbers are not, as a near miss there names a different part.
+
+# Words that describe a product family or marketing, rather than identify a model
+NOISE_TOKENS = frozenset([
+    'r', 'tm', 'gen', 'generation', 'cpu', 'processor', 'apu', 'gpu', 'graphics',
+    'with', 'series', 'family', 'corporation', 'inc', 'co', 'ltd', 'technology',
+    'core', 'mobile', 'desktop', 'geforce', 'controller', 'adapter', 'display',
+    'generic', 'device', 'ssd', 'hdd', 'solid', 'state', 'hard', 'disk', 'drive',
+])
+ORDINAL = re.compile(r'^\d+(st|nd|rd|th)$')
+# Suffixes telling apart models that share a number: "RTX 4070 Super", "Xeon E5-2690 v4"
+SUFFIX_TOKENS = frozenset(['super', 'ti', 'xt', 'xtx', 'gre'])
+VERSION = re.compile(r'^v\d{1,2}$')
+UNIT_SUFFIX = re.compile(r'^(\d+)(mhz|mt|mts)$')
+CAPACITY = re.compile(r'^\d+(mb|gb|tb)$')
+TOKEN = re.compile(r'[a-z0-9]+')
+ALPHA_DIGIT = re.compile(r'[a-z]+|[0-9]+')
+
+MIN_SCORE = 0.45            # Lowest cosine score accepted as a match
+FUZZY_MIN_SIMILARITY = 0.5  # Lowest trigram similarity for a fuzzy token match
+CANDIDATE_LIMIT = 2000      # Most rows scored for a query without model numbers
+
+
+def normalize(name):
+    # Lowercase a raw name and drop trademark marks and clock speeds ("... @ 3.60GHz")
+    name = name.lower().replace('(r)', ' ').replace('(tm)', ' ').replace('®', ' ').replace('™', ' ')
+    return name.split('@', 1)[0]
+
+
+def tokenize(name):
+    # Split a name into identifying tokens, e.g. "13th Gen Intel(R) Core(TM) i7-13700K"
+    # gives ['intel', 'i7', '13700k']
+    tokens = []
+    for token in TOKEN.findall(normalize(name)):
+        if token in NOISE_TOKENS or ORDINAL.match(token):
+            continue
+        unit = UNIT_SUFFIX.match(token)
+        if unit:
+            token = unit.group(1)
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def is_identifier(token):
+    # Tokens like "13700k", "3080" or "970" pin down a specific model. Capacities such as
+    # "16gb" are shared by many models, so they only count towards the score.
+    return len(token) >= 3 and any(c.isdigit() for c in token) and not CAPACITY.match(token)
+
+
+def is_suffix(token):
+    return token in SUFFIX_TOKENS or VERSION.match(token) is not None
+
+
+def trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def compact(name):
+    # Part numbers compare on letters and digits only
+    return ''.join(TOKEN.findall(name.lower()))
+
+
+class RowNorms(dict):
+    # Token tuple -> sum of its token weights, filled in on first use after weights change
+    def __init__(self, weights):
+        super().__init__()
+        self.weights = weights
+
+    def __missing__(self, tokens):
+        norm = self[tokens] = sum(self.weights[t] for t in tokens)
+        return norm
+
+
+class RowSuffixes(dict):
+    # Token tuple -> frozenset of its variant suffixes, filled in on first use
+    def __missing__(self, tokens):
+        suffixes = self[tokens] = frozenset(t for t in tokens if is_suffix(t))
+        return suffixes
+
+
+class ModelMatcher:
+    def __init__(self, table, cache_size=4096):
+        self.table = table
+        self.version = getattr(table, 'version', 0)
+        self.postings = {}      # Token -> list of row indices
+        self.row_tokens = []    # Row index -> tuple of tokens
+        self.alias_tokens = {}  # Row index -> tuples of tokens of names collapsed into the row
+        self.part_numbers = {}  # Compacted part number -> first row index
+        self.brand_tokens = set()   # Tokens of brand names, which alone identify no model
+        self.row_suffixes = RowSuffixes()
+        self._trigrams = None   # Trigram -> vocabulary tokens, built on first fuzzy lookup
+        self._vocabulary = None # Sorted tokens, built on first prefix lookup
+        self._build()
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _build(self):
+        table = self.table
+        strings = table.strings
+        model_codes = table.codes['model']
+        brand_codes = table.codes['brand']
+        part_codes = table.codes['part_number']
+        tokens_by_name = {}  # Rows share model and brand strings, so tokenize each pair once
+        postings = self.postings
+        for code in set(brand_codes):
+            self.brand_tokens.update(tokenize(strings[code]))
+        for index in range(len(table)):
+            key = (model_codes[index], brand_codes[index])
+            tokens = tokens_by_name.get(key)
+            if tokens is None:
+                tokens = tuple(tokenize(f'{strings[key[1]]} {strings[key[0]]}'))
+                tokens_by_name[key] = tokens
+            self.row_tokens.append(tokens)
+            for token in tokens:
+                postings.setdefault(token, []).append(index)
+            part_number = compact(strings[part_codes[index]])
+            if len(part_number) >= 4:
+                self.part_numbers.setdefault(part_number, index)
+        for index in getattr(table, 'aliases', {}):
+            self._add_aliases(index)
+
+        # Weights keep this row count after incremental updates, until the next full build
+        self.rows = rows = len(table)
+        self.weights = {token: math.log(1 + rows / len(indices)) for token, indices in postings.items()}
+        self.row_norms = RowNorms(self.weights)
+        self.row_norms.update((tokens, sum(self.weights[t] for t in tokens)) for tokens in tokens_by_name.values())
+
+    def _add_aliases(self, index):
+        # Index the part numbers and names collapsed into a row, so they still find it
+        variants = []
+        for part_number, brand, model in self.table.aliases.get(index, ()):
+            tokens = tuple(tokenize(f'{brand} {model}'))
+            if tokens and tokens != self.row_tokens[index] and tokens not in variants:
+                variants.append(tokens)
+            part_number = compact(part_number)
+            if len(part_number) >= 4:
+                self.part_numbers.setdefault(part_number, index)
+        if variants:
+            self.alias_tokens[index] = tuple(variants)
+            known = set(self.row_tokens[index])
+            for tokens in variants:
+                for token in tokens:
+                    if token not in known:
+                        known.add(token)
+                        self.postings.setdefault(token, []).append(index)
+
+    def _row_vocabulary(self, index):
+        tokens = set(self.row_tokens[index])
+        for variant in self.alias_tokens.get(index, ()):
+            tokens.update(variant)
+        return tokens
+
+    def _row_part_numbers(self, index):
+        table = self.table
+        part_numbers = [compact(table.string_at('part_number', index))]
+        part_numbers.extend(compact(part_number) for part_number, _, _ in table.aliases.get(index, ()))
+        return part_numbers
+
+    def remove_row(self, index):
+        # Take a row out of the index before its names change or it is deleted.
+        # Returns the tokens whose postings changed, for refresh().
+        tokens = self._row_vocabulary(index)
+        for token in tokens:
+            self.postings[token].remove(index)
+        for part_number in self._row_part_numbers(index):
+            if self.part_numbers.get(part_number) == index:
+                del self.part_numbers[part_number]
+        self.row_tokens[index] = ()
+        self.alias_tokens.pop(index, None)
+        return tokens
+
+    def add_row(self, index):
+        # Index a new or changed row; returns the tokens whose postings changed, for refresh()
+        table = self.table
+        brand = table.string_at('brand', index)
+        self.brand_tokens.update(tokenize(brand))
+        tokens = tuple(tokenize(f"{brand} {table.string_at('model', index)}"))
+        if index == len(self.row_tokens):
+            self.row_tokens.append(tokens)
+        else:
+            self.row_tokens[index] = tokens
+        for token in tokens:
+            self.postings.setdefault(token, []).append(index)
+        part_number = compact(table.string_at('part_number', index))
+        if len(part_number) >= 4:
+            self.part_numbers.setdefault(part_number, index)
+        self._add_aliases(index)
+        return self._row_vocabulary(index)
+
+    def truncate(self, rows):
+        # Drop trailing rows that were removed with remove_row()
+        del self.row_tokens[rows:]
+
+    def refresh(self, tokens, version):
+        # Bring weights of changed tokens up to date after add_row()/remove_row(),
+        # and forget cached matches
+        for token in tokens:
+            indices = self.postings.get(token)
+            if indices:
+                self.weights[token] = math.log(1 + self.rows / len(indices))
+                if self._trigrams is not None and len(token) >= 3 and token not in self._vocabulary_trigrams:
+                    self._vocabulary_trigrams.add(token)
+                    for gram in trigrams(token):
+                        self._trigrams.setdefault(gram, []).append(token)
+            else:
+                self.postings.pop(token, None)
+                self.weights.pop(token, None)
+        self.row_norms.clear()
+        self.match.cache_clear()
+        self._vocabulary = None
+        self.version = version
+
+    def prefix_rows(self, prefix):
+        # Rows having a token (of their own name or an alias) that starts with prefix,
+        # for search-as-you-type where the last word is still being typed
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        rows = set()
+        for position in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            token = vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            rows.update(self.postings[token])
+        return rows
+
+    def _fuzzy_token(self, token):
+        # Closest vocabulary token by trigram similarity, or (None, 0.0)
+        if len(token) < 3:
+            return None, 0.0
+        if self._trigrams is None:
+            self._trigrams = {}
+            self._vocabulary_trigrams = set()
+            for vocab_token in self.postings:
+                if len(vocab_token) >= 3:
+                    self._vocabulary_trigrams.add(vocab_token)
+                    for gram in trigrams(vocab_token):
+                        self._trigrams.setdefault(gram, []).append(vocab_token)
+        query_grams = trigrams(token)
+        overlap = {}
+        for gram in query_grams:
+            for vocab_token in self._trigrams.get(gram, ()):
+                overlap[vocab_token] = overlap.get(vocab_token, 0) + 1
+        weights = self.weights
+        best, best_similarity = None, 0.0
+        for vocab_token, shared in overlap.items():
+            if vocab_token not in weights:
+                continue  # Only left in the trigram index by removed rows
+            similarity = shared / (len(query_grams) + len(trigrams(vocab_token)) - shared)
+            if similarity > best_similarity:
+                best, best_similarity = vocab_token, similarity
+        if best_similarity < FUZZY_MIN_SIMILARITY:
+            return None, 0.0
+        return best, best_similarity
+
+    def _query_weights(self, tokens):
+        # Map query tokens to vocabulary tokens with a weight each.
+        # Returns ({vocab token: weight}, set of identifier vocab tokens, whether the query has
+        # identifiers, frozenset of variant suffixes). Suffixes count even when no row has them,
+        # so "v4" still rules out "v2".
+        weights = {}
+        identifiers = set()
+        has_identifier = False
+        suffixes = {token for token in tokens if is_suffix(token)}
+        for token in tokens:
+            identifier = is_identifier(token)
+            has_identifier = has_identifier or identifier
+            if token in self.weights:
+                resolved = [(token, 1.0)]
+            else:
+                parts = [part for part in ALPHA_DIGIT.findall(token) if part in self.weights]
+                if len(parts) > 1:
+                    resolved = [(part, 1.0) for part in parts]
+                elif identifier:
+                    resolved = []
+                else:
+                    vocab_token, similarity = self._fuzzy_token(token)
+                    resolved = [(vocab_token, similarity)] if vocab_token else []
+            for vocab_token, similarity in resolved:
+                weight = self.weights[vocab_token] * similarity
+                if weight > weights.get(vocab_token, 0.0):
+                    weights[vocab_token] = weight
+                if identifier and is_identifier(vocab_token):
+                    identifiers.add(vocab_token)
+                if is_suffix(vocab_token):
+                    suffixes.add(vocab_token)
+        return weights, identifiers, has_identifier, frozenset(suffixes)
+
+    def _has_tokens(self, index, tokens):
+        # Whether a row's own name or one collapsed into it holds every token
+        row_tokens = self.row_tokens[index]
+        if all(token in row_tokens for token in tokens):
+            return True
+        return any(all(token in names for token in tokens) for names in self.alias_tokens.get(index, ()))
+
+    def _candidates(self, weights, identifiers):
+        # Rows worth scoring: those holding every identifier, found by filtering the rarest
+        # identifier's rows, or without identifiers the rows of the rarest tokens, adding
+        # posting lists only while they fit within CANDIDATE_LIMIT
+        postings = self.postings
+        if identifiers:
+            rarest, *others = sorted(identifiers, key=lambda t: len(postings[t]))
+            if not others:
+                return postings[rarest]
+            return [index for index in postings[rarest] if self._has_tokens(index, others)]
+        candidates = set()
+        for token in sorted(weights, key=lambda t: len(postings[t])):
+            indices = postings[token]
+            if len(candidates) + len(indices) > CANDIDATE_LIMIT:
+                break
+            candidates.update(indices)
+        return candidates
+
+    def search(self, name, limit=5):
+        # Rank rows against a raw name; returns a list of (score, row index), best first
+        if not isinstance(name, str) or not name.strip():
+            return []
+        # A part number, whole or as one token of the name, identifies the row outright
+        tokens = tokenize(name)
+        for part_number in [compact(name)] + [t for t in tokens if len(t) >= 5 and is_identifier(t)]:
+            index = self.part_numbers.get(part_number)
+            if index is not None:
+                return [(1.0, index)]
+
+        weights, identifiers, has_identifier, suffixes = self._query_weights(tokens)
+        if not any(len(token) >= 3 for token in weights):
+            # Only short fragments such as "3" or "i7" matched, which identify nothing
+            return []
+        if has_identifier and not identifiers:
+            # The model number is in no row, so any match would be another model
+            return []
+        query_norm = sum(weights.values())
+        candidates = self._candidates(weights, identifiers)
+        instrumentation.count('match.rows_scanned', len(candidates))
+
+        samples = self.table.samples
+        row_tokens = self.row_tokens
+        alias_tokens = self.alias_tokens
+        ranked = []
+        for index in candidates:
+            if alias_tokens and index in alias_tokens:
+                # A row scores as its best matching name, its own or one collapsed into it
+                score = max(self._score(tokens, weights, identifiers, suffixes, query_norm)
+                            for tokens in (row_tokens[index],) + alias_tokens[index])
+            else:
+                score = self._score(row_tokens[index], weights, identifiers, suffixes, query_norm)
+            if score >= MIN_SCORE:
+                # Ties go to the more widely sampled, then the earlier (better ranked) row
+                ranked.append((-score, -samples[index], index))
+        ranked.sort()
+        return [(-score, index) for score, _, index in ranked[:limit]]
+
+    def _score(self, tokens, weights, identifiers, suffixes, query_norm):
+        # Cosine score of one name of a row, or 0.0 when it lacks an identifier, differs in
+        # variant suffixes or shares nothing with the query but the brand
+        if self.row_suffixes[tokens] != suffixes:
+            return 0.0
+        matched = 0.0
+        model_matched = False
+        brand_tokens = self.brand_tokens
+        for token in tokens:
+            weight = weights.get(token)
+            if weight:
+                matched += weight
+                model_matched = model_matched or token not in brand_tokens
+        if not model_matched or not all(token in tokens for token in identifiers):
+            return 0.0
+        return matched / math.sqrt(query_norm * self.row_norms[tokens])
+
+    def _match(self, name):
+        # Only runs on a miss of the match cache, so lookups minus searches are cache hits
+        instrumentation.count('match.searches')
+        results = self.search(name, limit=1)
+        return results[0][1] if results else None
@@ -0,0 +1,256 @@
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from analysis_engine import BENCHMARK_DIR, BENCHMARK_FILES, AnalysisEngine
+from benchmark_cache import load_cached_table
+from benchmark_browser import BrowserModel
+from benchmark_store import CSV_COLUMNS, ScoreIndex, load_benchmark_table
+
+# Performance regression suite for the analyzer's own hot paths.
+#
+# Times CSV loading, name lookups and recommendation queries against the bundled
+# tables and against synthetic tables of 100k to 1M rows, reporting wall time,
+# peak traced memory and operations per second. Results can be saved as a
+# baseline and later runs compared against it, failing on regressions.
+
+DEFAULT_SIZES = (100000, 1000000)
+DEFAULT_BASELINE = 'perf_baseline.json'
+DEFAULT_TOLERANCE = 0.25    # Allowed slowdown (or memory growth) before a case counts as a regression
+
+# Names real probes report, used for lookups against the bundled tables
+SAMPLE_SYSTEM = {
+    'cpu': "13th Gen Intel(R) Core(TM) i7-13700K",
+    'gpu': "NVIDIA GeForce RTX 3080",
+    'ram': "Corsair DDR4 3200MHz",
+    'cpu_usage': 45.0,
+    'memory_usage': 65.0,
+    'disk': 70.0,
+}
+SAMPLE_LOOKUPS = [
+    ('cpu_data', "13th Gen Intel(R) Core(TM) i7-13700K"),
+    ('cpu_data', "AMD Ryzen 7 5800X 8-Core Processor"),
+    ('cpu_data', "Intel(R) Core(TM) i5-8400 CPU @ 2.80GHz"),
+    ('gpu_data', "NVIDIA GeForce RTX 3080"),
+    ('gpu_data', "AMD Radeon RX 6800 XT"),
+    ('ram_data', "Corsair DDR4 3200MHz"),
+    ('ssd_data', "Samsung SSD 970 EVO Plus 1TB"),
+    ('cpu_data', "Generic CPU"),
+]
+
+SYNTHETIC_BRANDS = ['Intel', 'AMD', 'Nvidia', 'Samsung', 'Crucial', 'Kingston', 'Corsair', 'WD', 'Seagate', 'Asus']
+SYNTHETIC_SERIES = ['Core', 'Ryzen', 'RTX', 'RX', 'Evo', 'Pro', 'Vengeance', 'Blue', 'Barracuda', 'Strix']
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    # A UserBenchmark-shaped table: descending scores, ascending ranks, a few part numbers per model
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+        score = 1000.0
+        rank = 0
+        row = 0
+        model_number = 0
+        while row < rows:
+            model_number += 1
+            brand = rng.choice(SYNTHETIC_BRANDS)
+            model = f"{rng.choice(SYNTHETIC_SERIES)} {model_number}{rng.choice(['', 'X', 'K', 'Ti', 'S'])} {rng.choice([8, 16, 32, 64])}GB"
+            url = f"https://example.com/{brand}-{model_number}/Rating/{model_number}"
+            rank += 1
+            score = max(0.1, score - rng.random() * 2000.0 / rows)
+            samples = rng.randint(1, 100000)
+            for variant in range(min(rng.randint(1, 3), rows - row)):
+                writer.writerow(['SYN', f"P{model_number:07d}-{variant}", brand, model, rank, f"{score:.1f}", samples, url])
+                row += 1
+    return path
+
+
+def measure(function, repeat=3, number=1):
+    # Median wall time of `number` calls, over `repeat` runs, plus peak traced memory of one call
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            result = function()
+        times.append((time.perf_counter() - start) / number)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak, result
+
+
+def run_case(results, name, function, operations=1, repeat=3, number=1):
+    seconds, peak, value = measure(function, repeat, number)
+    results[name] = {
+        'seconds': seconds,
+        'peak_bytes': peak,
+        'ops_per_second': operations / seconds if seconds > 0 else None,
+    }
+    print(f"{name:55} {seconds * 1000:10.2f} ms {peak / 2**20:9.1f} MiB"
+          + (f" {operations / seconds:12,.0f} ops/s" if operations > 1 and seconds > 0 else ""))
+    return value
+
+
+def run_lookup_cases(results, prefix, engine, lookups, system_info):
+    tables = engine.tables
+    indexed = sorted({attr for attr, _ in lookups})
+
+    def build_name_index():
+        # Drop the matchers first, so both the timed run and the memory-traced run build them
+        for attr in indexed:
+            tables[attr]._matcher = None
+        return [tables[attr].matcher for attr in indexed]
+
+    # Uncached lookups search the name index; cached lookups hit the resolved-name cache
+    run_case(results, f"{prefix}/build name index", build_name_index, repeat=1)
+    run_case(results, f"{prefix}/get_benchmark_score (uncached)",
+             lambda: [tables[attr].matcher._match(name) for attr, name in lookups], operations=len(lookups), number=20)
+    run_case(results, f"{prefix}/get_benchmark_score (cached)",
+             lambda: [engine.get_benchmark_score(tables[attr], name) for attr, name in lookups], operations=len(lookups), number=200)
+    run_case(results, f"{prefix}/get_component_rank (cached)",
+             lambda: [engine.get_component_rank(tables[attr], name) for attr, name in lookups], operations=len(lookups), number=200)
+
+    # Recommendations are kept in the engine's result cache; the uncached cases clear it first
+    def recommendations(clear):
+        if clear:
+            engine.results.clear()
+        return [engine.get_recommendation(system_info, component) for component in ('CPU', 'GPU', 'RAM', 'SSD')]
+
+    def general_recommendations(clear):
+        if clear:
+            engine.results.clear()
+        return engine.generate_general_recommendations(system_info)
+
+    run_case(results, f"{prefix}/get_recommendation (uncached)", lambda: recommendations(True), operations=4, number=50)
+    run_case(results, f"{prefix}/get_recommendation (cached)", lambda: recommendations(False), operations=4, number=50)
+    run_case(results, f"{prefix}/generate_general_recommendations (uncached)", lambda: general_recommendations(True), number=50)
+    run_case(results, f"{prefix}/generate_general_recommendations (cached)", lambda: general_recommendations(False), number=50)
+
+
+def run_browser_cases(results, prefix, table, name):
+    # Search-as-you-type: one search per keystroke of a name, then re-sorting the matches
+    keystrokes = [name[:length] for length in range(1, len(name) + 1)]
+    model = run_case(results, f"{prefix}/browser open", lambda: BrowserModel(table), repeat=1)
+
+    def type_name():
+        for query in keystrokes:
+            model.search(query)
+        model.search('')
+
+    run_case(results, f"{prefix}/browser search per keystroke", type_name, operations=len(keystrokes) + 1, number=5)
+    model.search(name.split()[0])
+    run_case(results, f"{prefix}/browser sort matches", lambda: [model.sort(column) for column in ('samples', 'benchmark', 'rank')],
+             operations=3, number=20)
+
+
+def run_bundled(results, benchmark_dir):
+    paths = [os.path.join(benchmark_dir, filename) for filename in BENCHMARK_FILES.values()]
+    rows = sum(len(table) for table in run_case(results, "bundled/load_csv (parse)", lambda: [load_benchmark_table(path) for path in paths]))
+    print(f"{'':55} ({rows} rows)")
+    [load_cached_table(path) for path in paths]  # Make sure the compiled cache exists
+    run_case(results, "bundled/load_csv (compiled cache)", lambda: [load_cached_table(path) for path in paths])
+    engine = AnalysisEngine.load(benchmark_dir)
+    run_lookup_cases(results, "bundled", engine, SAMPLE_LOOKUPS, SAMPLE_SYSTEM)
+    run_browser_cases(results, "bundled", engine.cpu_data, "Ryzen 7 5800X")
+
+
+def run_synthetic(results, rows, workdir):
+    prefix = f"synthetic-{rows}"
+    path = write_synthetic_csv(os.path.join(workdir, f'SYN_{rows}.csv'), rows)
+    table = run_case(results, f"{prefix}/load_csv (parse)", lambda: load_benchmark_table(path), repeat=1)
+    load_cached_table(path)
+    run_case(results, f"{prefix}/load_csv (compiled cache)", lambda: load_cached_table(path))
+    engine = AnalysisEngine({attr: table for attr in BENCHMARK_FILES})
+    middle = table[len(table) // 2]
+    lookups = [('cpu_data', f"{middle.brand} {middle.model}"), ('cpu_data', table[-1].model), ('cpu_data', "Generic CPU")]
+    system_info = dict(SAMPLE_SYSTEM, cpu=middle.model, gpu=table[-1].model, ram=table[len(table) // 4].model)
+    run_case(results, f"{prefix}/build score index", lambda: ScoreIndex(table), repeat=1)
+    run_lookup_cases(results, prefix, engine, lookups, system_info)
+    run_browser_cases(results, prefix, table, f"{middle.brand} {middle.model}")
+
+
+def compare(results, baseline, tolerance):
+    # Cases whose time or peak memory grew beyond the tolerance; returns a list of messages
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            old, new = previous.get(metric), current.get(metric)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {old:.6g} -> {new:.6g} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer's hot paths and detect regressions.")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated synthetic table sizes, or 0 to skip synthetic tables")
+    parser.add_argument('--benchmarks', default=BENCHMARK_DIR, help="directory containing the bundled benchmark CSV files")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline file to compare against or save to")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown, e.g. 0.25")
+    parser.add_argument('--output', help="also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    run_bundled(results, args.benchmarks)
+    sizes = [int(size) for size in args.sizes.split(',') if int(size) > 0]
+    if sizes:
+        workdir = tempfile.mkdtemp(prefix='bottleneck-perf-')
+        try:
+            for rows in sizes:
+                run_synthetic(results, rows, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)['results']
+    except (OSError, ValueError, KeyError):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        return 1
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
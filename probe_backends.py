@@ -0,0 +1,442 @@
+import argparse
+import contextvars
+import glob
+import json
+import os
+import platform
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+import storage_probe
+
+# Hardware identity probes behind a common backend interface.
+#
+# A backend answers the static probes (cpu, ram, gpu, storage), each returning a
+# dict of system_info entries. The WMI backend serves Windows; the Linux backend
+# reads the kernel's own views of the hardware (/proc/cpuinfo, memory blocks in
+# sysfs, SMBIOS memory device records and PCI ids) without spawning anything,
+# so all of its probes finish in milliseconds; the fixture backend replays
+# results recorded from a real machine, for tests and for analyzing another
+# machine's hardware. The wmi and cpuinfo packages are only imported by the
+# backend that uses them.
+
+STATIC_PROBE_NAMES = ('cpu', 'ram', 'gpu', 'storage')
+PROBE_TIMEOUT = 10.0  # Seconds a probe may take before its default value is used instead
+
+# Values used when a static probe fails or times out
+STATIC_DEFAULTS = {
+    'cpu': {'cpu': "Unknown CPU"},
+    'ram': {'ram': "Unknown RAM"},
+    'gpu': {'gpu': "Unknown GPU", 'gpu_usage': "N/A"},
+    'storage': {'storage': []},
+}
+
+# Environment variable naming a fixture JSON file to use instead of probing this machine
+FIXTURE_ENV = 'BOTTLENECK_PROBE_FIXTURE'
+
+PROC_CPUINFO = '/proc/cpuinfo'
+PROC_MEMINFO = '/proc/meminfo'
+SYS_MEMORY = '/sys/devices/system/memory'
+DMI_ENTRIES = '/sys/firmware/dmi/entries'
+PCI_DEVICES = '/sys/bus/pci/devices'
+PCI_IDS_PATHS = ('/usr/share/hwdata/pci.ids', '/usr/share/misc/pci.ids', '/usr/share/pci.ids')
+
+# SMBIOS memory type codes (type 17, offset 0x12)
+MEMORY_TYPES = {
+    0x12: 'DDR', 0x13: 'DDR2', 0x18: 'DDR3', 0x1A: 'DDR4', 0x1B: 'LPDDR', 0x1C: 'LPDDR2',
+    0x1D: 'LPDDR3', 0x1E: 'LPDDR4', 0x22: 'DDR5', 0x23: 'LPDDR5',
+}
+
+# Short brand names for GPU vendors, in order of preference when several display devices are present
+GPU_VENDORS = {'10de': 'NVIDIA', '1002': 'AMD', '8086': 'Intel'}
+
+
+class ProbeBackend:
+    # Interface of the hardware probes; each method returns a dict of system_info entries
+    name = 'base'
+
+    def cpu(self):
+        return {'cpu': platform.processor() or "Unknown CPU"}
+
+    def ram(self):
+        return {'ram': "Unknown RAM"}
+
+    def gpu(self):
+        return {'gpu': "Unknown GPU", 'gpu_usage': "N/A"}
+
+    def storage(self):
+        return {'storage': []}
+
+    def probes(self):
+        # {probe name: callable} for the static probes
+        return {name: getattr(self, name) for name in STATIC_PROBE_NAMES}
+
+
+@contextmanager
+def wmi_connection():
+    # WMI is COM-based, so each worker thread needs COM initialized before connecting
+    import wmi
+    try:
+        import pythoncom
+    except ImportError:
+        pythoncom = None
+    if pythoncom is not None:
+        pythoncom.CoInitialize()
+    try:
+        yield wmi.WMI()
+    finally:
+        if pythoncom is not None:
+            pythoncom.CoUninitialize()
+
+
+class WmiBackend(ProbeBackend):
+    name = 'wmi'
+
+    def cpu(self):
+        # Win32_Processor already names the CPU; cpuinfo, which is much slower, is only a fallback
+        with wmi_connection() as c:
+            processors = c.Win32_Processor()
+            if processors and (processors[0].Name or '').strip():
+                return {'cpu': processors[0].Name.strip()}
+        import cpuinfo
+        return {'cpu': cpuinfo.get_cpu_info()['brand_raw']}
+
+    def ram(self):
+        with wmi_connection() as c:
+            ram_modules = c.Win32_PhysicalMemory()
+            if ram_modules:
+                ram_speed = ram_modules[0].Speed
+                ram_type = ram_modules[0].MemoryType
+                ram_manufacturer = ram_modules[0].Manufacturer
+                ram_type_name = "DDR4" if ram_type == 26 else "DDR5" if ram_type == 30 else f"Type {ram_type}"
+                total = sum(int(module.Capacity or 0) for module in ram_modules)
+                return {'ram': f"{ram_manufacturer} {ram_type_name} {ram_speed}MHz", 'ram_total': total}
+        return {'ram': "Unknown RAM"}
+
+    def gpu(self):
+        with wmi_connection() as c:
+            gpu_info = c.Win32_VideoController()[0]
+            return {'gpu': gpu_info.Name, 'gpu_usage': "N/A"}
+
+    def storage(self):
+        with wmi_connection() as c:
+            return {'storage': storage_probe.list_devices(c)}
+
+
+def _read(path, default=''):
+    try:
+        with open(path, 'r') as file:
+            return file.read().strip()
+    except OSError:
+        return default
+
+
+def read_cpu_name(cpuinfo_path=PROC_CPUINFO):
+    # Model name of the first processor in /proc/cpuinfo, or None.
+    # Reading stops at the first "model name"; ARM kernels name the CPU in "Model" or "Hardware" instead.
+    fallbacks = {}
+    try:
+        with open(cpuinfo_path, 'r') as file:
+            for line in file:
+                key, _, value = line.partition(':')
+                key = key.strip()
+                if key == 'model name':
+                    return value.strip()
+                if key in ('Model', 'cpu model', 'Hardware'):
+                    fallbacks.setdefault(key, value.strip())
+    except OSError:
+        return None
+    for key in ('Model', 'cpu model', 'Hardware'):
+        if fallbacks.get(key):
+            return fallbacks[key]
+    return None
+
+
+def memory_total(sys_memory=SYS_MEMORY, meminfo_path=PROC_MEMINFO):
+    # Installed memory in bytes: online hotplug blocks times the block size, which unlike
+    # MemTotal includes memory reserved by the kernel. Falls back to MemTotal, or 0.
+    try:
+        block_size = int(_read(os.path.join(sys_memory, 'block_size_bytes')), 16)
+        blocks = [name for name in os.listdir(sys_memory) if name.startswith('memory') and name[6:].isdigit()]
+    except (OSError, ValueError):
+        blocks = []
+    online = sum(1 for name in blocks if _read(os.path.join(sys_memory, name, 'online'), '1') == '1')
+    if online:
+        return online * block_size
+    for line in _read(meminfo_path).splitlines():
+        if line.startswith('MemTotal:'):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def parse_memory_device(raw):
+    # Decode one SMBIOS type 17 (memory device) record into a dict, or None for an empty slot
+    if len(raw) < 0x15 or raw[0] != 17:
+        return None
+    length = raw[1]
+
+    def byte(offset):
+        return raw[offset] if offset < length else 0
+
+    def word(offset):
+        return struct.unpack_from('<H', raw, offset)[0] if offset + 2 <= length else 0
+
+    size = word(0x0C)
+    if size == 0:
+        return None  # No module installed
+    if size == 0x7FFF and length >= 0x20:
+        size_bytes = struct.unpack_from('<I', raw, 0x1C)[0] * 2**20
+    elif size == 0xFFFF:
+        size_bytes = 0
+    else:
+        size_bytes = (size & 0x7FFF) * (2**10 if size & 0x8000 else 2**20)
+
+    strings = raw[length:].split(b'\0')
+
+    def string(offset):
+        index = byte(offset)
+        if 0 < index <= len(strings):
+            return strings[index - 1].decode('ascii', 'replace').strip()
+        return ''
+
+    speed = word(0x15) or word(0x20)
+    if speed == 0xFFFF and length >= 0x58:
+        speed = struct.unpack_from('<I', raw, 0x54)[0]
+    memory_type = byte(0x12)
+    return {
+        'size_bytes': size_bytes,
+        'type': MEMORY_TYPES.get(memory_type, f"Type {memory_type}"),
+        'speed': speed,
+        'manufacturer': string(0x17),
+        'part_number': string(0x1A),
+    }
+
+
+def read_memory_devices(dmi_entries=DMI_ENTRIES):
+    # Populated memory slots from the kernel's SMBIOS entries; [] when they are missing or, as
+    # for users other than root, unreadable
+    devices = []
+    for path in sorted(glob.glob(os.path.join(dmi_entries, '17-*', 'raw'))):
+        try:
+            with open(path, 'rb') as file:
+                device = parse_memory_device(file.read())
+        except OSError:
+            return []
+        if device is not None:
+            devices.append(device)
+    return devices
+
+
+def list_display_devices(pci_devices=PCI_DEVICES):
+    # (vendor id, device id) of each PCI display controller, e.g. ('10de', '2206')
+    devices = []
+    try:
+        slots = sorted(os.listdir(pci_devices))
+    except OSError:
+        return devices
+    for slot in slots:
+        base = os.path.join(pci_devices, slot)
+        if not _read(os.path.join(base, 'class')).startswith('0x03'):
+            continue
+        vendor = _read(os.path.join(base, 'vendor'))[2:].lower()
+        device = _read(os.path.join(base, 'device'))[2:].lower()
+        if vendor and device:
+            devices.append((vendor, device))
+    return devices
+
+
+def pci_names(vendor, device, paths=PCI_IDS_PATHS):
+    # (vendor name, device name) from the first pci.ids database found, or None.
+    # The file is scanned line by line and only up to the end of the vendor's section.
+    for path in paths:
+        try:
+            file = open(path, 'r', encoding='utf-8', errors='replace')
+        except OSError:
+            continue
+        with file:
+            vendor_name = None
+            for line in file:
+                if vendor_name is None:
+                    if line.startswith(vendor) and line[4:6] == '  ':
+                        vendor_name = line[6:].strip()
+                elif not line.startswith('\t'):
+                    if line.strip() and not line.startswith('#'):
+                        break  # Next vendor
+                elif line.startswith(f'\t{device}  '):
+                    return vendor_name, line[len(device) + 3:].strip()
+            if vendor_name is not None:
+                return vendor_name, None
+        return None
+    return None
+
+
+def gpu_name(vendor, device, paths=PCI_IDS_PATHS):
+    # Marketing name of a GPU in the style of Windows, e.g. "NVIDIA GeForce RTX 3080" for 10de:2206.
+    # pci.ids puts the marketing name in brackets after the chip name ("GA102 [GeForce RTX 3080]").
+    names = pci_names(vendor, device, paths)
+    brand = GPU_VENDORS.get(vendor)
+    if names is None:
+        return f"{brand or 'PCI'} {vendor}:{device}"
+    vendor_name, device_name = names
+    if device_name is None:
+        return f"{brand or vendor_name} {vendor}:{device}"
+    if '[' in device_name and device_name.endswith(']'):
+        device_name = device_name[device_name.index('[') + 1:-1]
+    return f"{brand or vendor_name} {device_name}"
+
+
+class LinuxBackend(ProbeBackend):
+    name = 'linux'
+
+    def cpu(self):
+        return {'cpu': read_cpu_name() or platform.processor() or "Unknown CPU"}
+
+    def ram(self):
+        # The first populated slot names the memory, as on Windows; the total is that of all slots when
+        # SMBIOS lists their sizes
+        devices = read_memory_devices()
+        total = sum(device['size_bytes'] for device in devices) or memory_total()
+        if not devices:
+            return {'ram': "Unknown RAM", 'ram_total': total}
+        first = devices[0]
+        name = " ".join(part for part in (first['manufacturer'], first['type'], f"{first['speed']}MHz") if part)
+        return {'ram': name, 'ram_total': total}
+
+    def gpu(self):
+        # Discrete GPU vendors are preferred over integrated graphics
+        devices = list_display_devices()
+        if not devices:
+            return {'gpu': "Unknown GPU", 'gpu_usage': "N/A"}
+        order = list(GPU_VENDORS)
+        vendor, device = min(devices, key=lambda ids: order.index(ids[0]) if ids[0] in order else len(order))
+        return {'gpu': gpu_name(vendor, device), 'gpu_usage': "N/A"}
+
+    def storage(self):
+        return {'storage': storage_probe.list_devices()}
+
+
+class FixtureBackend(ProbeBackend):
+    # Replays recorded probe results: {probe name: system_info entries}. A probe missing from the
+    # fixture raises KeyError, as a failing probe would; delays (seconds per probe) simulate slow hardware.
+    name = 'fixture'
+
+    def __init__(self, results, delays=None):
+        self.results = results
+        self.delays = delays or {}
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r') as file:
+            data = json.load(file)
+        return cls(data.get('probes', data), data.get('delays'))
+
+    def replay(self, name):
+        if self.delays.get(name):
+            time.sleep(self.delays[name])
+        return dict(self.results[name])
+
+    def cpu(self):
+        return self.replay('cpu')
+
+    def ram(self):
+        return self.replay('ram')
+
+    def gpu(self):
+        return self.replay('gpu')
+
+    def storage(self):
+        return self.replay('storage')
+
+
+BACKENDS = {'wmi': WmiBackend, 'linux': LinuxBackend}
+
+
+def default_backend():
+    # The fixture named by BOTTLENECK_PROBE_FIXTURE, else the backend for this operating system
+    fixture = os.environ.get(FIXTURE_ENV)
+    if fixture:
+        return FixtureBackend.load(fixture)
+    if platform.system() == "Windows":
+        return WmiBackend()
+    return LinuxBackend()
+
+
+def run_probes(probes, executor=None, timeout=PROBE_TIMEOUT, timeouts=None, defaults=None):
+    # Run {name: probe} concurrently. Returns ({name: result}, {name: error}) where a probe that
+    # raised or ran past its timeout has an error, and a copy of its entry in defaults as its
+    # result when it has one; a timed out probe is left running in the background. timeouts
+    # overrides the timeout for individual probes. Probes run in a copy of the caller's context,
+    # so their instrumentation spans join the caller's run.
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix="probe")
+    timeouts = timeouts or {}
+    try:
+        start = time.monotonic()
+        futures = {name: executor.submit(contextvars.copy_context().run, probe) for name, probe in probes.items()}
+        results, errors = {}, {}
+        for name, future in futures.items():
+            remaining = start + timeouts.get(name, timeout) - time.monotonic()
+            try:
+                results[name] = future.result(timeout=max(0.0, remaining))
+            except FutureTimeout:
+                errors[name] = TimeoutError(f"{name} probe timed out")
+            except Exception as e:
+                errors[name] = e
+            if name in errors and defaults and name in defaults:
+                results[name] = dict(defaults[name])
+        return results, errors
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Identify this machine's CPU, RAM, GPU and storage.")
+    parser.add_argument('--backend', choices=['auto', 'fixture'] + list(BACKENDS), default='auto')
+    parser.add_argument('--fixture', help=f"fixture JSON file to replay (default: ${FIXTURE_ENV})")
+    parser.add_argument('--record', help="write the probe results to this fixture JSON file")
+    parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT, help="seconds allowed per probe")
+    args = parser.parse_args(argv)
+
+    if args.backend == 'fixture' or args.fixture:
+        backend = FixtureBackend.load(args.fixture or os.environ[FIXTURE_ENV])
+    elif args.backend == 'auto':
+        backend = default_backend()
+    else:
+        backend = BACKENDS[args.backend]()
+
+    timings = {}
+
+    def timed(name, probe):
+        def run():
+            start = time.perf_counter()
+            try:
+                return probe()
+            finally:
+                timings[name] = (time.perf_counter() - start) * 1000
+        return run
+
+    start = time.perf_counter()
+    results, errors = run_probes({name: timed(name, probe) for name, probe in backend.probes().items()},
+                                 timeout=args.timeout)
+    elapsed = (time.perf_counter() - start) * 1000
+    for name, error in errors.items():
+        print(f"Error getting {name} info: {error}", file=sys.stderr)
+    probe_times = ', '.join(f"{name} {ms:.1f} ms" for name, ms in sorted(timings.items()))
+    print(f"{backend.name} backend: {elapsed:.1f} ms ({probe_times})", file=sys.stderr)
+    if args.record:
+        with open(args.record, 'w') as file:
+            json.dump({'probes': results}, file, indent=2)
+    info = {}
+    for result in results.values():
+        info.update(result)
+    print(json.dumps(info, indent=2))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
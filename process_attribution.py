@@ -0,0 +1,134 @@
+import heapq
+import time
+
+# Attribution of resource usage to processes.
+#
+# Each sample walks the process table once with psutil.process_iter, asking only
+# for cheap fields (CPU times, memory, I/O counters, thread count). psutil hands
+# back the same Process objects between calls, and they are kept here keyed by
+# (pid, create_time), so a recycled pid never inherits another process's
+# counters and costly details such as the command line are only fetched for the
+# few processes that end up in a top list. Rates come from deltas against the
+# previous sample.
+
+PROCESS_ATTRS = ['pid', 'name', 'create_time', 'cpu_times', 'memory_info', 'io_counters', 'num_threads']
+
+# Resources that can be ranked, and the per-process field each is ranked by
+RESOURCES = {
+    'cpu': 'cpu_percent',            # Percent of one core over the interval
+    'memory': 'rss',                 # Resident memory in bytes
+    'memory_growth': 'rss_delta',    # Resident memory gained over the interval
+    'disk': 'io_bps',                # Bytes read and written per second
+    'threads': 'threads_delta',      # Threads started over the interval
+}
+DEFAULT_TOP = 5
+
+
+class ProcessSampler:
+    def __init__(self, psutil_module=None):
+        if psutil_module is None:
+            import psutil as psutil_module
+        self.psutil = psutil_module
+        self.handles = {}       # (pid, create_time) -> Process, for details of top processes
+        self.previous = {}      # (pid, create_time) -> (cpu seconds, I/O bytes, rss, threads)
+        self.previous_time = None
+        self.latest = []        # Per-process rows of the last sample
+        self.interval = 0.0
+        self.scan_seconds = 0.0
+
+    def sample(self):
+        # Walk the process table once; returns the per-process rows, or [] for the first sample
+        start = time.perf_counter()
+        now = time.monotonic()
+        elapsed = now - self.previous_time if self.previous_time is not None else None
+        handles = {}
+        current = {}
+        rows = []
+        for process in self.psutil.process_iter(PROCESS_ATTRS, ad_value=None):
+            info = process.info
+            key = (info['pid'], info['create_time'])
+            handles[key] = self.handles.get(key, process)
+            cpu_times = info['cpu_times']
+            cpu = cpu_times.user + cpu_times.system if cpu_times is not None else None
+            io = info['io_counters']
+            io_bytes = io.read_bytes + io.write_bytes if io is not None else None
+            rss = info['memory_info'].rss if info['memory_info'] is not None else None
+            threads = info['num_threads']
+            current[key] = (cpu, io_bytes, rss, threads)
+
+            before = self.previous.get(key)
+            if elapsed is None or before is None:
+                continue  # Rates need a previous reading of the same process
+            rows.append({
+                'pid': info['pid'],
+                'name': info['name'] or '',
+                'cpu_percent': (cpu - before[0]) / elapsed * 100.0 if cpu is not None and before[0] is not None else 0.0,
+                'rss': rss or 0,
+                'rss_delta': (rss - before[2]) if rss is not None and before[2] is not None else 0,
+                'io_bps': max(0, io_bytes - before[1]) / elapsed if io_bytes is not None and before[1] is not None else 0.0,
+                'num_threads': threads or 0,
+                'threads_delta': (threads - before[3]) if threads is not None and before[3] is not None else 0,
+                '_key': key,
+            })
+        # Processes that exited are dropped along with their handles
+        self.handles = handles
+        self.previous = current
+        self.previous_time = now
+        self.latest = rows
+        self.interval = elapsed or 0.0
+        self.scan_seconds = time.perf_counter() - start
+        return rows
+
+    def ready(self):
+        # Whether a sample has been taken, so the next one yields rates
+        return self.previous_time is not None
+
+    def top(self, resource, n=DEFAULT_TOP, details=False):
+        # The n processes of the last sample using the most of a resource, as JSON-friendly dicts.
+        # With details, the command line of each is looked up through its cached handle.
+        field = RESOURCES[resource]
+        ranked = heapq.nlargest(n, self.latest, key=lambda row: row[field])
+        results = []
+        for row in ranked:
+            if row[field] <= 0:
+                break
+            entry = {key: value for key, value in row.items() if key != '_key'}
+            if details:
+                entry['cmdline'] = self._cmdline(row['_key'])
+            results.append(entry)
+        return results
+
+    def _cmdline(self, key):
+        process = self.handles.get(key)
+        if process is None:
+            return None
+        try:
+            return ' '.join(process.cmdline())
+        except Exception:
+            return None  # Exited, or not ours to inspect
+
+    def attribution(self, resources=('cpu', 'memory', 'memory_growth', 'disk'), n=DEFAULT_TOP, details=False):
+        # Top processes for each resource, plus sample metadata, for system_info['processes']
+        result = {resource: self.top(resource, n, details) for resource in resources}
+        result['interval'] = self.interval
+        result['process_count'] = len(self.previous)
+        result['scan_seconds'] = self.scan_seconds
+        return result
+
+
+def describe_top(entries, resource, count=3):
+    # "chrome (45.2%), python (12.0%)" for the first few entries of one resource
+    parts = []
+    for entry in entries[:count]:
+        if resource == 'cpu':
+            value = f"{entry['cpu_percent']:.1f}% CPU"
+        elif resource == 'memory':
+            value = f"{entry['rss'] / 2**20:.0f} MiB"
+        elif resource == 'memory_growth':
+            value = f"+{entry['rss_delta'] / 2**20:.0f} MiB"
+        elif resource == 'disk':
+            value = f"{entry['io_bps'] / 2**20:.1f} MiB/s"
+        else:
+            value = f"+{entry['threads_delta']} threads, {entry['num_threads']} in all"
+        parts.append(f"{entry['name'] or entry['pid']} ({value})")
+    return ", ".join(parts)
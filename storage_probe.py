@@ -0,0 +1,228 @@
+import os
+import time
+
+# Storage device discovery and per-device I/O rates.
+#
+# Physical block devices are listed from /sys/block on Linux or Win32_DiskDrive
+# on Windows, and classified as SSD, HDD or USB so each can be looked up in the
+# matching benchmark table (virtual disks, whose kind cannot be told, as unknown). Live throughput, IOPS, latency and queue depth come
+# from deltas of psutil.disk_io_counters(perdisk=True) between two readings.
+
+SYS_BLOCK = '/sys/block'
+SYS_CLASS_BLOCK = '/sys/class/block'
+MOUNTINFO = '/proc/self/mountinfo'
+
+# Kernel block devices that are not physical drives
+VIRTUAL_PREFIXES = ('loop', 'ram', 'zram', 'dm-', 'md', 'sr', 'fd', 'nbd', 'rbd')
+
+# Disks presented by a hypervisor, whose rotational flag says nothing about the storage behind them
+VIRTUAL_BUSES = ('virtio', 'xen')
+VIRTUAL_MODELS = ('QEMU', 'VBOX', 'VMWARE', 'VIRTUAL')
+
+# Benchmark table attribute for each kind of device
+KIND_TABLES = {'ssd': 'ssd_data', 'hdd': 'hdd_data', 'usb': 'usb_data'}
+
+# A device counts as saturated above this busy percentage, or this average latency per kind
+BUSY_THRESHOLD = 80.0
+LATENCY_THRESHOLDS_MS = {'ssd': 10.0, 'hdd': 50.0, 'usb': 50.0}
+
+
+def _read(path, default=''):
+    try:
+        with open(path, 'r') as file:
+            return file.read().strip()
+    except OSError:
+        return default
+
+
+def device_kind(rotational, bus):
+    # 'usb', 'hdd' or 'ssd'; 'unknown' when the rotational flag is unknown (None)
+    if bus == 'usb':
+        return 'usb'
+    if rotational is None:
+        return 'unknown'
+    return 'hdd' if rotational else 'ssd'
+
+
+def list_linux_devices(sys_block=SYS_BLOCK):
+    # Physical block devices as dicts: name, model, vendor, size_bytes, rotational, removable, bus, kind.
+    # rotational is None for virtual disks.
+    devices = []
+    try:
+        names = sorted(os.listdir(sys_block))
+    except OSError:
+        return devices
+    for name in names:
+        if name.startswith(VIRTUAL_PREFIXES):
+            continue
+        base = os.path.join(sys_block, name)
+        device = os.path.join(base, 'device')
+        if not os.path.exists(device):
+            continue  # Virtual devices have no backing hardware
+        path = os.path.realpath(device)
+        if '/usb' in path:
+            bus = 'usb'
+        elif name.startswith('nvme'):
+            bus = 'nvme'
+        elif '/virtio' in path:
+            bus = 'virtio'
+        elif name.startswith('xvd'):
+            bus = 'xen'
+        else:
+            bus = 'ata' if '/ata' in path else 'scsi'
+        model = _read(os.path.join(device, 'model'))
+        vendor = _read(os.path.join(device, 'vendor'))
+        if bus in VIRTUAL_BUSES or any(word in f'{vendor} {model}'.upper() for word in VIRTUAL_MODELS):
+            rotational = None
+        else:
+            rotational = _read(os.path.join(base, 'queue', 'rotational'), '0') == '1'
+        devices.append({
+            'name': name,
+            'model': model,
+            'vendor': '' if vendor.upper() in ('ATA', '0X1AF4') else vendor,
+            'size_bytes': int(_read(os.path.join(base, 'size'), '0') or 0) * 512,
+            'rotational': rotational,
+            'removable': _read(os.path.join(base, 'removable'), '0') == '1',
+            'bus': bus,
+            'kind': device_kind(rotational, bus),
+        })
+    return devices
+
+
+def linux_system_device(path='/', sys_block=SYS_BLOCK, mountinfo=MOUNTINFO):
+    # Name of the physical block device holding path (e.g. 'nvme0n1' for a root on nvme0n1p2), or None.
+    # Filesystems without a block device number of their own (btrfs) are found through the mount table.
+    try:
+        dev = os.stat(path).st_dev
+        link = os.path.realpath(f'/sys/dev/block/{os.major(dev)}:{os.minor(dev)}')
+    except (OSError, AttributeError):
+        return None
+    if not os.path.exists(link):
+        source = mount_source(path, mountinfo)
+        if source is None:
+            return None
+        link = os.path.realpath(os.path.join(SYS_CLASS_BLOCK, os.path.basename(os.path.realpath(source))))
+    return physical_device(link, sys_block)
+
+
+def physical_device(link, sys_block=SYS_BLOCK):
+    # Name of the physical drive behind a /sys block device directory, or None. Partitions resolve to
+    # their disk; device-mapper (LVM, LUKS) and md devices are followed through their slaves.
+    if os.path.exists(os.path.join(link, 'partition')):
+        link = os.path.dirname(link)
+    name = os.path.basename(link)
+    if name.startswith(VIRTUAL_PREFIXES):
+        slaves = os.path.join(link, 'slaves')
+        try:
+            names = sorted(os.listdir(slaves))
+        except OSError:
+            return None
+        for slave in names:
+            found = physical_device(os.path.realpath(os.path.join(slaves, slave)), sys_block)
+            if found is not None:
+                return found
+        return None
+    return name if os.path.exists(os.path.join(sys_block, name)) else None
+
+
+def mount_source(path='/', mountinfo=MOUNTINFO):
+    # Device node mounted at the deepest mount point containing path (e.g. '/dev/nvme0n1p2'), or None
+    path = os.path.realpath(path)
+    best, source = None, None
+    try:
+        with open(mountinfo, 'r') as file:
+            for line in file:
+                fields, _, tail = line.partition(' - ')
+                fields, tail = fields.split(), tail.split()
+                if len(fields) < 5 or len(tail) < 2:
+                    continue
+                mount_point = fields[4].replace('\\040', ' ')
+                inside = path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+                if inside and (best is None or len(mount_point) >= len(best)):
+                    best, source = mount_point, tail[1]
+    except OSError:
+        return None
+    return source if source and source.startswith('/dev/') else None
+
+
+def list_windows_devices(connection):
+    # Physical disks from an open WMI connection, named like psutil's perdisk keys ("PhysicalDrive0").
+    # Rotation is unknown to Win32_DiskDrive, so "SSD" or "NVMe" in the model marks solid state drives.
+    devices = []
+    for disk in connection.Win32_DiskDrive():
+        model = (disk.Model or '').strip()
+        interface = (disk.InterfaceType or '').upper()
+        bus = 'usb' if interface == 'USB' or 'removable' in (disk.MediaType or '').lower() else interface.lower()
+        solid_state = any(word in model.upper() for word in ('SSD', 'NVME', 'SOLID'))
+        devices.append({
+            'name': f'PhysicalDrive{disk.Index}',
+            'model': model,
+            'vendor': '',
+            'size_bytes': int(disk.Size or 0),
+            'rotational': not solid_state,
+            'removable': bus == 'usb',
+            'bus': bus,
+            'kind': device_kind(not solid_state, bus),
+            'system': disk.Index == 0,  # Windows boots from disk 0 unless reconfigured
+        })
+    return devices
+
+
+def list_devices(connection=None):
+    # Physical drives of this machine, system drive first. The system drive has 'system' set; when it
+    # cannot be identified (e.g. a network root) no device has, and the list is not reordered.
+    # On Windows, connection is an open WMI connection.
+    if connection is not None:
+        return sorted(list_windows_devices(connection), key=lambda device: not device['system'])
+    devices = list_linux_devices()
+    system = linux_system_device()
+    for device in devices:
+        device['system'] = device['name'] == system
+    return sorted(devices, key=lambda device: not device.get('system'))
+
+
+def io_rates(before, after, elapsed):
+    # Rates of one device between two psutil sdiskio readings
+    reads = max(0, after.read_count - before.read_count)
+    writes = max(0, after.write_count - before.write_count)
+    wait_ms = max(0, after.read_time - before.read_time) + max(0, after.write_time - before.write_time)
+    rates = {
+        'read_bps': max(0, after.read_bytes - before.read_bytes) / elapsed,
+        'write_bps': max(0, after.write_bytes - before.write_bytes) / elapsed,
+        'read_iops': reads / elapsed,
+        'write_iops': writes / elapsed,
+        'latency_ms': wait_ms / (reads + writes) if reads + writes else 0.0,
+        # Little's law: time spent waiting per second of wall time is the average number in flight
+        'queue_depth': wait_ms / (elapsed * 1000.0),
+    }
+    if hasattr(after, 'busy_time'):
+        rates['busy'] = min(100.0, max(0, after.busy_time - before.busy_time) / (elapsed * 10.0))
+    return rates
+
+
+class DiskIOSampler:
+    # Per-device I/O rates between successive calls to sample()
+    def __init__(self, psutil_module=None):
+        if psutil_module is None:
+            import psutil as psutil_module
+        self.psutil = psutil_module
+        self.previous = None    # (timestamp, perdisk counters)
+
+    def ready(self):
+        return self.previous is not None
+
+    def sample(self, names=None):
+        # {device name: rates} since the previous call, for the given device names (default: all).
+        # The first call only records counters and returns {}.
+        now = time.monotonic()
+        counters = self.psutil.disk_io_counters(perdisk=True) or {}
+        previous, self.previous = self.previous, (now, counters)
+        if previous is None:
+            return {}
+        elapsed = max(now - previous[0], 1e-6)
+        rates = {}
+        for name, after in counters.items():
+            before = previous[1].get(name)
+            if before is not None and (names is None or name in names):
+                rates[name] = io_rates(before, after, elapsed)
+        return rates
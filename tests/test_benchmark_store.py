@@ -0,0 +1,36 @@
+import os
+
+from benchmark_store import BenchmarkTable, load_benchmark_table
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Benchmarks')
+
+
+def test_duplicate_part_number_survives_removal_of_one_row():
+    # The bundled GPU table lists VCG4080S16TFXPB1-O twice
+    table = load_benchmark_table(os.path.join(BENCHMARK_DIR, 'GPU_UserBenchmarks.csv'))
+    first = table.locate('VCG4080S16TFXPB1-O')
+    assert first is not None
+    assert table.remove('VCG4080S16TFXPB1-O') == 'deleted'
+    second = table.locate('VCG4080S16TFXPB1-O')
+    assert second is not None
+    assert table.string_at('part_number', second) == 'VCG4080S16TFXPB1-O'
+    assert table.remove('VCG4080S16TFXPB1-O') == 'deleted'
+    assert table.locate('VCG4080S16TFXPB1-O') is None
+
+
+def test_duplicate_keys_follow_moved_rows():
+    table = BenchmarkTable('SSD')
+    table.append('SSD', 'P1', 'Acme', 'Fast 1TB', 1, 300, 10, 'https://example.com/fast')
+    table.append('SSD', 'P2', 'Acme', 'Slow 1TB', 2, 100, 10, 'https://example.com/slow')
+    table.append('SSD', 'P1', 'Acme', 'Fast 1TB', 3, 290, 5, 'https://example.com/fast')
+    assert table.locate('P1') == 0
+    # Deleting row 0 moves row 2 into its place, which still holds P1 and the URL
+    table.delete(0)
+    assert table.locate('P1') == 0
+    assert table.locate(url='https://example.com/fast') == 0
+    assert table.locate('P2') == 1
+    table.upsert('SSD', 'P1', 'Acme', 'Fast 1TB', 3, 295, 6, 'https://example.com/fast')
+    assert table.benchmarks[0] == 295
+    assert table.remove('P1') == 'deleted'
+    assert table.locate('P1') is None
+    assert table.locate(url='https://example.com/fast') is None
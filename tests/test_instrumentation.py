@@ -0,0 +1,28 @@
+import threading
+
+from instrumentation import Tracer
+
+
+def test_overlapping_runs_keep_their_own_spans():
+    tracer = Tracer()
+    tracer.configure(True)
+    started = threading.Barrier(2)
+    traces = {}
+
+    def work(name):
+        with tracer.run(name) as trace:
+            started.wait()  # Both runs are in progress before either records a span
+            with tracer.span(f'{name}.step'):
+                pass
+            tracer.count(f'{name}.calls')
+        traces[name] = trace
+
+    threads = [threading.Thread(target=work, args=(name,)) for name in ('first', 'second')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for name, trace in traces.items():
+        assert [entry['name'] for entry in trace.spans] == [f'{name}.step']
+        assert trace.counters == {f'{name}.calls': 1}
+    assert tracer.summary()['runs'] == 2
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from benchmark_store import load_benchmark_table
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Benchmarks')
+
+# (table file, raw name as reported by WMI or cpuinfo, expected "Brand Model" or None)
+CASES = [
+    ('GPU_UserBenchmarks.csv', "NVIDIA GeForce RTX 4070 SUPER", "RTX 4070 Super"),
+    ('GPU_UserBenchmarks.csv', "NVIDIA GeForce RTX 4070 Ti", "RTX 4070 Ti"),
+    ('GPU_UserBenchmarks.csv', "NVIDIA GeForce RTX 4070", "RTX 4070"),
+    ('GPU_UserBenchmarks.csv', "NVIDIA GeForce GTX 1650 SUPER", "GTX 1650 Super"),
+    ('GPU_UserBenchmarks.csv', "NVIDIA GeForce GTX 1650", "GTX 1650"),
+    ('GPU_UserBenchmarks.csv', "AMD Radeon RX 6800 XT", "RX 6800 XT"),
+    ('GPU_UserBenchmarks.csv', "AMD Radeon RX 6800", "RX 6800"),
+    ('GPU_UserBenchmarks.csv', "Microsoft Basic Display Adapter", None),
+    ('CPU_UserBenchmarks.csv', "Intel(R) Xeon(R) CPU E5-2690 v4 @ 2.60GHz", None),
+    ('CPU_UserBenchmarks.csv', "Intel(R) Xeon(R) CPU E5-1650 v3 @ 3.50GHz", "Xeon E5-1650 v3"),
+    ('CPU_UserBenchmarks.csv', "13th Gen Intel(R) Core(TM) i7-13700K", "Core i7-13700K"),
+    ('CPU_UserBenchmarks.csv', "Intel(R) Core(TM) i5-8400 CPU @ 2.80GHz", "Core i5-8400"),
+]
+
+# Scores of the expected rows, so any of a model's listings (reference or board partner) passes
+SCORES = {
+    "RTX 4070 Super": 215, "RTX 4070 Ti": 240, "RTX 4070": 190, "GTX 1650 Super": 58.7, "GTX 1650": 42.8,
+}
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['rows', 'deduplicated'])
+def tables(request):
+    loaded = {}
+
+    def table(filename):
+        if filename not in loaded:
+            loaded[filename] = load_benchmark_table(os.path.join(BENCHMARK_DIR, filename))
+            if request.param:
+                loaded[filename].deduplicate()
+        return loaded[filename]
+    return table
+
+
+def normalized(name):
+    return ' '.join(name.lower().replace('-', ' ').replace('(', ' ').replace(')', ' ').split())
+
+
+@pytest.mark.parametrize('filename, name, expected', CASES)
+def test_match(tables, filename, name, expected):
+    row = tables(filename).find(name)
+    if expected is None:
+        assert row is None
+    elif expected in SCORES:
+        assert row is not None and row.benchmark == SCORES[expected]
+    else:
+        assert row is not None and normalized(expected) in normalized(row.model)
+
+
+def test_unknown_model_number_is_not_matched(tmp_path):
+    path = tmp_path / 'SYN.csv'
+    path.write_text("Type,Part Number,Brand,Model,Rank,Benchmark,Samples,URL\n"
+                    "CPU,P1,Intel,RTX 12345S 8GB,1,100,10,https://example.com/1\n"
+                    "CPU,P2,Intel,Ryzen 2222X 32GB,2,90,10,https://example.com/2\n")
+    table = load_benchmark_table(str(path))
+    assert table.find("Intel RTX 12345S 8GB").model == "RTX 12345S 8GB"
+    assert table.find("Intel Ryzen 12345X 32GB") is None
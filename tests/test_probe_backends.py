@@ -0,0 +1,52 @@
+import json
+
+from probe_backends import STATIC_DEFAULTS, FixtureBackend, run_probes
+
+RECORDED = {
+    'probes': {
+        'cpu': {'cpu': "AMD Ryzen 7 5800X 8-Core Processor"},
+        'ram': {'ram': "Corsair DDR4 3200MHz", 'ram_total': 34359738368},
+        'gpu': {'gpu': "NVIDIA GeForce RTX 3080", 'gpu_usage': "N/A"},
+    },
+    'delays': {'gpu': 1.0},
+}
+
+
+def load_fixture(tmp_path, data=RECORDED):
+    path = tmp_path / 'machine.json'
+    path.write_text(json.dumps(data))
+    return FixtureBackend.load(str(path))
+
+
+def test_replays_recorded_results(tmp_path):
+    backend = load_fixture(tmp_path)
+    assert backend.cpu() == RECORDED['probes']['cpu']
+    assert backend.ram()['ram_total'] == 34359738368
+
+
+def test_slow_and_missing_probes_fall_back_to_defaults(tmp_path):
+    backend = load_fixture(tmp_path)
+    results, errors = run_probes(backend.probes(), timeout=2.0, timeouts={'gpu': 0.1}, defaults=STATIC_DEFAULTS)
+    assert results['cpu'] == RECORDED['probes']['cpu']
+    assert results['ram'] == RECORDED['probes']['ram']
+    # The delayed gpu probe misses its own timeout while the others keep the default one
+    assert isinstance(errors['gpu'], TimeoutError)
+    assert results['gpu'] == STATIC_DEFAULTS['gpu']
+    # storage is not in the fixture, so it fails like a broken probe would
+    assert isinstance(errors['storage'], KeyError)
+    assert results['storage'] == STATIC_DEFAULTS['storage']
+    assert set(errors) == {'gpu', 'storage'}
+
+
+def test_delay_within_timeout_keeps_result(tmp_path):
+    backend = load_fixture(tmp_path, {'probes': RECORDED['probes'], 'delays': {'gpu': 0.05}})
+    results, errors = run_probes({'gpu': backend.gpu}, timeout=2.0, defaults=STATIC_DEFAULTS)
+    assert errors == {}
+    assert results['gpu'] == RECORDED['probes']['gpu']
+
+
+def test_without_defaults_failed_probes_have_no_result(tmp_path):
+    backend = load_fixture(tmp_path)
+    results, errors = run_probes({'storage': backend.storage})
+    assert results == {}
+    assert isinstance(errors['storage'], KeyError)
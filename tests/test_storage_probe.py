@@ -0,0 +1,64 @@
+import os
+
+from storage_probe import list_linux_devices, mount_source, physical_device
+
+
+def make_disk(sys_devices, sys_block, name, bus_path, rotational='0', model=''):
+    # A /sys/devices disk directory linked from sys_block, like the kernel lays them out
+    disk = os.path.join(sys_devices, bus_path, name)
+    os.makedirs(os.path.join(disk, 'queue'))
+    os.makedirs(os.path.join(disk, 'device'))
+    with open(os.path.join(disk, 'queue', 'rotational'), 'w') as file:
+        file.write(rotational)
+    with open(os.path.join(disk, 'device', 'model'), 'w') as file:
+        file.write(model)
+    os.symlink(disk, os.path.join(sys_block, name))
+    return disk
+
+
+def make_partition(disk, name):
+    partition = os.path.join(disk, name)
+    os.makedirs(partition)
+    open(os.path.join(partition, 'partition'), 'w').close()
+    return partition
+
+
+def test_virtual_disks_have_unknown_kind(tmp_path):
+    sys_devices, sys_block = tmp_path / 'devices', tmp_path / 'block'
+    sys_block.mkdir()
+    make_disk(str(sys_devices), str(sys_block), 'vda', 'pci0000:00/virtio1/block', rotational='1')
+    make_disk(str(sys_devices), str(sys_block), 'sda', 'pci0000:00/ata1/block', rotational='1', model='QEMU HARDDISK')
+    make_disk(str(sys_devices), str(sys_block), 'sdb', 'pci0000:00/ata2/block', rotational='1', model='ST1000DM010')
+    devices = {device['name']: device for device in list_linux_devices(str(sys_block))}
+    assert devices['vda']['rotational'] is None and devices['vda']['kind'] == 'unknown'
+    assert devices['sda']['rotational'] is None and devices['sda']['kind'] == 'unknown'
+    assert devices['sdb']['rotational'] is True and devices['sdb']['kind'] == 'hdd'
+
+
+def test_device_mapper_resolves_through_slaves(tmp_path):
+    # LUKS (dm-1) on LVM (dm-0) on nvme0n1p3
+    sys_devices, sys_block = tmp_path / 'devices', tmp_path / 'block'
+    sys_block.mkdir()
+    disk = make_disk(str(sys_devices), str(sys_block), 'nvme0n1', 'pci0000:00/nvme/nvme0')
+    partition = make_partition(disk, 'nvme0n1p3')
+    lvm = sys_devices / 'virtual' / 'block' / 'dm-0'
+    luks = sys_devices / 'virtual' / 'block' / 'dm-1'
+    (lvm / 'slaves').mkdir(parents=True)
+    (luks / 'slaves').mkdir(parents=True)
+    os.symlink(partition, str(lvm / 'slaves' / 'nvme0n1p3'))
+    os.symlink(str(lvm), str(luks / 'slaves' / 'dm-0'))
+    assert physical_device(str(luks), str(sys_block)) == 'nvme0n1'
+    assert physical_device(partition, str(sys_block)) == 'nvme0n1'
+    assert physical_device(str(sys_devices / 'virtual' / 'block' / 'loop0'), str(sys_block)) is None
+
+
+def test_mount_source_takes_deepest_mount(tmp_path):
+    mountinfo = tmp_path / 'mountinfo'
+    mountinfo.write_text(
+        "22 1 0:31 /@ / rw,relatime shared:1 - btrfs /dev/nvme0n1p2 rw\n"
+        "23 22 0:32 /@home /home rw,relatime shared:2 - btrfs /dev/sda1 rw\n"
+        "24 22 0:5 / /dev rw shared:3 - devtmpfs devtmpfs rw\n"
+    )
+    assert mount_source('/home/user', str(mountinfo)) == '/dev/sda1'
+    assert mount_source('/usr', str(mountinfo)) == '/dev/nvme0n1p2'
+    assert mount_source('/dev/null', str(mountinfo)) is None
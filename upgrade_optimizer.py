@@ -0,0 +1,197 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+# Budget-constrained whole-system upgrade search.
+#
+# Each priced part is resolved against its benchmark table, and every component
+# gets a list of options: keep the current part for free, or buy a faster one.
+# A set of choices is judged by its balance, the harmonic mean of the chosen
+# parts' scores relative to the best part in each table, so the weakest
+# component dominates as it does in bottleneck detection. Minimizing the sum of
+# reciprocal scores is additive, so the search merges components pairwise and
+# after every merge drops dominated sets (costlier and no better), which keeps
+# the space small. The result is the Pareto frontier of cost against balance.
+
+COMPONENTS = ('CPU', 'GPU', 'RAM', 'SSD')
+
+# Columns of a price list CSV; URL is optional and Part Number or Model identifies the part
+PRICE_COLUMNS = ('Type', 'Part Number', 'Brand', 'Model', 'Price')
+
+# Relative score given to parts that are missing from their table, instead of zero
+MIN_RELATIVE_SCORE = 0.01
+
+
+def read_price_list(file):
+    # Yield {'type', 'part_number', 'brand', 'model', 'price'} for each priced row of an open CSV file.
+    # Rows without a usable price are skipped.
+    for row in csv.DictReader(file):
+        try:
+            price = float(str(row.get('Price') or '').replace('$', '').replace(',', ''))
+        except ValueError:
+            continue
+        if price < 0:
+            continue
+        yield {
+            'type': (row.get('Type') or '').strip().upper(),
+            'part_number': (row.get('Part Number') or '').strip(),
+            'brand': (row.get('Brand') or '').strip(),
+            'model': (row.get('Model') or '').strip(),
+            'price': price,
+        }
+
+
+def load_price_list(filename):
+    with open(filename, 'r', newline='') as file:
+        return list(read_price_list(file))
+
+
+def price_index(prices):
+    # Lowercased part number, model and "brand model" -> lowest price, for get_price
+    index = {}
+    for entry in prices:
+        for key in (entry['part_number'], entry['model'], f"{entry['brand']} {entry['model']}".strip()):
+            key = key.lower()
+            if key and entry['price'] < index.get(key, float('inf')):
+                index[key] = entry['price']
+    return index
+
+
+def resolve_prices(tables, prices):
+    # Match price entries to table rows. Returns ({component: [(price, row)]}, [unmatched entries]).
+    options = {component: [] for component in COMPONENTS}
+    unmatched = []
+    for entry in prices:
+        table = tables.get(f"{entry['type'].lower()}_data")
+        if entry['type'] not in options or table is None:
+            unmatched.append(entry)
+            continue
+        index = table.locate(entry['part_number']) if entry['part_number'] else None
+        row = table[index] if index is not None else table.find(f"{entry['brand']} {entry['model']}")
+        if row is None:
+            unmatched.append(entry)
+        else:
+            options[entry['type']].append((entry['price'], row))
+    return options, unmatched
+
+
+def pareto(options):
+    # Options that no cheaper-or-equal option beats on penalty, cheapest first.
+    # Each option is (cost, penalty, picks).
+    frontier = []
+    best = float('inf')
+    for option in sorted(options, key=lambda option: (option[0], option[1])):
+        if option[1] < best:
+            frontier.append(option)
+            best = option[1]
+    return frontier
+
+
+def combine(left, right, budget):
+    # Pareto frontier of every pairing of two frontiers that fits the budget
+    options = []
+    for cost, penalty, picks in left:
+        if cost > budget:
+            break
+        for other_cost, other_penalty, other_picks in right:
+            total = cost + other_cost
+            if total > budget:
+                break  # right is sorted by cost
+            options.append((total, penalty + other_penalty, picks + other_picks))
+    return pareto(options)
+
+
+def component_options(component, current_score, top_score, priced, budget, weight=1.0):
+    # Frontier for one component: keep the current part, or buy a priced part that scores higher
+    def penalty(score):
+        return weight / max(score / top_score if top_score else 0.0, MIN_RELATIVE_SCORE)
+
+    options = [(0.0, penalty(current_score), ())]
+    for price, row in priced:
+        if price <= budget and row.benchmark > current_score:
+            options.append((price, penalty(row.benchmark), ((component, price, row),)))
+    return pareto(options)
+
+
+def optimize_upgrades(engine, system_info, prices, budget, weights=None, limit=None):
+    # Pareto frontier of upgrade sets within budget, cheapest first, as JSON-friendly dicts:
+    # {'cost', 'balanced_score', 'upgrades': [{'component', 'brand', 'model', ...}]}.
+    # balanced_score is the harmonic mean of each part's score relative to its table's best part, times 100.
+    weights = weights or {}
+    current = engine.component_scores(system_info)
+    resolved, _ = resolve_prices(engine.tables, prices)
+    frontiers = []
+    total_weight = 0.0
+    for component in COMPONENTS:
+        table = engine.tables[f'{component.lower()}_data']
+        best = table.score_index.above(float('-inf'), limit=1)
+        top_score = table.benchmarks[best[0]] if len(best) else 0.0
+        weight = weights.get(component, 1.0)
+        total_weight += weight
+        frontiers.append(component_options(component, current[component], top_score, resolved[component], budget, weight))
+
+    # Merge the smallest frontiers first, so intermediate products stay small
+    frontiers.sort(key=len)
+    frontier = frontiers[0]
+    for other in frontiers[1:]:
+        frontier = combine(frontier, other, budget)
+
+    results = []
+    for cost, penalty, picks in frontier:
+        results.append({
+            'cost': round(cost, 2),
+            'balanced_score': round(100.0 * total_weight / penalty, 2),
+            'upgrades': [{
+                'component': component,
+                'brand': row.brand,
+                'model': row.model,
+                'part_number': row.part_number,
+                'price': price,
+                'score': row.benchmark,
+                'current_score': current[component],
+            } for component, price, row in picks],
+        })
+    if limit is not None:
+        results = results[-limit:]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the best balanced upgrade sets for a budget.")
+    parser.add_argument('prices', help="price list CSV with Type, Part Number, Brand, Model and Price columns")
+    parser.add_argument('--budget', type=float, required=True)
+    parser.add_argument('--snapshot', help="system_info JSON file (default: use --cpu/--gpu/--ram/--ssd)")
+    for component in COMPONENTS:
+        parser.add_argument(f'--{component.lower()}', help=f"name of the installed {component}")
+    parser.add_argument('--weight', action='append', default=[], metavar='COMPONENT=WEIGHT',
+                        help="importance of a component's score, e.g. GPU=2 (default 1)")
+    parser.add_argument('--benchmarks', default='Benchmarks', help="directory containing the benchmark CSV files")
+    args = parser.parse_args(argv)
+
+    from analysis_engine import AnalysisEngine
+    if args.snapshot:
+        with open(args.snapshot, 'r') as file:
+            system_info = json.load(file)
+    else:
+        system_info = {component.lower(): getattr(args, component.lower()) or 'Unknown' for component in COMPONENTS}
+    weights = {}
+    for item in args.weight:
+        component, _, value = item.partition('=')
+        weights[component.upper()] = float(value)
+
+    engine = AnalysisEngine.load(args.benchmarks, deduplicate=True)
+    prices = load_price_list(args.prices)
+    _, unmatched = resolve_prices(engine.tables, prices)
+    for entry in unmatched:
+        print(f"Warning: no benchmark entry for {entry['type']} {entry['brand']} {entry['model']}".rstrip(), file=sys.stderr)
+    start = time.perf_counter()
+    frontier = optimize_upgrades(engine, system_info, prices, args.budget, weights)
+    print(f"Searched {len(prices)} prices in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    print(json.dumps(frontier, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import threading
+import time
+from array import array
+
+# Windowed utilization sampling.
+#
+# A background thread samples per-core CPU, memory, swap, disk I/O and network
+# counters at a fixed rate into fixed-size ring buffers, so bottleneck decisions
+# can use percentiles and sustained saturation over the window instead of one
+# instantaneous reading. Rates are computed from counter deltas between samples.
+
+DEFAULT_INTERVAL = 1.0      # Seconds between samples
+DEFAULT_WINDOW = 300.0      # Seconds of history kept per metric
+
+# Level at which a metric counts as saturated for sustained-saturation statistics
+SATURATION_THRESHOLDS = {
+    'cpu': 80.0,
+    'cpu_max_core': 90.0,
+    'memory': 80.0,
+    'swap': 10.0,
+    'disk_busy': 80.0,
+}
+
+
+class RingBuffer:
+    # Fixed-capacity buffer of floats backed by an array; the oldest value is overwritten when full
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        end = (self.start + self.count) % self.capacity
+        self.data[end] = value
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def values(self):
+        # Contents in chronological order
+        end = self.start + self.count
+        if end <= self.capacity:
+            return self.data[self.start:end]
+        return self.data[self.start:] + self.data[:end - self.capacity]
+
+    def last(self):
+        if not self.count:
+            return None
+        return self.data[(self.start + self.count - 1) % self.capacity]
+
+
+def percentile(values, p, presorted=False):
+    # Linearly interpolated percentile (0-100) of a sequence, or None when empty
+    ordered = values if presorted else sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * p / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def saturation(values, threshold):
+    # (fraction of samples at or above threshold, longest consecutive run of such samples)
+    above = longest = run = 0
+    for value in values:
+        if value >= threshold:
+            above += 1
+            run += 1
+            longest = max(longest, run)
+        else:
+            run = 0
+    return (above / len(values) if values else 0.0), longest
+
+
+def summarize(values, interval, threshold=None):
+    # Window statistics of one metric
+    values = list(values)
+    if not values:
+        return None
+    ordered = sorted(values)
+    summary = {
+        'mean': sum(values) / len(values),
+        'p50': percentile(ordered, 50, presorted=True),
+        'p95': percentile(ordered, 95, presorted=True),
+        'max': ordered[-1],
+        'last': values[-1],
+    }
+    if threshold is not None:
+        fraction, run = saturation(values, threshold)
+        summary['saturated_fraction'] = fraction
+        summary['longest_saturated_seconds'] = run * interval
+    return summary
+
+
+class UsageSampler:
+    def __init__(self, interval=DEFAULT_INTERVAL, window=DEFAULT_WINDOW, psutil_module=None):
+        if psutil_module is None:
+            import psutil as psutil_module
+        self.psutil = psutil_module
+        self.interval = interval
+        self.capacity = max(2, int(round(window / interval)))
+        self.buffers = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+        self.previous = None  # (timestamp, counters) of the last sample, for deltas
+        self.on_sample = None  # Called as on_sample(wall-clock time, {metric: value}) after each sample
+
+    def _buffer(self, metric):
+        buffer = self.buffers.get(metric)
+        if buffer is None:
+            buffer = self.buffers[metric] = RingBuffer(self.capacity)
+        return buffer
+
+    def _read_counters(self):
+        psutil = self.psutil
+        counters = {'cpu_times': psutil.cpu_times(percpu=True)}
+        try:
+            counters['disk'] = psutil.disk_io_counters()
+        except Exception:
+            counters['disk'] = None
+        try:
+            counters['net'] = psutil.net_io_counters()
+        except Exception:
+            counters['net'] = None
+        return counters
+
+    def sample(self):
+        # Take one sample. The first call only records counters, since rates need two readings.
+        now = time.monotonic()
+        counters = self._read_counters()
+        memory = self.psutil.virtual_memory().percent
+        try:
+            swap = self.psutil.swap_memory().percent
+        except Exception:
+            swap = 0.0
+
+        previous, self.previous = self.previous, (now, counters)
+        if previous is None:
+            return False
+        elapsed = max(now - previous[0], 1e-6)
+        old = previous[1]
+
+        values = {'memory': memory, 'swap': swap}
+        cores = [core_busy_percent(before, after) for before, after in zip(old['cpu_times'], counters['cpu_times'])]
+        if cores:
+            values['cpu'] = sum(cores) / len(cores)
+            values['cpu_max_core'] = max(cores)
+            for number, busy in enumerate(cores):
+                values[f'cpu_core_{number}'] = busy
+
+        disk, old_disk = counters['disk'], old['disk']
+        if disk is not None and old_disk is not None:
+            values['disk_read_bps'] = max(0, disk.read_bytes - old_disk.read_bytes) / elapsed
+            values['disk_write_bps'] = max(0, disk.write_bytes - old_disk.write_bytes) / elapsed
+            if hasattr(disk, 'busy_time'):
+                busy_ms = max(0, disk.busy_time - old_disk.busy_time)
+                values['disk_busy'] = min(100.0, busy_ms / (elapsed * 10.0))
+
+        net, old_net = counters['net'], old['net']
+        if net is not None and old_net is not None:
+            values['net_sent_bps'] = max(0, net.bytes_sent - old_net.bytes_sent) / elapsed
+            values['net_recv_bps'] = max(0, net.bytes_recv - old_net.bytes_recv) / elapsed
+
+        with self.lock:
+            self._buffer('time').append(now)
+            for metric, value in values.items():
+                self._buffer(metric).append(value)
+        if self.on_sample is not None:
+            self.on_sample(time.time(), values)
+        return True
+
+    def start(self):
+        # Sample on a daemon thread until stop() is called
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.sample()
+        self.thread = threading.Thread(target=self._run, name="usage-sampler", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling usage: {e}")
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def sample_count(self):
+        with self.lock:
+            buffer = self.buffers.get('time')
+            return len(buffer) if buffer else 0
+
+    def values(self, metric):
+        with self.lock:
+            buffer = self.buffers.get(metric)
+            return list(buffer.values()) if buffer else []
+
+    def summary(self):
+        # Window statistics for every metric, as a JSON-friendly dict:
+        # {'samples': n, 'duration': seconds, 'interval': seconds, 'metrics': {metric: stats}}
+        with self.lock:
+            snapshot = {metric: list(buffer.values()) for metric, buffer in self.buffers.items()}
+        times = snapshot.pop('time', [])
+        metrics = {}
+        for metric, values in snapshot.items():
+            threshold = SATURATION_THRESHOLDS.get(metric)
+            if threshold is None and metric.startswith('cpu_core_'):
+                threshold = SATURATION_THRESHOLDS['cpu_max_core']
+            metrics[metric] = summarize(values, self.interval, threshold)
+        return {
+            'samples': len(times),
+            'duration': (times[-1] - times[0] + self.interval) if times else 0.0,
+            'interval': self.interval,
+            'metrics': metrics,
+        }
+
+
+def core_busy_percent(before, after):
+    # Busy percentage of one core between two cpu_times readings
+    idle_fields = ('idle', 'iowait')
+    total = busy = 0.0
+    for field in after._fields:
+        delta = getattr(after, field) - getattr(before, field)
+        if field in ('guest', 'guest_nice'):
+            continue  # Already counted in user and nice on Linux
+        total += delta
+        if field not in idle_fields:
+            busy += delta
+    if total <= 0:
+        return 0.0
+    return max(0.0, min(100.0, busy / total * 100.0))